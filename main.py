@@ -1,4 +1,5 @@
 import streamlit as st
+from utils import metrics
 
 st.set_page_config(
     page_title="NSE Stock Analysis",
@@ -75,5 +76,9 @@ def main():
         from pages.news import news_page
         news_page()
 
+    from pages.performance import performance_panel
+    performance_panel()
+    metrics.start_exporter()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
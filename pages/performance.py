@@ -0,0 +1,39 @@
+import json
+
+import streamlit as st
+import pandas as pd
+from utils import metrics
+
+def performance_panel():
+    """Sidebar panel with per-stage latency, cache hit rates and slowest items of this session's last run."""
+    with st.sidebar.expander("Performance"):
+        if not metrics.ENABLED:
+            st.caption("Metrics are disabled (NSE_METRICS=0)")
+            return
+
+        # The page run just now may have started a run; otherwise show the session's previous one
+        run_id = metrics.current_run() or st.session_state.get('metrics_run')
+        st.session_state['metrics_run'] = run_id
+        run = metrics.registry.last_run(run_id)
+        if run is None:
+            st.caption("No run recorded yet")
+        else:
+            st.caption(f"Last run: {run['name']} ({run['elapsed']:.2f}s)")
+            if run['stages']:
+                # seconds include nested stages (scoring includes indicators and signals), self_seconds do not
+                stages = pd.DataFrame.from_dict(run['stages'], orient='index')
+                st.dataframe(stages.sort_values('self_seconds', ascending=False))
+
+            rates = metrics.cache_hit_rates(run['counters'])
+            for cache, rate in rates.items():
+                if rate is not None:
+                    st.metric(f"{cache} hit rate", f"{rate:.0%}")
+
+            if run['slowest']:
+                st.markdown("**Slowest items**")
+                st.dataframe(pd.DataFrame(run['slowest']), hide_index=True)
+
+        st.download_button("Metrics (JSON)", json.dumps(metrics.registry.to_dict(run_id), default=str, indent=2),
+                           file_name="metrics.json", mime="application/json")
+        st.download_button("Metrics (Prometheus)", metrics.registry.to_prometheus(),
+                           file_name="metrics.prom", mime="text/plain")
@@ -1,15 +1,145 @@
 import streamlit as st
 import pandas as pd
-from utils.stock_data import get_stock_data, format_number
-from utils.recommendation_engine import analyze_stock
+from utils.engine import (cached_recommendations, filter_recommendations, generate_recommendations, sector_summary,
+                          similar_stocks)
+from utils.recommendation_engine import recommendation_basis
+from utils.scheduler import get_store, load_symbols
+from utils import metrics
+
+RECOMMENDATION_COLORS = {
+    'Strong Buy': 'background-color: #9fff9c',
+    'Buy': 'background-color: #c8ffc6',
+    'Strong Sell': 'background-color: #ffc6c6',
+    'Sell': 'background-color: #ffdede',
+}
+# Rows in the live table while the analysis runs and per page of the results table
+LIVE_ROWS = 10
+PAGE_SIZE = 50
+
+def show_recommendations_progress(symbols_list):
+    """Fetch and score ``symbols_list``, showing ranked partial results as chunks land."""
+    # Progress bar for analysis
+    progress_bar = st.progress(0)
+    status = st.empty()
+    live_table = st.empty()
+
+    def progress(done, total, recommendations):
+        progress_bar.progress(done / total)
+        if recommendations:
+            with metrics.span('render'):
+                status.caption(f"Top {LIVE_ROWS} of {len(recommendations)} stocks analyzed so far ({done}/{total} fetched)")
+                live_table.dataframe(
+                    pd.DataFrame(recommendations)[['symbol', 'recommendation', 'technical_score', 'last_price']]
+                    .nlargest(LIVE_ROWS, 'technical_score'),
+                    hide_index=True
+                )
+
+    # Each fetched chunk is scored as soon as it arrives
+    recommendations = generate_recommendations(symbols_list, progress=progress)
+    status.empty()
+    live_table.empty()
+    return recommendations
+
+def color_recommendations(recommendations):
+    """Background colours for a column of recommendation labels."""
+    return recommendations.map(RECOMMENDATION_COLORS).fillna('')
+
+def show_similar_stocks(correlation, rec_df):
+    """Stocks that move like a chosen one, and how concentrated the buy signals are."""
+    st.subheader("Similar Stocks")
+    choices = [symbol for symbol in rec_df['symbol'] if symbol in correlation.symbols]
+    if not choices:
+        return
+    symbol = st.selectbox("Stocks moving like", choices)
+    st.dataframe(similar_stocks(correlation, symbol, rec_df).style.format({'correlation': '{:.2f}'}),
+                 hide_index=True)
+
+    buys = rec_df.loc[rec_df['recommendation'].isin(['Buy', 'Strong Buy']), 'symbol']
+    if len(buys) > 1:
+        st.caption(f"Buy signals move together with an average {correlation.window}-day return correlation of "
+                   f"{correlation.crowding(buys):.2f}, against {correlation.crowding():.2f} across all stocks")
+
+def display_recommendations(recommendations, min_confidence):
+    """Render the recommendation table, insights and market sentiment."""
+    if recommendations:
+        # Filter by confidence and sort by technical score
+        rec_df = filter_recommendations(recommendations, min_confidence)
+
+        # Display recommendations
+        st.subheader("Stock Recommendations")
+
+        # Sectors come from the local metadata store, so filtering needs no requests
+        sectors = st.multiselect("Sectors", sorted(rec_df['sector'].unique()) if len(rec_df) else [])
+        shown_df = rec_df[rec_df['sector'].isin(sectors)] if sectors else rec_df
+
+        # Only one page of rows is formatted and styled, so rendering cost stays flat
+        pages = max(1, -(-len(shown_df) // PAGE_SIZE))
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1) if pages > 1 else 1
+        page_df = shown_df.iloc[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]
+
+        # Format DataFrame for display
+        display_df = page_df.copy()
+        display_df['price_change'] = display_df['price_change'].round(2).astype(str) + '%'
+        display_df['technical_score'] = display_df['technical_score'].round(2)
+        display_df['Basis'] = recommendation_basis(page_df) if len(page_df) else []
+
+        # Display styled table
+        with metrics.span('render'):
+            st.dataframe(
+                display_df[['symbol', 'sector', 'recommendation', 'confidence', 'technical_score', 
+                          'price_change', 'last_price', 'Basis']]
+                .style
+                .apply(color_recommendations, subset=['recommendation'])
+                .format({'last_price': '₹{:.2f}'})
+            )
+        st.caption(f"Showing {len(page_df)} of {len(shown_df)} recommendations")
+
+        # Sector overview
+        if len(rec_df):
+            st.subheader("Sector Overview")
+            st.dataframe(sector_summary(rec_df).style.format({'mean_score': '{:.1f}'}))
+
+        # Return correlations published by the background scheduler
+        correlation, _ = get_store().get('correlation')
+        if correlation is not None and len(rec_df):
+            show_similar_stocks(correlation, rec_df)
+
+        # Display analysis insights
+        st.subheader("Analysis Insights")
+        total_analyzed = len(recommendations)
+        buy_signals = len(rec_df[rec_df['recommendation'].isin(['Buy', 'Strong Buy'])])
+        sell_signals = len(rec_df[rec_df['recommendation'].isin(['Sell', 'Strong Sell'])])
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Total Stocks Analyzed", total_analyzed)
+        col2.metric("Buy Signals", buy_signals)
+        col3.metric("Sell Signals", sell_signals)
+
+        # Display market sentiment
+        st.subheader("Market Sentiment")
+        buy_percentage = (buy_signals / total_analyzed) * 100
+        if buy_percentage > 60:
+            sentiment = "Bullish"
+            color = "green"
+        elif buy_percentage < 40:
+            sentiment = "Bearish"
+            color = "red"
+        else:
+            sentiment = "Neutral"
+            color = "gray"
+
+        st.markdown(f"Overall Market Sentiment: <span style='color: {color}'>{sentiment}</span>", 
+                  unsafe_allow_html=True)
+
+    else:
+        st.warning("No recommendations generated. Please try with different parameters.")
 
 def recommendations_page():
     st.title("AI Stock Recommendations")
 
     # Load symbols
     try:
-        symbols = pd.read_csv("attached_assets/symbol.csv", names=['Symbol'], skiprows=1)
-        symbols_list = symbols['Symbol'].dropna().tolist()
+        symbols_list = load_symbols()
     except Exception as e:
         st.error(f"Error loading symbols: {str(e)}")
         return
@@ -17,113 +147,31 @@ def recommendations_page():
     # Analysis parameters
     min_confidence = st.selectbox("Minimum Confidence Level", ["Low", "Medium", "High"])
 
-    if st.button("Generate Recommendations"):
-        with st.spinner("Analyzing all NSE stocks..."):
-            recommendations = []
-
-            # Progress bar for analysis
-            progress_bar = st.progress(0)
-            total_stocks = len(symbols_list)
-
-            # Analyze each stock
-            for idx, symbol in enumerate(symbols_list):
-                df, error = get_stock_data(symbol, period='3mo', interval='1d')
-                if error:
-                    continue
-
-                analysis = analyze_stock(symbol, df)
-                if analysis:
-                    recommendations.append(analysis)
-
-                # Update progress
-                progress_bar.progress((idx + 1) / total_stocks)
-
-            if recommendations:
-                # Convert to DataFrame
-                rec_df = pd.DataFrame(recommendations)
-
-                # Filter by confidence
-                confidence_levels = {'Low': 0, 'Medium': 1, 'High': 2}
-                min_conf_level = confidence_levels[min_confidence]
-                rec_df = rec_df[rec_df['confidence'].map(lambda x: confidence_levels[x]) >= min_conf_level]
-
-                # Sort by technical score
-                rec_df = rec_df.sort_values('technical_score', ascending=False)
-
-                # Display recommendations
-                st.subheader("Stock Recommendations")
-
-                # Format DataFrame for display
-                display_df = rec_df.copy()
-                display_df['price_change'] = display_df['price_change'].round(2).astype(str) + '%'
-                display_df['technical_score'] = display_df['technical_score'].round(2)
-
-                # Generate recommendation basis
-                basis_list = []
-                for _, row in display_df.iterrows():
-                    signals = []
-                    if row['technical_score'] > 50:
-                        signals.append("Strong technical indicators")
-                    if 'RSI' in row['signal_summary'] and row['signal_summary']['RSI'] == 'Oversold':
-                        signals.append("Oversold (RSI)")
-                    if 'MACD' in row['signal_summary'] and row['signal_summary']['MACD'] == 'Buy':
-                        signals.append("Bullish MACD crossover")
-                    if 'Moving Average' in row['signal_summary'] and row['signal_summary']['Moving Average'] == 'Bullish':
-                        signals.append("Above key moving averages")
-                    basis_list.append(", ".join(signals) if signals else "Multiple factors")
-
-                display_df['Basis'] = basis_list
-
-                # Color-code recommendations
-                def color_recommendations(val):
-                    if 'Strong Buy' in val:
-                        return 'background-color: #9fff9c'
-                    elif 'Buy' in val:
-                        return 'background-color: #c8ffc6'
-                    elif 'Strong Sell' in val:
-                        return 'background-color: #ffc6c6'
-                    elif 'Sell' in val:
-                        return 'background-color: #ffdede'
-                    return ''
-
-                # Display styled table
-                st.dataframe(
-                    display_df[['symbol', 'recommendation', 'confidence', 'technical_score', 
-                              'price_change', 'last_price', 'Basis']]
-                    .style
-                    .apply(lambda x: [color_recommendations(val) for val in x], axis=1, subset=['recommendation'])
-                    .format({'last_price': '₹{:.2f}'})
-                )
+    # Results precomputed by the background scheduler
+    store = get_store()
+    precomputed, _ = store.get('recommendations')
+    refreshed_at = store.last_refresh('universe_refresh')
+    if refreshed_at:
+        st.caption(f"Background analysis last refreshed at {refreshed_at:%I:%M %p, %d %b %Y} IST")
 
-                # Display analysis insights
-                st.subheader("Analysis Insights")
-                total_analyzed = len(recommendations)
-                buy_signals = len(rec_df[rec_df['recommendation'].isin(['Buy', 'Strong Buy'])])
-                sell_signals = len(rec_df[rec_df['recommendation'].isin(['Sell', 'Strong Sell'])])
-
-                col1, col2, col3 = st.columns(3)
-                col1.metric("Total Stocks Analyzed", total_analyzed)
-                col2.metric("Buy Signals", buy_signals)
-                col3.metric("Sell Signals", sell_signals)
-
-                # Display market sentiment
-                st.subheader("Market Sentiment")
-                buy_percentage = (buy_signals / total_analyzed) * 100
-                if buy_percentage > 60:
-                    sentiment = "Bullish"
-                    color = "green"
-                elif buy_percentage < 40:
-                    sentiment = "Bearish"
-                    color = "red"
-                else:
-                    sentiment = "Neutral"
-                    color = "gray"
-
-                st.markdown(f"Overall Market Sentiment: <span style='color: {color}'>{sentiment}</span>", 
-                          unsafe_allow_html=True)
-
-            else:
-                st.warning("No recommendations generated. Please try with different parameters.")
+    # Reruns reuse the last analysis of the same universe until the data can have changed
+    if st.button("Generate Recommendations"):
+        metrics.start_run('recommendations')
+        recommendations = cached_recommendations(symbols_list)
+        if recommendations is None:
+            with st.spinner("Analyzing all NSE stocks..."):
+                recommendations = show_recommendations_progress(symbols_list)
+        # Keep showing these results when paging reruns the script
+        st.session_state['recommendations_symbols'] = symbols_list
+        display_recommendations(recommendations, min_confidence)
+    else:
+        generated = st.session_state.get('recommendations_symbols') == symbols_list
+        recommendations = cached_recommendations(symbols_list) if generated else None
+        if recommendations is not None:
+            display_recommendations(recommendations, min_confidence)
+        elif precomputed:
+            universe = set(symbols_list)
+            display_recommendations([r for r in precomputed if r['symbol'] in universe], min_confidence)
 
 if __name__ == "__main__":
     recommendations_page()
\ No newline at end of file
@@ -1,41 +1,41 @@
 import streamlit as st
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+import numpy as np
 import pandas as pd
 
-from utils.stock_data import get_stock_data, get_company_info, format_number
-from utils.indicators import add_indicators
+from utils.downsample import CANDLE_POINTS, LINE_POINTS, aggregate_extreme, aggregate_ohlc, chart_times, downsample_line
+from utils.stock_data import cached_indicators, get_indicator_data, get_company_info, format_number
+from utils.intraday import INTRADAY_INTERVALS, get_intraday_data, timeframe_intervals
 from utils.signals import generate_signals, get_signal_summary
+from utils.scheduler import get_scheduler, load_symbols
+from utils import metrics
 
-def plot_stock_data(df, signals):
-    """Create interactive stock charts with indicators."""
+# Indicator lines in figure trace order, after the candles and before/after the MACD histogram
+LINE_COLUMNS = ('SMA_20', 'BB_Upper', 'BB_Lower', 'MACD', 'MACD_Signal', 'RSI')
+
+def new_stock_chart():
+    """Create the empty three-panel chart that ``plot_stock_data`` fills in."""
     fig = make_subplots(rows=3, cols=1, 
                         shared_xaxes=True,
                         vertical_spacing=0.05,
                         row_heights=[0.6, 0.2, 0.2])
 
     # Candlestick chart
-    fig.add_trace(go.Candlestick(
-        x=df.index,
-        open=df['Open'],
-        high=df['High'],
-        low=df['Low'],
-        close=df['Close'],
-        name='OHLC'
-    ), row=1, col=1)
+    fig.add_trace(go.Candlestick(name='OHLC'), row=1, col=1)
 
     # Add indicators
-    fig.add_trace(go.Scatter(x=df.index, y=df['SMA_20'], name='SMA 20', line=dict(color='blue')), row=1, col=1)
-    fig.add_trace(go.Scatter(x=df.index, y=df['BB_Upper'], name='BB Upper', line=dict(color='gray', dash='dash')), row=1, col=1)
-    fig.add_trace(go.Scatter(x=df.index, y=df['BB_Lower'], name='BB Lower', line=dict(color='gray', dash='dash')), row=1, col=1)
+    fig.add_trace(go.Scatter(name='SMA 20', line=dict(color='blue')), row=1, col=1)
+    fig.add_trace(go.Scatter(name='BB Upper', line=dict(color='gray', dash='dash')), row=1, col=1)
+    fig.add_trace(go.Scatter(name='BB Lower', line=dict(color='gray', dash='dash')), row=1, col=1)
 
     # MACD
-    fig.add_trace(go.Bar(x=df.index, y=df['MACD_Hist'], name='MACD Hist'), row=2, col=1)
-    fig.add_trace(go.Scatter(x=df.index, y=df['MACD'], name='MACD'), row=2, col=1)
-    fig.add_trace(go.Scatter(x=df.index, y=df['MACD_Signal'], name='MACD Signal'), row=2, col=1)
+    fig.add_trace(go.Bar(name='MACD Hist'), row=2, col=1)
+    fig.add_trace(go.Scatter(name='MACD'), row=2, col=1)
+    fig.add_trace(go.Scatter(name='MACD Signal'), row=2, col=1)
 
     # RSI
-    fig.add_trace(go.Scatter(x=df.index, y=df['RSI'], name='RSI'), row=3, col=1)
+    fig.add_trace(go.Scatter(name='RSI'), row=3, col=1)
     fig.add_hline(y=70, line_dash="dash", line_color="red", row=3, col=1)
     fig.add_hline(y=30, line_dash="dash", line_color="green", row=3, col=1)
 
@@ -54,6 +54,9 @@ def plot_stock_data(df, signals):
         )
     )
 
+    # Bar times are sent as epoch milliseconds
+    fig.update_xaxes(type='date')
+
     # Update y-axis titles
     fig.update_yaxes(title_text="Price", row=1, col=1)
     fig.update_yaxes(title_text="MACD", row=2, col=1)
@@ -61,35 +64,71 @@ def plot_stock_data(df, signals):
 
     return fig
 
+def plot_stock_data(df, signals, fig=None, line_points=LINE_POINTS, candle_points=CANDLE_POINTS):
+    """Create interactive stock charts with indicators.
+
+    Lines are LTTB-downsampled to ``line_points`` and candles merged to at
+    most ``candle_points``, and values are sent as float32 arrays. Pass the
+    figure of a previous call as ``fig`` to replace its trace data in place
+    instead of rebuilding the subplots.
+    """
+    fig = fig if fig is not None else new_stock_chart()
+    x = chart_times(df.index)
+    candle_x, open_, high, low, close = aggregate_ohlc(
+        x, *(df[column].to_numpy(dtype=np.float32) for column in ('Open', 'High', 'Low', 'Close')),
+        max_bars=candle_points
+    )
+    hist_x, hist = aggregate_extreme(x, df['MACD_Hist'].to_numpy(dtype=np.float64), max_bars=candle_points)
+
+    with fig.batch_update():
+        fig.data[0].update(x=candle_x, open=open_, high=high, low=low, close=close)
+        fig.data[4].update(x=hist_x, y=hist.astype(np.float32))
+        for trace, column in zip(fig.data[1:4] + fig.data[5:], LINE_COLUMNS):
+            line_x, line_y = downsample_line(x, df[column].to_numpy(), line_points)
+            trace.update(x=line_x, y=line_y.astype(np.float32))
+
+    return fig
+
 def stock_analysis_page():
     st.title("Stock Technical Analysis")
 
     # Load symbols from CSV
     try:
-        # Read CSV file with no header, then assign column name
-        symbols = pd.read_csv("attached_assets/symbol.csv", names=['Symbol'], skiprows=1)
-        selected_symbol = st.selectbox("Select Stock", symbols['Symbol'].dropna())
+        selected_symbol = st.selectbox("Select Stock", load_symbols())
     except Exception as e:
         st.error(f"Error loading symbols: {str(e)}")
         return
 
+    # Have the background scheduler refresh the stock being viewed first
+    scheduler = get_scheduler()
+    if scheduler:
+        scheduler.request_priority([selected_symbol])
+
     col1, col2, col3 = st.columns(3)
-    timeframe = col1.selectbox("Timeframe", ['1mo', '3mo', '6mo', '1y', '2y', '5y'])
-    interval = col2.selectbox("Interval", ['1d', '5d', '1wk', '1mo'])
+    timeframe = col1.selectbox("Timeframe", ['1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y'], index=2)
+    # Only intervals the provider serves over this timeframe, in at least two bars
+    intervals = timeframe_intervals(timeframe)
+    interval = col2.selectbox("Interval", intervals, index=intervals.index('1d') if '1d' in intervals else 0)
 
     if col3.button("Analyze"):
+        metrics.start_run(f"analysis {selected_symbol}")
         with st.spinner("Fetching data..."):
-            df, error = get_stock_data(selected_symbol, timeframe, interval)
+            # Fetch and indicators are memoized, so repeated runs reuse them
+            if interval in INTRADAY_INTERVALS:
+                # Intraday levels are resampled from one cached fine-grained fetch
+                df, error = get_intraday_data(selected_symbol, timeframe, interval)
+                if not error:
+                    df = cached_indicators(selected_symbol, timeframe, interval, df)
+            else:
+                df, error = get_indicator_data(selected_symbol, timeframe, interval)
 
             if error:
                 st.error(error)
                 return
 
-            # Calculate price change
+            # Calculate price change; a session's first bar has nothing to compare with
             current_price = df['Close'].iloc[-1]
-            prev_price = df['Close'].iloc[-2]
-            price_change = ((current_price / prev_price) - 1) * 100
-            price_change_color = "green" if price_change >= 0 else "red"
+            price_change = ((current_price / df['Close'].iloc[-2]) - 1) * 100 if len(df) > 1 else None
 
             # Get company info
             info = get_company_info(selected_symbol)
@@ -102,21 +141,28 @@ def stock_analysis_page():
             cols[2].metric("Market Cap", format_number(info['market_cap']))
             cols[3].metric("Volume", format_number(info['volume']))
             cols[4].metric("Current Price", f"₹{current_price:.2f}")
-            cols[5].metric("Day Change", f"{price_change:+.2f}%", 
-                         delta_color="normal" if price_change >= 0 else "inverse")
+            if price_change is None:
+                cols[5].metric("Day Change", "N/A")
+            else:
+                cols[5].metric("Day Change", f"{price_change:+.2f}%",
+                               delta_color="normal" if price_change >= 0 else "inverse")
 
-            # Calculate indicators and signals
-            df = add_indicators(df)
+            # Calculate signals
             signals = generate_signals(df)
 
-            # Plot charts
-            st.plotly_chart(plot_stock_data(df, signals), use_container_width=True)
+            # Plot charts, reusing this session's figure so reruns only refill its traces
+            with metrics.span('render', selected_symbol):
+                fig = plot_stock_data(df, signals, st.session_state.get('stock_chart'))
+                # Keep the user's zoom while the same symbol is redrawn
+                fig.update_layout(uirevision=selected_symbol)
+                st.session_state['stock_chart'] = fig
+                st.plotly_chart(fig, use_container_width=True)
 
             # Display signals
             st.subheader("Trading Signals")
             signal_summary = get_signal_summary(signals)
 
-            signal_cols = st.columns(5)
+            signal_cols = st.columns(len(signal_summary))
             for i, (indicator, signal) in enumerate(signal_summary.items()):
                 color = "green" if signal in ['Buy', 'Bullish', 'Oversold'] else "red" if signal in ['Sell', 'Bearish', 'Overbought'] else "gray"
                 signal_cols[i].markdown(f"**{indicator}**")
@@ -1,57 +1,16 @@
 import streamlit as st
-import pandas as pd
-from utils.stock_data import get_stock_data
-from utils.indicators import add_indicators
-from utils.signals import generate_signals
-
-def screen_stocks(symbols, criteria):
-    """Screen stocks based on technical criteria."""
-    results = []
-
-    for symbol in symbols:
-        df, error = get_stock_data(symbol, period='1mo', interval='1d')
-        if error:
-            continue
-
-        df = add_indicators(df)
-        signals = generate_signals(df)
-        latest = df.iloc[-1]
-        signal_summary = signals.iloc[-1]
-
-        meets_criteria = True
-        for criterion in criteria:
-            if criterion == 'RSI_Oversold' and latest['RSI'] >= 30:
-                meets_criteria = False
-            elif criterion == 'RSI_Overbought' and latest['RSI'] <= 70:
-                meets_criteria = False
-            elif criterion == 'Above_SMA20' and latest['Close'] <= latest['SMA_20']:
-                meets_criteria = False
-            elif criterion == 'Below_SMA20' and latest['Close'] >= latest['SMA_20']:
-                meets_criteria = False
-            elif criterion == 'MACD_Bullish' and signal_summary['MACD_Signal'] != 'Buy':
-                meets_criteria = False
-            elif criterion == 'MACD_Bearish' and signal_summary['MACD_Signal'] != 'Sell':
-                meets_criteria = False
-
-        if meets_criteria:
-            results.append({
-                'Symbol': symbol,
-                'Close': latest['Close'],
-                'RSI': latest['RSI'],
-                'MACD_Signal': signal_summary['MACD_Signal'],
-                'MA_Signal': signal_summary['MA_Signal']
-            })
-
-    return pd.DataFrame(results)
+from utils.engine import run_screen
+from utils.metadata_store import get_metadata_store
+from utils.screening import COLUMNS, PATTERN_RULES, RuleError, compile_rule
+from utils.scheduler import get_store, load_symbols
+from utils import metrics
 
 def stock_screener_page():
     st.title("Stock Screener")
 
     # Load symbols
     try:
-        # Read CSV file with no header, then assign column name
-        symbols = pd.read_csv("attached_assets/symbol.csv", names=['Symbol'], skiprows=1)
-        symbols_list = symbols['Symbol'].dropna().tolist()
+        symbols_list = load_symbols()
     except Exception as e:
         st.error(f"Error loading symbols: {str(e)}")
         return
@@ -65,10 +24,12 @@ def stock_screener_page():
 
     with col1:
         if st.checkbox("RSI Conditions"):
-            if st.checkbox("Oversold (RSI < 30)"):
-                criteria.append('RSI_Oversold')
-            if st.checkbox("Overbought (RSI > 70)"):
-                criteria.append('RSI_Overbought')
+            if st.checkbox("Oversold"):
+                oversold = st.number_input("RSI below", 0.0, 100.0, 30.0, step=1.0)
+                criteria.append(f"RSI < {oversold:g}")
+            if st.checkbox("Overbought"):
+                overbought = st.number_input("RSI above", 0.0, 100.0, 70.0, step=1.0)
+                criteria.append(f"RSI > {overbought:g}")
 
     with col2:
         if st.checkbox("Moving Average Conditions"):
@@ -86,22 +47,70 @@ def stock_screener_page():
             if st.checkbox("Bearish MACD Crossover"):
                 criteria.append('MACD_Bearish')
 
+    if st.checkbox("Price Action Patterns"):
+        patterns = st.multiselect("Latest bar shows any of", list(PATTERN_RULES),
+                                  format_func=lambda name: name.replace('_', ' '))
+        if patterns:
+            criteria.append(" OR ".join(f"({PATTERN_RULES[name]})" for name in patterns))
+
+    custom_rule = st.text_input(
+        "Custom rule (optional)",
+        placeholder="e.g. RSI < 35 AND (Close > SMA_20 OR NOT MACD < MACD_Signal)",
+        help="Combine comparisons with AND, OR, NOT and parentheses. Fields: " + ", ".join(COLUMNS)
+    )
+    if custom_rule.strip():
+        criteria.append(custom_rule)
+
+    # Sector members come from the local metadata store, so narrowing the universe needs no requests
+    metadata = get_metadata_store()
+    sectors = st.multiselect("Only stocks in sectors", metadata.sector_names())
+    if sectors:
+        members = set().union(*(metadata.symbols_in_sector(sector) for sector in sectors))
+        symbols_list = [symbol for symbol in symbols_list if symbol in members]
+
+    # Latest-bar indicators precomputed by the background scheduler
+    store = get_store()
+    snapshot, refreshed_at = store.get('snapshot')
+    use_precomputed = False
+    if snapshot is not None:
+        use_precomputed = st.checkbox(
+            f"Use background-refreshed data ({refreshed_at:%I:%M %p, %d %b} IST)", value=True
+        )
+
     if st.button("Run Screener"):
         if not criteria:
             st.warning("Please select at least one screening criterion")
             return
 
+        metrics.start_run('screener')
+        try:
+            rule = compile_rule(criteria)
+        except RuleError as e:
+            st.error(f"Invalid rule: {str(e)}")
+            return
+        st.caption(f"Screening rule: {rule}")
+
         with st.spinner("Screening stocks..."):
-            results = screen_stocks(symbols_list, criteria)
+            results = run_screen(symbols_list, rule, snapshot if use_precomputed else None, refreshed_at)
 
             if results.empty:
                 st.info("No stocks found matching the selected criteria")
             else:
                 st.subheader("Screening Results")
-                st.dataframe(results.style.format({
-                    'Close': '{:.2f}',
-                    'RSI': '{:.2f}'
-                }))
+                with metrics.span('render'):
+                    st.dataframe(results.style.format({
+                        'Close': '{:.2f}',
+                        'RSI': '{:.2f}'
+                    }))
+
+                # Matches per sector, from the local metadata store
+                st.subheader("Matches by Sector")
+                st.dataframe(
+                    results.groupby('Sector')
+                    .agg(Stocks=('Symbol', 'size'), Avg_RSI=('RSI', 'mean'), Symbols=('Symbol', ', '.join))
+                    .sort_values('Stocks', ascending=False)
+                    .style.format({'Avg_RSI': '{:.2f}'})
+                )
 
 if __name__ == "__main__":
     stock_screener_page()
\ No newline at end of file
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.backtest import (RECOMMENDATIONS, backtest, bar_returns, parameter_grid, positions_from_scores,
+                            recommendation_codes, score_conditions, score_panel, strategy_returns, walk_forward)
+from utils.fetch_engine import synthetic_ohlcv
+from utils.indicators import add_indicators
+from utils.panel import build_panel
+from utils.recommendation_engine import calculate_technical_score, get_recommendation
+
+@pytest.fixture(scope='module')
+def data():
+    data = {f"SYM{i:02d}": synthetic_ohlcv(90, seed=i) for i in range(8)}
+    data['SYM01'] = data['SYM01'].drop(data['SYM01'].index[[40, 70]])
+    data['SYM02'] = data['SYM02'].iloc[20:]
+    data['SYM03'] = data['SYM03'].iloc[:-5]
+    return data
+
+def test_every_bar_matches_technical_score(data):
+    panel = build_panel(data)
+    conditions, valid = score_conditions(panel)
+    scores = pd.DataFrame(score_panel(conditions), index=panel['Close'].index, columns=panel['Close'].columns)
+    valid = pd.DataFrame(valid, index=scores.index, columns=scores.columns)
+    for symbol, df in data.items():
+        df = add_indicators(df)
+        checked = 0
+        for t, date in enumerate(df.index):
+            if valid.at[date, symbol]:
+                assert scores.at[date, symbol] == calculate_technical_score(df.iloc[:t + 1]), (symbol, date)
+                checked += 1
+        assert checked == df[['SMA_20', 'RSI']].notna().all(axis=1).sum()
+        assert not valid[symbol].drop(df.index).any()
+
+def test_recommendation_codes_match_get_recommendation():
+    scores = np.arange(-100, 101, 5, dtype=np.float32)
+    labels = np.array(RECOMMENDATIONS)[recommendation_codes(scores)]
+    assert labels.tolist() == [get_recommendation(score) for score in scores]
+
+def test_positions_and_costs():
+    scores = np.array([[60.0], [25.0], [0.0], [-60.0]], dtype=np.float32)
+    valid = np.array([[True], [True], [False], [True]])
+    held = positions_from_scores(scores, valid)
+    assert held[:, 0].tolist() == [1.0, 0.5, 0.0, -1.0]
+    assert positions_from_scores(scores, valid, long_only=True)[:, 0].tolist() == [1.0, 0.5, 0.0, 0.0]
+
+    returns = bar_returns(np.array([[100.0], [110.0], [np.nan], [99.0]]))
+    np.testing.assert_allclose(returns[:, 0], [0.0, 0.1, 0.0, -0.1])
+    net, turnover = strategy_returns(returns, held, cost_bps=10)
+    np.testing.assert_allclose(turnover[:, 0], [1.0, 0.5, 0.5, 1.0])
+    np.testing.assert_allclose(net[:, 0], [-0.001, 0.1 - 0.0005, -0.0005, -0.001])
+
+def test_backtest_positions_follow_scores(data):
+    result = backtest(data)
+    panel = build_panel(data)
+    conditions, valid = score_conditions(panel)
+    np.testing.assert_array_equal(result['positions'].to_numpy(), positions_from_scores(score_panel(conditions), valid))
+    assert result['symbols'].loc['SYM02', 'bars'] == len(data['SYM02'])
+    assert result['symbols'].loc['SYM00', 'buy_hold_return'] == pytest.approx(
+        data['SYM00']['Close'].iloc[-1] / data['SYM00']['Close'].iloc[0] - 1)
+
+def test_walk_forward_single_candidate_is_the_backtest(data):
+    result = walk_forward(data, [{}], train_bars=40, test_bars=20)
+    equity = backtest(data)['equity']
+    expected = equity / equity.shift(fill_value=1.0) - 1
+    assert result['returns'].index[0] == equity.index[40]
+    np.testing.assert_allclose(result['returns'].to_numpy(), expected.loc[result['returns'].index].to_numpy())
+    assert (result['folds']['candidate'] == 0).all()
+
+def test_parameter_grid():
+    grid = parameter_grid(weights={'High_Volume': [0, 10]}, thresholds={'Buy': [10, 20, 30]})
+    assert len(grid) == 6
+    assert grid[0] == {'weights': {'High_Volume': 0}, 'thresholds': {'Buy': 10}}
@@ -0,0 +1,93 @@
+import json
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('yfinance')
+
+from utils import cli, engine, result_cache, stock_data
+from utils.fetch_engine import synthetic_ohlcv
+from utils.recommendation_engine import analyze_universe
+
+SYMBOLS = [f"SYM{i}" for i in range(8)]
+
+class FakeMetadata:
+    def sectors(self, symbols):
+        return ['Technology' for _ in symbols]
+
+@pytest.fixture
+def universe(tmp_path, monkeypatch):
+    """Synthetic bars for ``SYMBOLS`` and a symbol file listing them plus one without data."""
+    history = {symbol: synthetic_ohlcv(70, seed=i) for i, symbol in enumerate(SYMBOLS)}
+
+    def fetch(symbols, period, interval, **options):
+        return {symbol: history[symbol] for symbol in symbols if symbol in history}, {}
+
+    def iter_fetch(symbols, period, interval, **options):
+        data, errors = fetch(symbols, period, interval)
+        errors = {symbol: "No data" for symbol in symbols if symbol not in data}
+        yield len(symbols), len(symbols), data, errors
+
+    monkeypatch.setattr(result_cache, '_cache', result_cache.ResultCache())
+    monkeypatch.setattr(engine, 'get_stock_data_bulk', fetch)
+    monkeypatch.setattr(stock_data, 'iter_stock_data_bulk', iter_fetch)
+    monkeypatch.setattr(engine, 'get_metadata_store', FakeMetadata)
+    symbols_file = tmp_path / 'symbols.csv'
+    symbols_file.write_text("SYMBOL\n" + "\n".join(SYMBOLS + ['DELISTED']) + "\n")
+    return history, str(symbols_file)
+
+def test_output_format():
+    assert cli.output_format('out.parquet') == 'parquet'
+    assert cli.output_format('out.JSON') == 'jsonl'
+    assert cli.output_format('-') == 'csv'
+    assert cli.output_format('out.txt', 'jsonl') == 'jsonl'
+
+def test_write_results_to_files_and_stdout(tmp_path, capsys):
+    df = pd.DataFrame({'symbol': ['A', 'B'], 'score': [10, -20]})
+    cli.write_results(df, str(tmp_path / 'exports' / 'out.jsonl'), 'jsonl')
+    cli.write_results(df, str(tmp_path / 'exports' / 'out.csv'), 'csv')
+    assert sorted(path.name for path in (tmp_path / 'exports').iterdir()) == ['out.csv', 'out.jsonl']
+    pd.testing.assert_frame_equal(pd.read_json(tmp_path / 'exports' / 'out.jsonl', lines=True), df)
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'exports' / 'out.csv'), df)
+
+    cli.write_results(df, '-', 'jsonl')
+    assert capsys.readouterr().out.splitlines() == ['{"symbol":"A","score":10}', '{"symbol":"B","score":-20}']
+    with pytest.raises(ValueError):
+        cli.write_results(df, '-', 'parquet')
+
+def test_screen_writes_matches_and_timings(universe, tmp_path, capsys):
+    history, symbols_file = universe
+    output, timings_file = tmp_path / 'oversold.csv', tmp_path / 'timings.json'
+    assert cli.main(['--symbols', symbols_file, '--output', str(output), '--timings', str(timings_file),
+                     'screen', 'RSI > 0', 'Volume > 0']) == 0
+
+    results = pd.read_csv(output)
+    assert results['Symbol'].tolist() == SYMBOLS
+    assert set(results['Sector']) == {'Technology'}
+    timings = json.loads(timings_file.read_text())
+    assert (timings['symbols'], timings['rows']) == (len(SYMBOLS) + 1, len(SYMBOLS))
+    assert 'screening' in timings['stages']
+    assert capsys.readouterr().err.startswith(f"{len(SYMBOLS)} rows from {len(SYMBOLS) + 1} symbols")
+
+def test_recommend_filters_by_confidence(universe, tmp_path):
+    history, symbols_file = universe
+    assert cli.main(['--symbols', symbols_file, '--output', str(tmp_path / 'recs-{now:%Y}.txt'),
+                     '--format', 'jsonl', 'recommend', '--min-confidence', 'Medium']) == 0
+
+    [output] = tmp_path.glob('recs-2*.txt')
+    results = pd.read_json(output, lines=True)
+    expected = [result for result in analyze_universe(history) if result['confidence'] != 'Low']
+    assert 0 < len(expected) < len(SYMBOLS)
+    assert sorted(results['symbol']) == sorted(result['symbol'] for result in expected)
+    assert results['technical_score'].is_monotonic_decreasing
+    assert {'sector', 'basis'}.issubset(results.columns)
+    assert any(column.startswith('signal_') for column in results.columns)
+
+def test_errors_exit_without_writing(universe, tmp_path, capsys):
+    _, symbols_file = universe
+    output = tmp_path / 'out.csv'
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main(['--symbols', symbols_file, '--output', str(output), 'screen', 'RSI <'])
+    assert exit_info.value.code == 1
+    assert capsys.readouterr().err.startswith("error: ")
+    assert not output.exists()
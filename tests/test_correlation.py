@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+from utils.correlation import MIN_WINDOW, WINDOW, daily_returns, update_correlation_index
+
+def closes_frame(bars, symbols=8, seed=0):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0, 0.01, (bars, 1)) + rng.normal(0, 0.015, (bars, symbols))
+    return pd.DataFrame(100 * np.cumprod(1 + returns, axis=0), columns=[f"SYM{i}" for i in range(symbols)],
+                        index=pd.bdate_range('2024-01-01', periods=bars))
+
+def test_short_history_uses_the_returns_it_has():
+    closes = closes_frame(45)
+    index = update_correlation_index(None, closes)
+    assert index.window == 44
+    expected = np.corrcoef(daily_returns(closes.to_numpy()), rowvar=False)
+    assert np.abs(index.matrix().to_numpy() - expected).max() < 1e-4
+    assert len(index.similar('SYM0')) == len(closes.columns) - 1
+
+def test_window_grows_to_full_length_with_history():
+    closes = closes_frame(WINDOW + 30)
+    short = update_correlation_index(None, closes.iloc[:40])
+    full = update_correlation_index(short, closes)
+    assert (short.window, full.window) == (39, WINDOW)
+    assert full.last_time == closes.index[-1]
+
+def test_too_short_history_has_no_correlations():
+    index = update_correlation_index(None, closes_frame(MIN_WINDOW - 5))
+    assert index.window == MIN_WINDOW
+    assert index.similar('SYM0').empty
@@ -0,0 +1,84 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.downsample import aggregate_extreme, aggregate_ohlc, chart_times, downsample_line, lttb
+from utils.fetch_engine import synthetic_ohlcv
+
+def reference_lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets as originally published, one point at a time."""
+    n = len(x)
+    every = (n - 2) / (threshold - 2)
+    selected = [0]
+    a = 0
+    for i in range(threshold - 2):
+        next_start = math.floor((i + 1) * every) + 1
+        next_end = min(math.floor((i + 2) * every) + 1, n)
+        avg_x = sum(x[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(y[next_start:next_end]) / (next_end - next_start)
+        best, best_area = None, -1.0
+        for j in range(math.floor(i * every) + 1, math.floor((i + 1) * every) + 1):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    return selected + [n - 1]
+
+@pytest.fixture(scope='module')
+def hourly():
+    return synthetic_ohlcv(3000, interval='1h', seed=3)
+
+@pytest.mark.parametrize('threshold', [3, 10, 250, 1500])
+def test_lttb_matches_reference(hourly, threshold):
+    x = chart_times(hourly.index)
+    y = hourly['Close'].to_numpy()
+    assert lttb(x, y, threshold).tolist() == reference_lttb(x.tolist(), y.tolist(), threshold)
+
+def test_lttb_keeps_short_series_and_spikes():
+    x = np.arange(100, dtype=float)
+    y = np.zeros(100)
+    y[37] = 50.0
+    assert lttb(x, y, 200).tolist() == list(range(100))
+    assert lttb(x, y, 2).tolist() == list(range(100))
+    assert 37 in lttb(x, y, 10)
+
+def test_downsample_line_skips_warm_up(hourly):
+    x = chart_times(hourly.index)
+    y = hourly['Close'].rolling(20).mean().to_numpy()
+    line_x, line_y = downsample_line(x, y, 500)
+    assert len(line_x) == 500
+    assert line_x[0] == x[19] and line_x[-1] == x[-1]
+    assert np.isfinite(line_y).all()
+    assert (np.diff(line_x) > 0).all()
+
+def test_chart_times_are_ist_wall_clock():
+    index = pd.DatetimeIndex(['2026-10-16 09:15', '2026-10-16 15:15']).tz_localize('Asia/Kolkata')
+    expected = pd.DatetimeIndex(['2026-10-16 09:15', '2026-10-16 15:15']).as_unit('ms').asi8
+    np.testing.assert_array_equal(chart_times(index), expected)
+    np.testing.assert_array_equal(chart_times(index.tz_convert('UTC')), expected)
+    assert chart_times(index).dtype == np.float64
+
+@pytest.mark.parametrize('bars', [600, 601, 1799, 3000])
+def test_candles_keep_every_extreme(hourly, bars):
+    df = hourly.iloc[:bars]
+    x = chart_times(df.index)
+    merged = aggregate_ohlc(x, *(df[column].to_numpy() for column in ('Open', 'High', 'Low', 'Close')),
+                            max_bars=600)
+    assert len(merged[0]) <= 600
+    size = -(-bars // 600)
+    groups = df.groupby(np.arange(bars) // size)
+    expected = [x[::size], groups['Open'].first(), groups['High'].max(), groups['Low'].min(), groups['Close'].last()]
+    for values, reference in zip(merged, expected):
+        np.testing.assert_array_equal(values, np.asarray(reference))
+
+def test_histogram_keeps_largest_magnitude():
+    x = np.arange(7, dtype=float)
+    values = np.array([1.0, -3.0, 2.0, np.nan, 0.5, -0.2, 4.0])
+    unchanged = aggregate_extreme(x, values, max_bars=10)
+    assert unchanged[0] is x and unchanged[1] is values
+    bucket_x, extremes = aggregate_extreme(x, values, max_bars=3)
+    assert bucket_x.tolist() == [0.0, 3.0, 6.0]
+    assert extremes.tolist() == [-3.0, 0.5, 4.0]
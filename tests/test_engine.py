@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+
+pytest.importorskip('yfinance')
+
+from utils import engine, result_cache
+
+@pytest.fixture
+def slow_stream(monkeypatch):
+    """A two-chunk scoring run that waits for ``release`` before finishing; counts its runs."""
+    monkeypatch.setattr(result_cache, '_cache', result_cache.ResultCache())
+    release = threading.Event()
+    runs = []
+
+    def stream(symbols, period, interval, engine=None):
+        runs.append(tuple(symbols))
+        yield 1, 2, [{'symbol': symbols[0]}]
+        release.wait(5)
+        yield 2, 2, [{'symbol': symbols[1]}]
+
+    monkeypatch.setattr(engine, 'stream_recommendations', stream)
+    return release, runs
+
+def test_concurrent_callers_share_one_run(slow_stream):
+    release, runs = slow_stream
+    symbols = ['A', 'B']
+    progress = []
+    started = threading.Event()
+    results = {}
+
+    def report(done, total, recommendations):
+        progress.append((done, total, len(recommendations)))
+        started.set()
+
+    def leader():
+        results['leader'] = engine.generate_recommendations(symbols, progress=report)
+
+    def follower():
+        results['follower'] = engine.generate_recommendations(symbols)
+
+    first = threading.Thread(target=leader)
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=follower)
+    second.start()
+    release.set()
+    first.join()
+    second.join()
+
+    assert runs == [('A', 'B')]
+    assert progress == [(1, 2, 1), (2, 2, 2)]
+    assert results['leader'] == results['follower'] == [{'symbol': 'A'}, {'symbol': 'B'}]
+    assert engine.cached_recommendations(symbols) == results['leader']
+    assert engine.generate_recommendations(symbols) == results['leader']
+    assert len(runs) == 1
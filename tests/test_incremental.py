@@ -0,0 +1,62 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.fetch_engine import synthetic_ohlcv
+from utils.incremental import IndicatorState, RunningEMA
+from utils.indicators import add_indicators
+
+COLUMNS = ('SMA_20', 'EMA_20', 'RSI', 'MACD', 'MACD_Signal', 'MACD_Hist', 'BB_Upper', 'BB_Middle', 'BB_Lower')
+
+def replay(df, rsi_smoothing, restore_at=()):
+    """Indicator rows from feeding ``df`` bar by bar, saving and restoring the state at ``restore_at``."""
+    state = IndicatorState(rsi_smoothing=rsi_smoothing)
+    rows = []
+    for i, close in enumerate(df['Close'].to_numpy(dtype=float)):
+        if i in restore_at:
+            state = IndicatorState.from_dict(json.loads(json.dumps(state.to_dict())))
+        rows.append(state.update({'Close': close}))
+    return pd.DataFrame(rows, index=df.index)
+
+def gapped(df, seed=0):
+    """``df`` with a late listing and a few missing closes."""
+    df = df.copy()
+    rng = np.random.default_rng(seed)
+    df.loc[df.index[:15], 'Close'] = np.nan
+    df.loc[df.index[rng.choice(np.arange(20, len(df)), 12, replace=False)], 'Close'] = np.nan
+    df.loc[df.index[100:103], 'Close'] = np.nan
+    return df
+
+def assert_matches(got, expected):
+    for column in COLUMNS:
+        np.testing.assert_allclose(got[column].to_numpy(), expected[column].to_numpy(),
+                                   rtol=1e-9, atol=1e-8, equal_nan=True, err_msg=column)
+
+@pytest.mark.parametrize('rsi_smoothing', ['sma', 'wilder'])
+def test_replay_matches_add_indicators(rsi_smoothing):
+    df = synthetic_ohlcv(300, seed=4)
+    assert_matches(replay(df, rsi_smoothing, restore_at=(1, 25, 150)),
+                   add_indicators(df, rsi_smoothing=rsi_smoothing))
+
+@pytest.mark.parametrize('rsi_smoothing', ['sma', 'wilder'])
+def test_replay_with_missing_closes_matches_add_indicators(rsi_smoothing):
+    df = gapped(synthetic_ohlcv(300, seed=5))
+    assert_matches(replay(df, rsi_smoothing, restore_at=(10, 101, 200)),
+                   add_indicators(df, rsi_smoothing=rsi_smoothing))
+
+def test_from_history_continues_like_a_full_replay():
+    df = synthetic_ohlcv(200, seed=6)
+    state = IndicatorState.from_history(df.iloc[:150])
+    last = [state.update({'Close': close}) for close in df['Close'].iloc[150:]][-1]
+    expected = add_indicators(df).iloc[-1]
+    for column in COLUMNS:
+        assert last[column] == pytest.approx(expected[column], rel=1e-9)
+
+def test_ema_holds_over_a_missing_value():
+    ema = RunningEMA(4)
+    ema.update(10.0)
+    assert ema.update(float('nan')) == 10.0
+    assert ema.update(20.0) == pytest.approx(pd.Series([10.0, np.nan, 20.0]).ewm(span=4, adjust=False).mean().iloc[-1])
+    assert not np.isnan(ema.update(30.0))
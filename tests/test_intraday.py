@@ -0,0 +1,75 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip('yfinance')
+
+from utils import intraday
+from utils.intraday import (AGGREGATION, INTERVAL_MINUTES, base_level, compare_with_direct, resample_session,
+                            synthetic_session_ohlcv, timeframe_intervals)
+from utils.market_hours import IST, SESSION_OPEN
+
+END = pd.Timestamp('2024-03-15', tz=IST)
+
+def direct_aggregates(df, interval):
+    """Bars of ``interval`` built by bucketing minutes since each session's open, as the provider does."""
+    minutes = INTERVAL_MINUTES[interval]
+    opening = df.index.normalize() + pd.Timedelta(hours=SESSION_OPEN.hour, minutes=SESSION_OPEN.minute)
+    bucket = (df.index - opening) // pd.Timedelta(minutes=minutes)
+    starts = opening + pd.to_timedelta(bucket * minutes, unit='min')
+    return df[list(AGGREGATION)].groupby(starts).agg(AGGREGATION)
+
+@pytest.mark.parametrize('interval', ['5m', '15m', '1h'])
+def test_resampled_bars_match_direct_aggregates(interval):
+    minute_bars = synthetic_session_ohlcv(days=3, interval='1m', seed=7, end=END)
+    result = compare_with_direct(resample_session(minute_bars, interval), direct_aggregates(minute_bars, interval))
+    assert result['common'] > 0
+    assert result == dict(result, only_resampled=0, only_direct=0, mismatched=0)
+
+def test_hourly_bars_start_at_session_open_and_end_short():
+    minute_bars = synthetic_session_ohlcv(days=1, interval='1m', seed=1, end=END)
+    hourly = resample_session(minute_bars, '1h')
+    assert [f"{time:%H:%M}" for time in hourly.index.time] == [
+        '09:15', '10:15', '11:15', '12:15', '13:15', '14:15', '15:15']
+    last = minute_bars[minute_bars.index >= hourly.index[-1]]
+    assert hourly['Volume'].iloc[-1] == last['Volume'].sum()
+
+def test_coarser_levels_resample_consistently():
+    minute_bars = synthetic_session_ohlcv(days=2, interval='1m', seed=3, end=END)
+    via_five = resample_session(resample_session(minute_bars, '5m'), '15m')
+    result = compare_with_direct(via_five, resample_session(minute_bars, '15m'))
+    assert result['mismatched'] == result['only_resampled'] == result['only_direct'] == 0
+
+def test_get_intraday_data_resamples_the_base_fetch(monkeypatch):
+    minute_bars = synthetic_session_ohlcv(days=5, interval='1m', seed=5, end=END)
+    fetched = []
+
+    def fake_stock_data(symbol, period, interval):
+        fetched.append((period, interval))
+        return minute_bars, None
+
+    monkeypatch.setattr(intraday, 'get_stock_data', fake_stock_data)
+    df, error = intraday.get_intraday_data("ABC", '1d', '15m')
+    assert error is None
+    assert fetched == [('5d', '1m')]
+    assert df.index.normalize().nunique() == 1
+    expected = direct_aggregates(minute_bars[minute_bars.index.normalize() == df.index[0].normalize()], '15m')
+    assert compare_with_direct(df, expected)['mismatched'] == 0
+    assert len(df) == len(expected)
+
+def test_five_day_view_holds_five_sessions(monkeypatch):
+    # A base fetch ending on a Monday that reaches back over seven sessions
+    minute_bars = synthetic_session_ohlcv(days=7, interval='1m', seed=2, end=pd.Timestamp('2024-03-18', tz=IST))
+    monkeypatch.setattr(intraday, 'get_stock_data', lambda symbol, period, interval: (minute_bars, None))
+    df, error = intraday.get_intraday_data("ABC", '5d', '15m')
+    assert error is None
+    assert list(df.index.normalize().unique()) == list(minute_bars.index.normalize().unique()[-5:])
+
+@pytest.mark.parametrize('period', ['1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y'])
+def test_offered_intervals_are_servable(period):
+    intervals = timeframe_intervals(period)
+    assert intervals
+    for interval in intervals:
+        if interval in INTERVAL_MINUTES:
+            assert base_level(interval, period) is not None
+    # A one-session timeframe holds a single daily bar, too few for a change
+    assert ('1d' in intervals) == (period != '1d')
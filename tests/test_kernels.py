@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import kernels
+
+TOLERANCE = 1e-9
+
+@pytest.fixture(scope='module')
+def panel():
+    """Random walks with late listings (leading NaN) and interior gaps."""
+    rng = np.random.default_rng(0)
+    bars, symbols = 250, 50
+    values = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (bars, symbols)), axis=0))
+    values[:rng.integers(1, bars // 2), :symbols // 4] = np.nan
+    values[rng.random((bars, symbols)) < 0.02] = np.nan
+    return values
+
+def sma_rsi(df, period=14):
+    delta = df.diff()
+    gain = delta.where(delta > 0, 0).where(df.notna()).rolling(period).mean()
+    loss = (-delta.where(delta < 0, 0)).where(df.notna()).rolling(period).mean()
+    return 100 - 100 / (1 + gain / loss)
+
+def wilder_rsi(df, period=14):
+    delta = df.diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / period, adjust=False, min_periods=period).mean()
+    loss = (-delta).clip(lower=0).ewm(alpha=1 / period, adjust=False, min_periods=period).mean()
+    return 100 - 100 / (1 + gain / loss)
+
+CASES = {
+    'rolling_mean': (lambda x: kernels.rolling_mean(x, 20), lambda df: df.rolling(20).mean()),
+    'rolling_std': (lambda x: kernels.rolling_std(x, 20), lambda df: df.rolling(20).std()),
+    'rolling_max': (lambda x: kernels.rolling_max(x, 20), lambda df: df.rolling(20).max()),
+    'rolling_min': (lambda x: kernels.rolling_min(x, 20), lambda df: df.rolling(20).min()),
+    'ewm_mean': (lambda x: kernels.ewm_mean(x, 26), lambda df: df.ewm(span=26, adjust=False).mean()),
+    'ewm_mean_wilder': (lambda x: kernels.ewm_mean(x, alpha=1 / 14, min_periods=14),
+                        lambda df: df.ewm(alpha=1 / 14, adjust=False, min_periods=14).mean()),
+    'rsi_sma': (lambda x: kernels.rsi(x), sma_rsi),
+    'rsi_wilder': (lambda x: kernels.rsi(x, smoothing='wilder'), wilder_rsi),
+}
+
+@pytest.mark.parametrize('name', CASES)
+def test_panel_matches_pandas(panel, name):
+    kernel, reference = CASES[name]
+    np.testing.assert_allclose(kernel(panel), reference(pd.DataFrame(panel)).to_numpy(),
+                               rtol=0, atol=TOLERANCE, equal_nan=True)
+
+@pytest.mark.parametrize('name', CASES)
+def test_series_matches_pandas(panel, name):
+    kernel, reference = CASES[name]
+    for column in (0, panel.shape[1] - 1):
+        np.testing.assert_allclose(kernel(panel[:, column]), reference(pd.Series(panel[:, column])).to_numpy(),
+                                   rtol=0, atol=TOLERANCE, equal_nan=True)
+
+def test_ewm_mean_gapped_columns_use_the_recurrence(panel):
+    valid = ~np.isnan(panel)
+    start = np.argmax(valid, axis=0)
+    gapped = (~valid & (np.arange(len(panel))[:, None] > start)).any(axis=0)
+    assert gapped.any() and not gapped.all()
+    # Gapped and gap-free columns go through different code paths; check each on its own
+    for columns in (gapped, ~gapped):
+        expected = pd.DataFrame(panel[:, columns]).ewm(span=12, adjust=False).mean().to_numpy()
+        np.testing.assert_allclose(kernels.ewm_mean(panel[:, columns], 12), expected,
+                                   rtol=0, atol=TOLERANCE, equal_nan=True)
+
+def test_ewm_mean_closed_form_stays_finite_over_long_series():
+    values = 100 + np.cumsum(np.random.default_rng(1).normal(0, 1, 5000))
+    expected = pd.Series(values).ewm(alpha=0.3, adjust=False).mean().to_numpy()
+    np.testing.assert_allclose(kernels.ewm_mean(values, alpha=0.3), expected, rtol=1e-9)
+
+def test_unknown_rsi_smoothing():
+    with pytest.raises(ValueError):
+        kernels.rsi(np.ones(30), smoothing='ema')
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+# utils.live takes its intervals from utils.intraday, which fetches through yfinance
+pytest.importorskip('yfinance')
+
+from utils.live import (DAY_NS, MINUTE_NS, AlertQueue, LiveEngine, ReplaySource, TickBatch, session_time,
+                        synthetic_history)
+from utils.market_hours import IST
+from utils.signals import NEUTRAL, SIGNAL_COLUMNS
+
+OPEN = session_time('2026-10-16')
+SECOND_NS = 10**9
+
+def flat_history(symbols, bars=60):
+    """Closes alternating between 100 and 101, so no signal but the moving average is on."""
+    return pd.DataFrame({symbol: np.where(np.arange(bars) % 2, 101.0, 100.0) for symbol in symbols})
+
+def batch(*ticks):
+    stamps, symbols, prices = zip(*ticks)
+    return TickBatch(np.array(stamps, dtype=np.int64), np.array(symbols), np.array(prices), np.ones(len(ticks)), None)
+
+def random_ticks(symbols, n=3000, minutes=30, seed=1):
+    rng = np.random.default_rng(seed)
+    stamps = OPEN + np.sort(rng.integers(0, minutes * MINUTE_NS, n))
+    return pd.DataFrame({
+        'time': pd.to_datetime(stamps, utc=True),
+        'symbol': rng.choice(symbols, n),
+        'price': 100 * np.exp(np.cumsum(rng.normal(0, 0.003, n))),
+        'volume': rng.integers(1, 100, n).astype(float),
+    })
+
+def test_replay_source_batches_ticks_in_time_order():
+    ticks = random_ticks(['A', 'B'], n=250).sample(frac=1, random_state=0)
+    batches = list(ReplaySource(ticks, batch_size=100))
+    assert [len(b.stamps) for b in batches] == [100, 100, 50]
+    stamps = np.concatenate([b.stamps for b in batches])
+    assert (np.diff(stamps) >= 0).all()
+    assert sorted(np.concatenate([b.prices for b in batches])) == sorted(ticks['price'])
+
+def test_replayed_bars_match_resampled_ticks():
+    symbols = ['A', 'B', 'C']
+    ticks = random_ticks(symbols)
+    bars = []
+    engine = LiveEngine(symbols, '1m', on_bars=bars.append)
+    engine.seed(synthetic_history(symbols))
+    engine.run(ReplaySource(ticks, batch_size=100))
+    engine.advance(OPEN + DAY_NS // 4)
+
+    got = pd.concat(bars).set_index(['Symbol', 'Start']).sort_index()
+    expected = (ticks.assign(Start=ticks['time'].dt.tz_convert(IST))
+                .groupby(['symbol', pd.Grouper(key='Start', freq='1min')])
+                .agg(Open=('price', 'first'), High=('price', 'max'), Low=('price', 'min'),
+                     Close=('price', 'last'), Volume=('volume', 'sum'))
+                .dropna().rename_axis(['Symbol', 'Start']).sort_index())
+    assert len(got) == len(expected) == engine.stats['bars']
+    np.testing.assert_allclose(got[expected.columns].to_numpy(), expected.to_numpy())
+    assert engine.stats['late'] == engine.stats['unknown'] == engine.stats['outside_session'] == 0
+
+def test_bar_closed_in_the_same_batch_still_alerts():
+    engine = LiveEngine(['A', 'B'], '1m')
+    engine.seed(flat_history(['A', 'B']))
+    bb = SIGNAL_COLUMNS.index('BB_Signal')
+    assert engine.codes[0, bb] == NEUTRAL
+
+    # B's tick in the next minute closes A's bar before A was evaluated
+    engine.process(batch((OPEN + 10 * SECOND_NS, 'A', 80.0), (OPEN + 61 * SECOND_NS, 'B', 101.0)))
+    assert engine.bar_id[0] == -1
+    alerts = {alert['signal']: alert for alert in engine.alerts.drain()}
+    assert alerts['BB_Signal']['symbol'] == 'A'
+    assert alerts['BB_Signal']['state'] == 'Oversold'
+    assert alerts['BB_Signal']['bar_start'] == pd.Timestamp(OPEN, tz='UTC').tz_convert(IST)
+    assert alerts['BB_Signal']['tick_time'] == pd.Timestamp(OPEN + 10 * SECOND_NS, tz='UTC').tz_convert(IST)
+    assert engine.codes[0, bb] != NEUTRAL
+
+def test_flickering_signal_alerts_once_per_bar():
+    engine = LiveEngine(['A'], '1m')
+    engine.seed(flat_history(['A']))
+    for second, price in ((5, 80.0), (10, 100.5), (15, 80.0)):
+        engine.process(batch((OPEN + second * SECOND_NS, 'A', price)))
+    signals = [alert['signal'] for alert in engine.alerts.drain()]
+    assert signals.count('BB_Signal') == 1
+    assert engine.alerts.stats['duplicates'] >= 1
+
+    # The same signal in a later bar alerts again
+    engine.process(batch((OPEN + 70 * SECOND_NS, 'A', 100.5)))
+    engine.process(batch((OPEN + 75 * SECOND_NS, 'A', 70.0)))
+    assert 'BB_Signal' in [alert['signal'] for alert in engine.alerts.drain()]
+
+def test_alert_queue_deduplicates_and_drops_oldest():
+    alerts = AlertQueue(maxsize=2, dedup_seconds=60)
+    assert alerts.put('first', 'a')
+    assert not alerts.put('again', 'a')
+    assert alerts.put('second', 'b')
+    assert alerts.put('third', 'c')
+    assert alerts.stats == {'queued': 3, 'duplicates': 1, 'dropped': 1}
+    assert alerts.drain() == ['second', 'third']
+    assert alerts.get(timeout=0) is None
+
+def test_alert_queue_expires_keys():
+    alerts = AlertQueue(dedup_seconds=0)
+    assert alerts.put('first', 'a')
+    assert alerts.put('again', 'a')
+    assert len(alerts) == 2
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.fetch_engine import synthetic_ohlcv
+from utils.market_data import MarketData
+from utils.panel import PANEL_FIELDS, build_panel
+
+@pytest.fixture(scope='module')
+def data():
+    frames = {f"SYM{i}": synthetic_ohlcv(60, seed=i) for i in range(5)}
+    # A late listing, a gap and a symbol without data
+    frames['SYM1'] = frames['SYM1'].iloc[20:]
+    frames['SYM2'] = frames['SYM2'].drop(frames['SYM2'].index[10:15])
+    frames['EMPTY'] = frames['SYM0'].iloc[:0]
+    return frames
+
+def test_from_frames_matches_build_panel(data):
+    panel = build_panel(data)
+    for dtype, tolerance in ((np.float64, 0), (np.float32, 1e-6)):
+        market_data = MarketData.from_frames(data, dtype=dtype)
+        assert market_data.values.dtype == dtype
+        assert list(market_data.symbols) == ['SYM0', 'SYM1', 'SYM2', 'SYM3', 'SYM4']
+        for field, frame in market_data.to_panel().items():
+            pd.testing.assert_index_equal(frame.index, panel[field].index)
+            np.testing.assert_allclose(frame.to_numpy(dtype=float), panel[field].to_numpy(), rtol=tolerance)
+
+def test_shared_memory_round_trip(data):
+    market_data = MarketData.from_frames(data)
+    block, descriptor = market_data.to_shared_memory()
+    try:
+        attached = MarketData.attach(descriptor)
+        try:
+            late = attached.take(['SYM1'])
+            chunk = attached.take(['SYM2', 'SYM3'])
+        finally:
+            attached.close()
+    finally:
+        block.close()
+        block.unlink()
+    assert chunk.values.dtype == np.float32
+    assert late.index[0] == data['SYM1'].index[0]
+    pd.testing.assert_frame_equal(chunk.frame('SYM2'), market_data.frame('SYM2'), check_index_type=False)
+
+def test_save_and_load(tmp_path, data):
+    market_data = MarketData.from_frames(data)
+    # Saving over an earlier save replaces both files and leaves no temporary ones
+    MarketData.from_frames({'SYM0': data['SYM0']}).save(str(tmp_path))
+    market_data.save(str(tmp_path))
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['metadata.pkl', 'values.npy']
+    loaded = MarketData.load(str(tmp_path))
+    assert loaded.fields == PANEL_FIELDS
+    assert not loaded.values.flags.writeable
+    np.testing.assert_array_equal(loaded.values, market_data.values)
+    assert loaded.index.equals(market_data.index)
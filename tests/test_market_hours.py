@@ -0,0 +1,22 @@
+from datetime import date, datetime
+
+from utils.market_hours import (IST, NSE_HOLIDAYS, is_market_open, is_trading_day, last_session_close,
+                                next_session_open)
+
+def at(day, hour, minute=0):
+    return IST.localize(datetime(2026, 10, day, hour, minute))
+
+def test_holidays_are_loaded():
+    assert date(2026, 10, 20) in NSE_HOLIDAYS
+    assert all(day.weekday() < 5 for day in NSE_HOLIDAYS)
+
+def test_no_session_on_a_holiday():
+    # Tuesday 20 October 2026 is Dussehra
+    assert not is_trading_day(date(2026, 10, 20))
+    assert not is_market_open(at(20, 11))
+    assert next_session_open(at(19, 16)) == at(21, 9, 15)
+    assert last_session_close(at(20, 11)) == at(19, 15, 50)
+
+def test_last_close_is_settling_right_after_the_close():
+    assert last_session_close(at(16, 15, 31)) == at(16, 15, 50)
+    assert last_session_close(at(16, 15, 29)) == at(15, 15, 50)
@@ -0,0 +1,45 @@
+from utils.metadata_store import UNKNOWN_SECTOR, MetadataStore
+
+def test_sector_grouping_follows_updates(tmp_path):
+    store = MetadataStore(str(tmp_path / 'metadata.sqlite'))
+    store.update({'TCS': {'sector': 'Technology'}, 'INFY': {'sector': 'Technology'},
+                  'HDFCBANK': {'sector': 'Financial Services'}, 'NIFTYBEES': {'sector': None}})
+    assert store.sector_names() == sorted(['Financial Services', 'Technology', UNKNOWN_SECTOR])
+    assert store.symbols_in_sector('Technology') == ['INFY', 'TCS']
+
+    store.update({'HDFCBANK': {'sector': 'Banking'}})
+    assert store.sector_names() == sorted(['Banking', 'Technology', UNKNOWN_SECTOR])
+    assert store.symbols_in_sector('Banking') == ['HDFCBANK']
+    assert store.sectors(['HDFCBANK', 'NIFTYBEES', 'MISSING']) == ['Banking', UNKNOWN_SECTOR, UNKNOWN_SECTOR]
+
+def test_other_writers_are_picked_up(tmp_path):
+    path = str(tmp_path / 'metadata.sqlite')
+    reader = MetadataStore(path)
+    MetadataStore(path).update({'TCS': {'sector': 'Technology'}})
+    assert reader.symbols_in_sector('Technology') == ['TCS']
+
+class CommitHook:
+    """Connection wrapper that runs ``after`` once the next ``with conn:`` block has committed."""
+
+    def __init__(self, conn, after):
+        self.conn = conn
+        self.after = after
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+    def __enter__(self):
+        return self.conn.__enter__()
+
+    def __exit__(self, *exc):
+        result = self.conn.__exit__(*exc)
+        after, self.after = self.after, lambda: None
+        after()
+        return result
+
+def test_write_right_after_ours_is_picked_up(tmp_path):
+    path = str(tmp_path / 'metadata.sqlite')
+    store, other = MetadataStore(path), MetadataStore(path)
+    store.conn = CommitHook(store.conn, lambda: other.update({'INFY': {'sector': 'Technology'}}))
+    store.update({'TCS': {'sector': 'Technology'}})
+    assert store.symbols_in_sector('Technology') == ['INFY', 'TCS']
@@ -0,0 +1,55 @@
+import contextvars
+import threading
+import time
+
+from utils import metrics
+from utils.fetch_engine import FetchEngine
+
+def test_runs_are_kept_per_context():
+    seen = {}
+
+    def session(name, stage):
+        run_id = metrics.start_run(name)
+        with metrics.Span(stage):
+            pass
+        seen[name] = (run_id, metrics.registry.last_run())
+
+    threads = [threading.Thread(target=contextvars.copy_context().run, args=(session, name, stage))
+               for name, stage in (('first', 'screen'), ('second', 'news'))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert seen['first'][0] != seen['second'][0]
+    assert seen['first'][1]['name'] == 'first' and set(seen['first'][1]['stages']) == {'screen'}
+    assert seen['second'][1]['name'] == 'second' and set(seen['second'][1]['stages']) == {'news'}
+    assert metrics.registry.last_run(seen['first'][0])['name'] == 'first'
+
+def test_nested_spans_report_self_time():
+    contextvars.copy_context().run(_nested)
+
+def _nested():
+    metrics.start_run('nested')
+    with metrics.Span('outer'):
+        time.sleep(0.02)
+        with metrics.Span('inner'):
+            time.sleep(0.05)
+    stages = metrics.registry.last_run()['stages']
+    assert stages['outer']['seconds'] >= stages['inner']['seconds'] >= 0.05
+    assert stages['outer']['self_seconds'] < 0.05
+    assert stages['inner']['self_seconds'] == stages['inner']['seconds']
+
+def test_fetch_engine_workers_record_into_the_callers_run():
+    def work():
+        metrics.start_run('bulk')
+
+        def fetch(item, timeout=None):
+            with metrics.Span('download', item):
+                return item
+
+        list(FetchEngine(max_workers=4, rate=None, max_retries=0).map(fetch, ['A', 'B', 'C']))
+        return metrics.registry.last_run()
+
+    run = contextvars.copy_context().run(work)
+    assert run['stages']['download']['calls'] == 3
@@ -0,0 +1,130 @@
+import hashlib
+import threading
+import time
+from datetime import datetime
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import pytz
+
+from utils.news import ENTRIES_PER_FEED, NewsService
+
+def canned_rss(symbol, count=ENTRIES_PER_FEED, shared_title="Markets close higher on broad buying"):
+    """Build an RSS document with ``count`` items for ``symbol``.
+
+    The first item is the same article for every symbol, to exercise
+    deduplication.
+    """
+    published = datetime(2025, 3, 10, 9, 0, tzinfo=pytz.UTC)
+    entries = [(shared_title, "https://example.com/markets-close-higher")]
+    entries += [(f"{symbol} update {i}", f"https://example.com/{symbol}/{i}") for i in range(1, count)]
+    items = ''.join(
+        f"<item><title>{title}</title><link>{link}</link>"
+        f"<pubDate>{format_datetime(published.replace(minute=i))}</pubDate>"
+        f"<source url=\"https://example.com\">Example News</source></item>"
+        for i, (title, link) in enumerate(entries)
+    )
+    return f"<?xml version=\"1.0\"?><rss version=\"2.0\"><channel><title>{symbol}</title>{items}</channel></rss>"
+
+class CannedFeedServer:
+    """Local HTTP stand-in for the news endpoint, serving ``canned_rss`` bodies.
+
+    Honours ``If-None-Match`` with 304 responses and counts requests, so the
+    service can be exercised offline. ``url_template`` is suitable for
+    ``NewsService(url_template=...)``.
+    """
+
+    def __init__(self, latency=0.0, rss=canned_rss):
+        self.latency = latency
+        self.rss = rss
+        self.requests = 0
+        self.not_modified = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                time.sleep(server.latency)
+                query = parse_qs(urlparse(self.path).query).get('q', [''])[0]
+                body = server.rss(query.split(' ')[0]).encode()
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                if self.headers.get('If-None-Match') == etag:
+                    server.not_modified += 1
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/rss+xml')
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url_template = f"http://127.0.0.1:{self.httpd.server_port}/rss?q={{query}}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+SYMBOLS = ['RELIANCE', 'TCS', 'INFY']
+
+@pytest.fixture
+def server():
+    with CannedFeedServer() as server:
+        yield server
+
+def test_fetch_all_deduplicates_shared_articles(server):
+    items, report = NewsService(url_template=server.url_template).fetch_all(SYMBOLS)
+    assert server.requests == len(SYMBOLS)
+    assert [entry['status'] for entry in report] == [200] * len(SYMBOLS)
+    assert len(items) == len(SYMBOLS) * (ENTRIES_PER_FEED - 1) + 1
+    shared = [item for item in items if item['Link'] == "https://example.com/markets-close-higher"]
+    assert len(shared) == 1
+    assert sorted(shared[0]['Symbol'].split(', ')) == sorted(SYMBOLS)
+    assert [item['Published'] for item in items] == sorted((item['Published'] for item in items), reverse=True)
+
+def test_fresh_feeds_are_served_from_memory(server):
+    service = NewsService(url_template=server.url_template)
+    first, _ = service.fetch_feed('TCS')
+    second, report = service.fetch_feed('TCS')
+    assert second == first
+    assert report['status'] == 'cached'
+    assert server.requests == 1
+
+def test_expired_feeds_are_revalidated(server):
+    service = NewsService(url_template=server.url_template, ttl=0)
+    first, _ = service.fetch_feed('TCS')
+    second, report = service.fetch_feed('TCS')
+    assert report['status'] == 304
+    assert second == first
+    assert (server.requests, server.not_modified) == (2, 1)
+
+def test_not_modified_without_a_cached_feed_refetches():
+    body = canned_rss('TCS').encode()
+    calls = []
+
+    def download(url, etag=None, modified=None, timeout=None):
+        calls.append(etag)
+        # A misbehaving cache in front of the feed answers 304 to an unconditional request
+        return (304, None, None, None) if len(calls) == 1 else (200, body, '"v1"', None)
+
+    items, report = NewsService(download=download).fetch_feed('TCS')
+    assert len(calls) == 2
+    assert report['status'] == 200
+    assert len(items) == ENTRIES_PER_FEED
+
+def test_not_modified_twice_without_a_cached_feed_is_an_error():
+    service = NewsService(download=lambda url, etag=None, modified=None, timeout=None: (304, None, None, None))
+    with pytest.raises(ValueError):
+        service.fetch_feed('TCS')
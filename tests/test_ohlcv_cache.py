@@ -0,0 +1,77 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from utils import ohlcv_cache
+from utils.fetch_engine import synthetic_ohlcv
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(ohlcv_cache, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(ohlcv_cache, 'CACHE_ENABLED', True)
+    return tmp_path
+
+def naive_daily(bars=60):
+    """Daily bars as yf.download returns them, without a timezone."""
+    return synthetic_ohlcv(bars, seed=1).tz_localize(None)
+
+def test_naive_download_is_cached_in_market_time():
+    merged = ohlcv_cache.update('ABC', '1d', None, naive_daily(), '3mo')
+    assert str(merged.index.tz) == ohlcv_cache.TIMEZONE
+    assert str(ohlcv_cache.load('ABC', '1d').index.tz) == ohlcv_cache.TIMEZONE
+
+def test_warm_plan_after_naive_download(monkeypatch):
+    ohlcv_cache.update('ABC', '1d', None, naive_daily(), '1mo')
+    cached, fetch_period = ohlcv_cache.plan('ABC', '1mo', '1d')
+    assert fetch_period is None
+    assert not ohlcv_cache.slice_period(cached, '1mo').empty
+
+    # Once stale, the top-up compares the last cached bar with a tz-aware now
+    monkeypatch.setattr(ohlcv_cache, 'is_fresh', lambda symbol, interval, max_age=None: False)
+    cached, fetch_period = ohlcv_cache.plan('ABC', '1mo', '1d')
+    assert fetch_period in ohlcv_cache.PERIOD_OFFSETS
+
+def test_naive_top_up_merges_with_aware_cache():
+    history = synthetic_ohlcv(60, seed=1)
+    ohlcv_cache.update('ABC', '1d', None, history, '3mo')
+    top_up = naive_daily(5)
+    merged = ohlcv_cache.update('ABC', '1d', ohlcv_cache.load('ABC', '1d'), top_up, '5d')
+    assert merged.index.is_unique
+    assert merged.index.is_monotonic_increasing
+    assert len(merged) == 60
+
+def test_legacy_naive_partition_loads_in_market_time(cache_dir):
+    (cache_dir / '1d').mkdir()
+    naive_daily().to_pickle(cache_dir / '1d' / 'ABC.pkl')
+    assert str(ohlcv_cache.load('ABC', '1d').index.tz) == ohlcv_cache.TIMEZONE
+
+def test_concurrent_saves_leave_one_complete_file(cache_dir):
+    frames = [synthetic_ohlcv(50 + i, seed=i) for i in range(8)]
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda df: ohlcv_cache.save('ABC', '1d', df), frames * 4))
+    assert len(ohlcv_cache.load('ABC', '1d')) in {len(df) for df in frames}
+    assert [path.name for path in (cache_dir / '1d').iterdir()] == ['ABC.pkl']
+
+def test_max_age_overrides_staleness():
+    ohlcv_cache.update('ABC', '1d', None, synthetic_ohlcv(60, seed=1), '1mo')
+    assert ohlcv_cache.plan('ABC', '1mo', '1d')[1] is None
+    assert ohlcv_cache.plan('ABC', '1mo', '1d', max_age=pd.Timedelta(0))[1] in ohlcv_cache.PERIOD_OFFSETS
+
+def test_day_periods_count_trading_sessions():
+    # Monday 19 October 2026, mid-session and before the open
+    monday = pd.Timestamp('2026-10-19 11:00', tz=ohlcv_cache.TIMEZONE)
+    assert ohlcv_cache.period_start('5d', monday) == pd.Timestamp('2026-10-13', tz=ohlcv_cache.TIMEZONE)
+    assert ohlcv_cache.period_start('1d', monday) == pd.Timestamp('2026-10-19', tz=ohlcv_cache.TIMEZONE)
+    early = pd.Timestamp('2026-10-19 08:00', tz=ohlcv_cache.TIMEZONE)
+    assert ohlcv_cache.period_start('1d', early) == pd.Timestamp('2026-10-16', tz=ohlcv_cache.TIMEZONE)
+
+def test_day_period_slices_keep_whole_sessions():
+    # The first minutes of eight sessions, the last one on a Monday
+    sessions = pd.bdate_range('2026-09-17', '2026-09-28', tz=ohlcv_cache.TIMEZONE)
+    index = pd.DatetimeIndex([day + pd.Timedelta(hours=9, minutes=15 + minute)
+                              for day in sessions for minute in range(5)])
+    bars = pd.DataFrame({'Close': range(len(index))}, index=index)
+    for period, count in (('1d', 1), ('5d', 5)):
+        days = ohlcv_cache.slice_period(bars, period).index.normalize().unique()
+        assert list(days) == list(index.normalize().unique()[-count:])
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.fetch_engine import synthetic_ohlcv
+from utils.indicators import add_indicators
+from utils.panel import Compaction, build_panel, latest_snapshot, panel_indicators
+from utils.recommendation_engine import analyze_stock, analyze_universe
+
+@pytest.fixture(scope='module')
+def misaligned():
+    data = {f"SYM{i:02d}": synthetic_ohlcv(80, seed=i) for i in range(30)}
+    for i, symbol in enumerate(data):
+        df = data[symbol]
+        if i % 5 == 1:
+            # A bar missing near the end, including the second-to-last one
+            data[symbol] = df.drop(df.index[-1 - i % 7])
+        elif i % 5 == 2:
+            data[symbol] = df.iloc[25:]
+        elif i % 5 == 3:
+            data[symbol] = df.drop(df.index[[10, 40, 41]])
+        elif i % 5 == 4:
+            # Delisted before the others' last bar
+            data[symbol] = df.iloc[:-3]
+    return data
+
+def test_compaction_round_trip():
+    values = np.array([[1.0, np.nan], [np.nan, 2.0], [3.0, np.nan], [4.0, 5.0]])
+    compaction = Compaction(~np.isnan(values))
+    compact = compaction.compact(values)
+    np.testing.assert_array_equal(compact, [[1.0, np.nan], [3.0, 2.0], [4.0, 5.0]])
+    np.testing.assert_array_equal(compaction.expand(compact), values)
+    assert compaction.expand(compact > 2, False).tolist() == [[False, False], [False, False], [True, False],
+                                                              [True, True]]
+
+def test_indicators_match_each_symbols_own_frame(misaligned):
+    panel = build_panel(misaligned)
+    indicators = panel_indicators(panel['Close'])
+    for symbol, df in misaligned.items():
+        expected = add_indicators(df)
+        for name, frame in indicators.items():
+            np.testing.assert_allclose(frame[symbol].loc[df.index].to_numpy(), expected[name].to_numpy(),
+                                       rtol=1e-9, atol=1e-9, err_msg=f"{symbol} {name}")
+            assert frame[symbol].drop(df.index).isna().all()
+
+def test_snapshot_uses_each_symbols_previous_bar(misaligned):
+    snapshot = latest_snapshot(build_panel(misaligned))
+    for symbol, df in misaligned.items():
+        assert snapshot.at[symbol, 'Prev_Close'] == df['Close'].iloc[-2]
+        assert snapshot.at[symbol, 'Volume_SMA_20'] == pytest.approx(df['Volume'].iloc[-20:].mean())
+
+def test_analyze_universe_matches_analyze_stock(misaligned):
+    results = {result['symbol']: result for result in analyze_universe(misaligned)}
+    assert set(results) == set(misaligned)
+    for symbol, df in misaligned.items():
+        expected = analyze_stock(symbol, df)
+        result = results[symbol]
+        for key in ('recommendation', 'technical_score', 'confidence', 'signal_summary'):
+            assert result[key] == expected[key], (symbol, key)
+        assert result['last_price'] == expected['last_price']
+        assert result['price_change'] == pytest.approx(expected['price_change'])
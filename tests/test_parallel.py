@@ -0,0 +1,97 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from utils import parallel
+from utils.fetch_engine import synthetic_ohlcv
+from utils.recommendation_engine import analyze_universe, stream_recommendations
+
+class BrokenPool:
+    """A pool whose worker died: submits fail once ``fail_after`` futures are out."""
+
+    def __init__(self, fail_after=0):
+        self.fail_after = fail_after
+        self.submitted = 0
+
+    def submit(self, fn, *args):
+        self.submitted += 1
+        if self.submitted > self.fail_after:
+            raise BrokenProcessPool("A child process terminated abruptly")
+        future = Future()
+        future.set_exception(BrokenProcessPool("A child process terminated abruptly"))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+@pytest.fixture
+def thread_pools(monkeypatch):
+    """Replacement pools run in threads; the shared pool starts out broken."""
+    monkeypatch.setattr(parallel, 'ProcessPoolExecutor', lambda max_workers, **options: ThreadPoolExecutor(max_workers))
+    monkeypatch.setattr(parallel, '_pool', None)
+    monkeypatch.setattr(parallel, '_pool_workers', None)
+    yield
+    if parallel._pool is not None:
+        parallel._pool.shutdown()
+
+@pytest.fixture(scope='module')
+def data():
+    return {f"SYM{i:02d}": synthetic_ohlcv(80, seed=i) for i in range(40)}
+
+def scores(results):
+    return {result['symbol']: result['technical_score'] for result in results}
+
+@pytest.mark.parametrize('shared', [False, True])
+def test_broken_pool_is_replaced(thread_pools, data, shared):
+    broken = BrokenPool(fail_after=2)
+    parallel._pool, parallel._pool_workers = broken, 2
+
+    results = [result for _, _, chunk in parallel.score_universe(data, max_workers=2, chunk_size=10, shared=shared)
+               for result in chunk]
+    assert scores(results) == scores(analyze_universe(data))
+    assert isinstance(parallel._pool, ThreadPoolExecutor)
+
+def test_shared_float32_panel_scores_like_float64(thread_pools, data):
+    results = [result for _, _, chunk in parallel.score_universe(data, max_workers=2, chunk_size=10)
+               for result in chunk]
+    expected = {result['symbol']: result for result in analyze_universe(data)}
+    assert len(results) == len(expected)
+    for result in results:
+        assert result['recommendation'] == expected[result['symbol']]['recommendation']
+        assert result['technical_score'] == expected[result['symbol']]['technical_score']
+        assert result['last_price'] == round(expected[result['symbol']]['last_price'], 2)
+
+def test_discard_pool_keeps_a_newer_pool(thread_pools):
+    current = parallel.get_pool(2)
+    parallel.discard_pool(BrokenPool())
+    assert parallel.get_pool(2) is current
+    parallel.discard_pool(current)
+    assert parallel.get_pool(2) is not current
+
+def test_stream_recommendations_scores_large_batches_in_the_pool(thread_pools, data, monkeypatch):
+    stock_data = pytest.importorskip('utils.stock_data')
+    symbols = list(data) + ['MISSING']
+
+    def fetch(symbols, period, interval, **options):
+        # The cached bulk first, then a small fetched chunk with a failure
+        yield 30, 41, {symbol: data[symbol] for symbol in symbols[:30]}, {}
+        yield 41, 41, {symbol: data[symbol] for symbol in symbols[30:40]}, {'MISSING': 'No data'}
+
+    monkeypatch.setattr(stock_data, 'iter_stock_data_bulk', fetch)
+    batches = []
+    score_universe = parallel.score_universe
+
+    def score_in_small_chunks(data, max_workers=None):
+        batches.append(len(data))
+        return score_universe(data, max_workers, chunk_size=10)
+
+    monkeypatch.setattr(parallel, 'score_universe', score_in_small_chunks)
+    updates = list(stream_recommendations(symbols, max_workers=2))
+
+    assert [done for done, _, _ in updates] == sorted(done for done, _, _ in updates)
+    assert updates[-1][:2] == (41, 41)
+    assert batches == [30, 10]
+    assert isinstance(parallel._pool, ThreadPoolExecutor)
+    results = [result for _, _, chunk in updates for result in chunk]
+    assert scores(results) == scores(analyze_universe(data))
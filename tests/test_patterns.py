@@ -0,0 +1,124 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.fetch_engine import synthetic_ohlcv
+from utils.panel import build_panel
+from utils.patterns import (BREAKOUT_BARS, DOJI_BODY, PATTERN_BARS, PATTERN_COLUMNS, SHADOW_RATIO, STAR_BODY,
+                            STAR_MIDDLE, SWING_BARS, TREND_BARS, describe_patterns, detect_patterns,
+                            latest_patterns, pattern_frame)
+
+@pytest.fixture(scope='module')
+def ohlc():
+    """OHLC panel of 100 symbols with late listings and missing bars."""
+    data = {f"SYM{i:03d}": synthetic_ohlcv(120, seed=i) for i in range(100)}
+    for i, symbol in enumerate(data):
+        df = data[symbol]
+        if i % 3 == 1:
+            data[symbol] = df.iloc[i % 40:]
+        elif i % 3 == 2:
+            data[symbol] = df.drop(df.index[[30, 31, 90 + i % 20]])
+    panel = build_panel(data)
+    return [panel[column].to_numpy(dtype=float) for column in ('Open', 'High', 'Low', 'Close')]
+
+def _window(values, start, end):
+    """``values[start:end]``, or None when it reaches before the first bar or over a missing one."""
+    if start < 0 or any(math.isnan(value) for value in values[start:end]):
+        return None
+    return values[start:end]
+
+def _sign(bullish, bearish):
+    return 1 if bullish else -1 if bearish else 0
+
+def reference_patterns(o, h, l, c, t):
+    """Pattern codes of bar ``t`` of 1-D lists, one bar and one rule at a time."""
+    def candle(i):
+        body = c[i] - o[i]
+        top, bottom = max(o[i], c[i]), min(o[i], c[i])
+        return body, abs(body), h[i] - l[i], h[i] - top, bottom - l[i]
+
+    codes = dict.fromkeys(PATTERN_COLUMNS, 0)
+    if math.isnan(c[t]):
+        return codes
+    body, size, span, upper, lower = candle(t)
+
+    if t >= 1 and not math.isnan(c[t - 1]):
+        prev_body = c[t - 1] - o[t - 1]
+        codes['Engulfing'] = _sign(
+            prev_body < 0 and body > 0 and o[t] <= c[t - 1] and c[t] >= o[t - 1] and size > -prev_body,
+            prev_body > 0 and body < 0 and o[t] >= c[t - 1] and c[t] <= o[t - 1] and size > prev_body,
+        )
+    codes['Doji'] = int(span > 0 and size <= DOJI_BODY * span)
+    if t > TREND_BARS and not math.isnan(c[t - 1]) and not math.isnan(c[t - TREND_BARS - 1]):
+        trend = c[t - 1] - c[t - TREND_BARS - 1]
+        wick = max(size, DOJI_BODY * span)
+        codes['Hammer'] = _sign(
+            span > 0 and lower >= SHADOW_RATIO * size and upper <= wick and trend < 0,
+            span > 0 and upper >= SHADOW_RATIO * size and lower <= wick and trend > 0,
+        )
+    if t >= 2 and not math.isnan(c[t - 1]) and not math.isnan(c[t - 2]):
+        first_body, _, first_span, _, _ = candle(t - 2)
+        _, middle_size, _, _, _ = candle(t - 1)
+        long_small = abs(first_body) >= STAR_BODY * first_span and middle_size <= STAR_MIDDLE * abs(first_body)
+        midpoint = (o[t - 2] + c[t - 2]) / 2
+        codes['Star'] = _sign(
+            long_small and first_body < 0 and max(o[t - 1], c[t - 1]) <= c[t - 2] and body > 0 and c[t] > midpoint,
+            long_small and first_body > 0 and min(o[t - 1], c[t - 1]) >= c[t - 2] and body < 0 and c[t] < midpoint,
+        )
+    highs, lows = _window(h, t - 2 * SWING_BARS + 1, t + 1), _window(l, t - 2 * SWING_BARS + 1, t + 1)
+    if highs is not None and lows is not None:
+        earlier_high, recent_high = max(highs[:SWING_BARS]), max(highs[SWING_BARS:])
+        earlier_low, recent_low = min(lows[:SWING_BARS]), min(lows[SWING_BARS:])
+        codes['Swing_Trend'] = _sign(recent_high > earlier_high and recent_low > earlier_low,
+                                     recent_high < earlier_high and recent_low < earlier_low)
+    highs, lows = _window(h, t - BREAKOUT_BARS, t), _window(l, t - BREAKOUT_BARS, t)
+    if highs is not None and lows is not None:
+        codes['Breakout'] = _sign(c[t] > max(highs), c[t] < min(lows))
+    return codes
+
+def test_panel_matches_per_bar_reference(ohlc):
+    codes = detect_patterns(*ohlc)
+    bars, symbols = ohlc[0].shape
+    for j in range(symbols):
+        series = [values[:, j].tolist() for values in ohlc]
+        for t in range(bars):
+            expected = reference_patterns(*series, t)
+            for name in PATTERN_COLUMNS:
+                assert codes[name][t, j] == expected[name], (name, t, j)
+    # Every pattern and both of its forms occur, so the comparison covers each rule
+    for name, values in codes.items():
+        assert values.dtype == np.int8
+        assert set(np.unique(values)) == ({0, 1} if name == 'Doji' else {-1, 0, 1}), name
+
+def test_series_matches_panel_column(ohlc):
+    codes = detect_patterns(*ohlc)
+    series = detect_patterns(*(values[:, 7] for values in ohlc))
+    for name in PATTERN_COLUMNS:
+        np.testing.assert_array_equal(series[name], codes[name][:, 7])
+
+def test_latest_patterns_match_full_history(ohlc):
+    codes = detect_patterns(*ohlc)
+    bars, symbols = ohlc[0].shape
+    last = np.random.default_rng(0).integers(0, bars, symbols)
+    last[:3] = [0, PATTERN_BARS - 2, bars - 1]
+    latest = latest_patterns(*ohlc, last)
+    for name in PATTERN_COLUMNS:
+        np.testing.assert_array_equal(latest[name], codes[name][last, np.arange(symbols)])
+
+def test_pattern_frame_and_labels():
+    df = pd.DataFrame({
+        'Open': [10.0, 9.0, 8.1, 9.0],
+        'High': [10.2, 9.1, 9.2, 9.9],
+        'Low': [9.0, 8.0, 8.0, 8.9],
+        'Close': [9.2, 8.2, 9.1, 9.8],
+    }, index=pd.date_range('2026-10-12', periods=4, freq='B'))
+    patterns = pattern_frame(df)
+    assert list(patterns.columns) == list(PATTERN_COLUMNS)
+    assert patterns['Engulfing'].tolist() == [0, 0, 1, 0]
+    described = describe_patterns(patterns)
+    assert described.iloc[0] == "None"
+    assert described.iloc[2] == "Bullish Engulfing"
+    both = pd.DataFrame([dict.fromkeys(PATTERN_COLUMNS, 0) | {'Doji': 1, 'Breakout': -1}])
+    assert describe_patterns(both).tolist() == ["Doji, Range Breakdown"]
@@ -0,0 +1,132 @@
+import threading
+import time
+import types
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from utils import result_cache
+from utils.market_hours import IST
+from utils.result_cache import ResultCache, cache_key, sizeof, ttl_for_interval
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A monotonic clock the test moves by hand."""
+    now = [1000.0]
+    monkeypatch.setattr(result_cache, 'time', types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(max_entries=2)
+    cache.put('a', 1, ttl=60)
+    cache.put('b', 2, ttl=60)
+    assert cache.get('a') == 1
+    cache.put('c', 3, ttl=60)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert cache.info()['evictions'] == 1
+
+def test_byte_budget_evicts_oldest_first():
+    frame = pd.DataFrame({'Close': range(100)}, dtype=float)
+    size = sizeof(frame)
+    cache = ResultCache(max_bytes=2 * size + size // 2)
+    for key in 'abc':
+        cache.put(key, frame, ttl=60)
+    assert cache.get('a') is None
+    assert cache.get('b') is frame and cache.get('c') is frame
+    assert cache.info()['bytes'] == 2 * size
+
+    # A value larger than the whole budget is not stored and evicts nothing
+    cache.put('d', pd.concat([frame] * 3), ttl=60)
+    assert cache.get('d') is None
+    assert cache.info()['entries'] == 2
+
+def test_replacing_a_key_keeps_the_byte_count():
+    cache = ResultCache()
+    cache.put('a', [1.0] * 10, ttl=60)
+    cache.put('a', [1.0] * 1000, ttl=60)
+    assert cache.info()['bytes'] == sizeof([1.0] * 1000)
+    cache.invalidate()
+    assert cache.info()['bytes'] == 0
+
+def test_entries_expire_after_their_ttl(clock):
+    cache = ResultCache()
+    cache.put('a', 1, ttl=30)
+    clock[0] += 29
+    assert cache.get('a') == 1
+    clock[0] += 1
+    assert cache.get('a', 'expired') == 'expired'
+    assert cache.get_or_compute('a', lambda: 2, ttl=30) == 2
+    assert cache.info()['misses'] == 1
+
+def test_get_or_compute_skips_results_rejected_by_cache_if():
+    cache = ResultCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return None, "fetch failed"
+
+    for _ in range(2):
+        result = cache.get_or_compute('a', compute, ttl=60, cache_if=lambda value: value[1] is None)
+        assert result == (None, "fetch failed")
+    assert len(calls) == 2
+    assert cache.get('a') is None
+
+def test_concurrent_misses_share_one_computation_and_its_error():
+    cache = ResultCache()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        raise ValueError("no data")
+
+    errors = []
+
+    def call():
+        try:
+            cache.get_or_compute('a', compute, ttl=60)
+        except ValueError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    waiters = [threading.Thread(target=call) for _ in range(3)]
+    for thread in waiters:
+        thread.start()
+    while cache.info()['waits'] < 3:
+        time.sleep(0.01)
+    release.set()
+    for thread in [leader, *waiters]:
+        thread.join(5)
+    assert len(calls) == 1
+    assert len(errors) == 4 and all(e is errors[0] for e in errors)
+    assert cache.get('a') is None
+
+def test_invalidate_by_kind():
+    cache = ResultCache()
+    cache.put(cache_key('stock', 'INFY.NS', period='1y'), 1, ttl=60)
+    cache.put(cache_key('stock', 'TCS.NS'), 2, ttl=60)
+    cache.put(cache_key('recommendations', 'all'), 3, ttl=60)
+    cache.invalidate('stock')
+    assert cache.info()['entries'] == 1
+    assert cache.get(('recommendations', 'all')) == 3
+
+def test_cache_key_hashes_params_in_any_order():
+    assert cache_key('stock', 'INFY.NS') == ('stock', 'INFY.NS')
+    assert cache_key('stock', 'INFY.NS', period='1y', interval='1d') == \
+        cache_key('stock', 'INFY.NS', interval='1d', period='1y')
+    assert cache_key('stock', 'INFY.NS', period='1y') != cache_key('stock', 'INFY.NS', period='6mo')
+
+def test_ttl_follows_the_session():
+    # Friday 16 October 2026: open until 15:30, settled at 15:50
+    assert ttl_for_interval('1d', IST.localize(datetime(2026, 10, 16, 14, 0))) == 110 * 60
+    assert ttl_for_interval('1d', IST.localize(datetime(2026, 10, 16, 10, 0))) == 4 * 3600
+    # After the close the next change is at Monday's open
+    assert ttl_for_interval('1d', IST.localize(datetime(2026, 10, 16, 16, 0))) == (65 * 60 + 15) * 60
+    assert ttl_for_interval('5m', IST.localize(datetime(2026, 10, 16, 16, 0))) == 300
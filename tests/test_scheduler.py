@@ -0,0 +1,55 @@
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip('yfinance')
+
+from utils import scheduler
+from utils.correlation import WINDOW
+from utils.fetch_engine import synthetic_ohlcv
+from utils.ohlcv_cache import slice_period
+
+SYMBOLS = [f"SYM{i}" for i in range(6)]
+
+class FakeMetadata:
+    def update_prices(self, data):
+        pass
+
+    def prefetch(self, symbols):
+        pass
+
+def test_full_refresh_feeds_correlations_a_longer_history(tmp_path, monkeypatch):
+    history = {symbol: synthetic_ohlcv(130, seed=i) for i, symbol in enumerate(SYMBOLS)}
+    periods = []
+
+    def fetch(symbols, period, interval, **kwargs):
+        periods.append(period)
+        return {symbol: slice_period(history[symbol], period) for symbol in symbols}, {}
+
+    monkeypatch.setattr(scheduler, 'get_stock_data_bulk', fetch)
+    monkeypatch.setattr(scheduler, 'get_metadata_store', FakeMetadata)
+    monkeypatch.setattr(scheduler, 'is_market_open', lambda: False)
+    store = scheduler.ResultStore(str(tmp_path))
+    refresher = scheduler.RefreshScheduler(store=store, symbols=SYMBOLS)
+
+    refresher.refresh(SYMBOLS, full=True)
+    refresher.refresh(SYMBOLS[:2])
+    assert periods == [scheduler.CORRELATION_PERIOD, scheduler.REFRESH_PERIOD]
+
+    correlation, _ = store.get('correlation')
+    assert correlation.window == WINDOW
+    assert len(correlation.similar('SYM0')) == len(SYMBOLS) - 1
+
+def at(day, hour, minute=0):
+    return scheduler.IST.localize(datetime(2026, 10, day, hour, minute))
+
+def test_refresh_after_the_close_waits_for_the_settled_bar():
+    # Friday 16 October 2026: the last session refresh ran at 15:27
+    assert scheduler.seconds_until_refresh(at(16, 15, 27), at(16, 15, 31)) == 19 * 60
+    assert scheduler.seconds_until_refresh(at(16, 15, 27), at(16, 15, 51)) == 0
+    # Once the settled bar is published, nothing runs until Monday's open
+    assert scheduler.seconds_until_refresh(at(16, 15, 51), at(16, 16)) == (at(19, 9, 15) - at(16, 16)).total_seconds()
+
+def test_no_session_refreshes_on_a_holiday():
+    # Tuesday 20 October 2026 is Dussehra
+    assert scheduler.seconds_until_refresh(at(19, 15, 55), at(20, 11)) == (at(21, 9, 15) - at(20, 11)).total_seconds()
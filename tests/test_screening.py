@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.screening import Evaluation, RuleError, compile_rule, evaluate_rule
+
+@pytest.fixture
+def evaluation():
+    snapshot = pd.DataFrame({
+        'Close': [100.0, 50.0, 80.0, 120.0],
+        'SMA_20': [90.0, 60.0, 80.0, np.nan],
+        'RSI': [25.0, 75.0, np.nan, 50.0],
+    }, index=pd.Index(['A', 'B', 'C', 'D']))
+    return Evaluation.from_snapshot(snapshot)
+
+def matches(rule, evaluation):
+    return list(evaluate_rule(rule, None, evaluation))
+
+@pytest.mark.parametrize('rule, expected', [
+    ('RSI < 30', ['A']),
+    ('(Close - SMA_20) > 0', ['A']),
+    ('Close > (SMA_20 + 5)', ['A']),
+    ('(Close - SMA_20) / SMA_20 * 100 < -10', ['B']),
+    ('((Close)) >= 80 AND (RSI > 20)', ['A', 'D']),
+    ('(RSI < 30 OR RSI > 70) AND (Close - SMA_20) < 0', ['B']),
+    ('NOT (RSI < 30 OR Close < 60)', ['D']),
+])
+def test_rules(rule, expected, evaluation):
+    assert matches(rule, evaluation) == expected
+
+def test_not_skips_missing_values(evaluation):
+    assert matches('NOT RSI < 30', evaluation) == ['B', 'D']
+    assert matches('NOT Close > SMA_20', evaluation) == ['B', 'C']
+    assert matches('NOT NOT RSI < 30', evaluation) == ['A']
+
+@pytest.mark.parametrize('rule', [
+    '(Close - SMA_20) * 2 > 0',
+    'Close - (SMA_20 - 5) > 0',
+    'Close / (RSI * 2) < 1',
+    '(RSI < 30) AND NOT (Close > SMA_20 + 1)',
+])
+def test_string_form_parses_back_to_the_same_rule(rule, evaluation):
+    compiled = compile_rule(rule)
+    assert str(compile_rule(str(compiled))) == str(compiled)
+    assert matches(str(compiled), evaluation) == matches(rule, evaluation)
+
+@pytest.mark.parametrize('rule', ['(RSI < 30', '(Close - SMA_20 > 0', '(RSI < 30) > 0', '()', 'Volume_Spike > 1'])
+def test_invalid_rules(rule):
+    with pytest.raises(RuleError):
+        compile_rule(rule)
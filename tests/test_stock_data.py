@@ -0,0 +1,100 @@
+import threading
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('yfinance')
+
+from utils import ohlcv_cache
+from utils.fetch_engine import FetchEngine, MockProvider
+from utils.stock_data import get_stock_data_bulk
+
+SYMBOLS = [f"SYM{i:02d}" for i in range(10)]
+
+class RecordingProvider:
+    """``MockProvider`` that records each chunk, failing those with a ``fail`` symbol and omitting ``missing`` ones."""
+
+    def __init__(self, fail=(), missing=(), naive=False):
+        self.provider = MockProvider(latency=0.0, bars=60)
+        self.fail = set(fail)
+        self.missing = set(missing)
+        self.naive = naive
+        self.chunks = []
+        self.lock = threading.Lock()
+
+    def __call__(self, symbols, period='1y', interval='1d', timeout=None):
+        with self.lock:
+            self.chunks.append((list(symbols), period))
+        if self.fail.intersection(symbols):
+            raise ValueError("chunk rejected")
+        frames = self.provider(symbols, period, interval, timeout)
+        if self.naive:
+            frames = {symbol: df.tz_localize(None) for symbol, df in frames.items()}
+        return {symbol: df for symbol, df in frames.items() if symbol not in self.missing}
+
+@pytest.fixture
+def engine():
+    return FetchEngine(max_workers=4, rate=None, max_retries=0)
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(ohlcv_cache, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(ohlcv_cache, 'CACHE_ENABLED', True)
+    return tmp_path
+
+def test_symbols_are_fetched_once_in_chunks(engine):
+    provider = RecordingProvider()
+    data, errors = get_stock_data_bulk(SYMBOLS + SYMBOLS[:3], period='3mo', chunk_size=4, provider=provider,
+                                       use_cache=False, engine=engine)
+    assert sorted(len(chunk) for chunk, _ in provider.chunks) == [2, 4, 4]
+    assert sorted(symbol for chunk, _ in provider.chunks for symbol in chunk) == sorted(SYMBOLS)
+    assert {period for _, period in provider.chunks} == {'3mo'}
+    assert sorted(data) == sorted(SYMBOLS)
+    assert errors == {}
+
+def test_failed_chunk_only_affects_its_symbols(engine):
+    provider = RecordingProvider(fail={'SYM05'})
+    progress = []
+    data, errors = get_stock_data_bulk(SYMBOLS, chunk_size=4, provider=provider, use_cache=False, engine=engine,
+                                       progress=lambda done, total: progress.append((done, total)))
+    assert sorted(errors) == ['SYM04', 'SYM05', 'SYM06', 'SYM07']
+    assert all(message.startswith("Error fetching data: chunk rejected") for message in errors.values())
+    assert sorted(data) == [symbol for symbol in SYMBOLS if symbol not in errors]
+    assert [done for done, _ in progress] == sorted(done for done, _ in progress)
+    assert progress[-1] == (len(SYMBOLS), len(SYMBOLS))
+
+def test_every_symbol_is_in_data_or_errors(engine):
+    provider = RecordingProvider(missing={'SYM01', 'SYM08'})
+    data, errors = get_stock_data_bulk(SYMBOLS, chunk_size=3, provider=provider, use_cache=False, engine=engine)
+    assert errors == {'SYM01': "No data available for this symbol", 'SYM08': "No data available for this symbol"}
+    assert set(data).isdisjoint(errors)
+    assert set(data) | set(errors) == set(SYMBOLS)
+    assert all(not df.empty and {'Open', 'High', 'Low', 'Close', 'Volume'} <= set(df.columns) for df in data.values())
+
+def test_fresh_cache_is_served_without_requests(engine, cache_dir):
+    # Daily bars arrive tz-naive from yf.download; the warm run must still plan against them
+    provider = RecordingProvider(naive=True)
+    first, _ = get_stock_data_bulk(SYMBOLS, period='1mo', chunk_size=4, provider=provider, engine=engine)
+    calls = len(provider.chunks)
+    second, errors = get_stock_data_bulk(SYMBOLS, period='1mo', chunk_size=4, provider=provider, engine=engine)
+    assert len(provider.chunks) == calls
+    assert errors == {}
+    assert all(second[symbol].equals(first[symbol]) for symbol in SYMBOLS)
+
+def test_stale_cache_tops_up_with_a_short_period(engine, cache_dir):
+    provider = RecordingProvider()
+    get_stock_data_bulk(SYMBOLS, period='1y', chunk_size=4, provider=provider, engine=engine)
+    provider.chunks.clear()
+    data, errors = get_stock_data_bulk(SYMBOLS, period='1y', chunk_size=4, provider=provider, engine=engine,
+                                       max_age=pd.Timedelta(0))
+    assert errors == {}
+    periods = list(ohlcv_cache.PERIOD_OFFSETS)
+    assert provider.chunks
+    assert all(periods.index(period) < periods.index('1y') for _, period in provider.chunks)
+
+def test_failed_top_up_serves_the_cache(engine, cache_dir):
+    get_stock_data_bulk(SYMBOLS, period='1mo', chunk_size=4, provider=RecordingProvider(), engine=engine)
+    data, errors = get_stock_data_bulk(SYMBOLS, period='1mo', chunk_size=4, provider=RecordingProvider(fail=SYMBOLS),
+                                       engine=engine, max_age=pd.Timedelta(0))
+    assert errors == {}
+    assert sorted(data) == sorted(SYMBOLS)
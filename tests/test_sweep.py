@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import kernels
+from utils.backtest import backtest
+from utils.fetch_engine import synthetic_ohlcv
+from utils.indicators import add_indicators
+from utils.panel import build_panel, latest_snapshot
+from utils.recommendation_engine import calculate_technical_score, calculate_technical_scores
+from utils.sweep import DEFAULT_PARAMS, SharedIndicators, sweep, sweep_grid
+
+TOLERANCE = 1e-9
+
+@pytest.fixture(scope='module')
+def gapped():
+    """Random walks with late listings (leading NaN) and interior gaps."""
+    rng = np.random.default_rng(0)
+    bars, symbols = 250, 40
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (bars, symbols)), axis=0))
+    close[:rng.integers(1, bars // 2), :symbols // 4] = np.nan
+    close[rng.random((bars, symbols)) < 0.02] = np.nan
+    volume = np.where(np.isnan(close), np.nan, rng.integers(1_000, 100_000, (bars, symbols)).astype(float))
+    return close, volume
+
+@pytest.fixture(scope='module')
+def misaligned():
+    data = {f"SYM{i:02d}": synthetic_ohlcv(120, seed=i) for i in range(20)}
+    for i, symbol in enumerate(data):
+        df = data[symbol]
+        if i % 4 == 1:
+            data[symbol] = df.drop(df.index[[-2, 50]])
+        elif i % 4 == 2:
+            data[symbol] = df.iloc[30:]
+        elif i % 4 == 3:
+            data[symbol] = df.iloc[:-4]
+    return data
+
+@pytest.mark.parametrize('smoothing', ['sma', 'wilder'])
+@pytest.mark.parametrize('window', [5, 14, 20, 50])
+def test_shared_indicators_match_kernels(gapped, smoothing, window):
+    close, volume = gapped
+    shared = SharedIndicators(close, volume, smoothing)
+    np.testing.assert_allclose(shared.sma(window), kernels.rolling_mean(close, window), rtol=TOLERANCE,
+                               atol=TOLERANCE)
+    np.testing.assert_allclose(shared.std(window), kernels.rolling_std(close, window), rtol=1e-7, atol=1e-7)
+    np.testing.assert_allclose(shared.ema(window), kernels.ewm_mean(close, window), rtol=TOLERANCE,
+                               atol=TOLERANCE)
+    np.testing.assert_allclose(shared.rsi(window), kernels.rsi(close, window, smoothing), rtol=1e-7, atol=1e-7)
+    np.testing.assert_allclose(shared.volume_sma(window), kernels.rolling_mean(volume, window), rtol=TOLERANCE,
+                               atol=TOLERANCE)
+
+def test_shared_macd_matches_kernels(gapped):
+    close, volume = gapped
+    macd, signal = SharedIndicators(close, volume).macd(8, 21, 5)
+    expected = kernels.ewm_mean(close, 8) - kernels.ewm_mean(close, 21)
+    np.testing.assert_allclose(macd, expected, rtol=TOLERANCE, atol=TOLERANCE)
+    np.testing.assert_allclose(signal, kernels.ewm_mean(expected, 5), rtol=TOLERANCE, atol=TOLERANCE)
+
+def test_unknown_rsi_smoothing(gapped):
+    with pytest.raises(ValueError):
+        SharedIndicators(*gapped, rsi_smoothing='ema')
+
+def test_default_sweep_matches_technical_score(misaligned):
+    panel = build_panel(misaligned)
+    result = sweep(panel=panel).set_index('symbol')
+    expected = calculate_technical_scores(latest_snapshot(panel))
+    np.testing.assert_array_equal(result['score'].to_numpy(), expected.loc[result.index].to_numpy())
+    for symbol, df in misaligned.items():
+        assert result.at[symbol, 'score'] == calculate_technical_score(add_indicators(df)), symbol
+
+def test_history_sweep_matches_backtest(misaligned):
+    result = sweep(misaligned, history=True).set_index('symbol')
+    expected = backtest(misaligned)['symbols']
+    for column in ('bars', 'total_return', 'sharpe', 'max_drawdown', 'annual_turnover', 'exposure'):
+        np.testing.assert_allclose(result[column].to_numpy(dtype=float),
+                                   expected.loc[result.index, column].to_numpy(dtype=float),
+                                   rtol=1e-6, atol=1e-9, err_msg=column)
+    latest = sweep(misaligned).set_index('symbol')
+    pd.testing.assert_series_equal(result['score'], latest['score'])
+
+def test_grid_points_match_single_runs(misaligned):
+    grid = sweep_grid(sma_period=[10, 50], rsi_period=[7, 21], macd_fast=[12, 30])
+    assert all(dict(DEFAULT_PARAMS, **params)['macd_fast'] < 26 for params in grid)
+    assert len(grid) == 4
+    combined = sweep(misaligned, grid=grid)
+    for number, params in enumerate(grid):
+        single = sweep(misaligned, grid=[params])
+        part = combined[combined['config'] == number].drop(columns='config').reset_index(drop=True)
+        pd.testing.assert_frame_equal(part, single.drop(columns='config'))
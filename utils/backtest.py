@@ -0,0 +1,288 @@
+import itertools
+import time
+import numpy as np
+import pandas as pd
+
+from utils.metrics import timed
+from utils.kernels import rolling_mean
+from utils.panel import Compaction, build_panel, panel_indicators
+
+TRADING_DAYS = 252
+
+# Points added by each condition of calculate_technical_score
+DEFAULT_WEIGHTS = {
+    'RSI_Oversold': 20,
+    'RSI_Overbought': -20,
+    'RSI_Neutral': 10,
+    'MACD_Bullish': 20,
+    'MACD_Bearish': -20,
+    'Above_SMA20': 15,
+    'Below_SMA20': -15,
+    'Below_BB_Lower': 15,
+    'Above_BB_Upper': -15,
+    'High_Volume': 10,
+}
+# Lowest score for each recommendation on the buy side, highest on the sell side (get_recommendation)
+DEFAULT_THRESHOLDS = {'Strong Buy': 50, 'Buy': 20, 'Sell': -20, 'Strong Sell': -50}
+RECOMMENDATIONS = ('Strong Sell', 'Sell', 'Hold', 'Buy', 'Strong Buy')
+# Position held after each recommendation, as a fraction of capital
+DEFAULT_POSITIONS = {'Strong Buy': 1.0, 'Buy': 0.5, 'Hold': 0.0, 'Sell': -0.5, 'Strong Sell': -1.0}
+COST_BPS = 10
+
+def score_conditions(panel, indicators=None):
+    """Evaluate every scoring condition on every bar of a panel.
+
+    Returns ``(conditions, valid)``: a dict of condition name to a boolean
+    (time x symbol) array, and a mask of bars with a close and warmed-up
+    indicators. NaN comparisons behave as in ``calculate_technical_score``.
+    """
+    if indicators is None:
+        indicators = panel_indicators(panel['Close'], groups=('SMA', 'RSI', 'MACD'))
+    close = panel['Close'].to_numpy(dtype=float)
+    volume = panel['Volume'].to_numpy(dtype=float)
+    rsi = indicators['RSI'].to_numpy()
+    macd = indicators['MACD'].to_numpy()
+    macd_signal = indicators['MACD_Signal'].to_numpy()
+    sma = indicators['SMA_20'].to_numpy()
+    # Over each symbol's own bars, like the indicators
+    compaction = Compaction(~np.isnan(close))
+    volume_sma = compaction.expand(rolling_mean(compaction.compact(volume), 20))
+
+    with np.errstate(invalid='ignore'):
+        oversold = rsi < 30
+        overbought = rsi > 70
+        above_sma = close > sma
+        conditions = {
+            'RSI_Oversold': oversold,
+            'RSI_Overbought': overbought,
+            'RSI_Neutral': ~oversold & ~overbought,
+            'MACD_Bullish': macd > macd_signal,
+            'MACD_Bearish': macd < macd_signal,
+            'Above_SMA20': above_sma,
+            'Below_SMA20': ~above_sma,
+            'Below_BB_Lower': close < indicators['BB_Lower'].to_numpy(),
+            'Above_BB_Upper': close > indicators['BB_Upper'].to_numpy(),
+            'High_Volume': volume > volume_sma * 1.5,
+        }
+    valid = ~np.isnan(close) & ~np.isnan(sma) & ~np.isnan(rsi)
+    return conditions, valid
+
+def score_panel(conditions, weights=None):
+    """Technical score of every bar, clipped to [-100, 100] like ``calculate_technical_score``."""
+    weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+    score = np.zeros(next(iter(conditions.values())).shape, dtype=np.float32)
+    for name, mask in conditions.items():
+        if weights[name]:
+            score += np.float32(weights[name]) * mask
+    return np.clip(score, -100, 100)
+
+def recommendation_codes(scores, thresholds=None):
+    """Recommendation of every bar as an index into ``RECOMMENDATIONS``."""
+    thresholds = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+    return np.select(
+        [scores >= thresholds['Strong Buy'], scores >= thresholds['Buy'],
+         scores <= thresholds['Strong Sell'], scores <= thresholds['Sell']],
+        [4, 3, 0, 1], 2
+    ).astype(np.int8)
+
+def positions_from_scores(scores, valid, thresholds=None, positions=None, long_only=False):
+    """Turn scores into the position held at the close of each bar."""
+    positions = dict(DEFAULT_POSITIONS, **(positions or {}))
+    sizes = np.array([positions[name] for name in RECOMMENDATIONS], dtype=np.float32)
+    if long_only:
+        sizes = np.maximum(sizes, 0)
+    return np.where(valid, sizes[recommendation_codes(scores, thresholds)], np.float32(0))
+
+def bar_returns(close):
+    """Close-to-close returns with gaps carried forward; 0 where a bar is missing."""
+    filled = pd.DataFrame(close).ffill().to_numpy()
+    returns = np.zeros(close.shape)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        returns[1:] = filled[1:] / filled[:-1] - 1
+    returns[~np.isfinite(returns)] = 0.0
+    returns[np.isnan(close)] = 0.0
+    return returns
+
+def strategy_returns(returns, held, cost_bps=COST_BPS):
+    """Returns of holding ``held[t - 1]`` over bar ``t``, net of trading costs.
+
+    A trade at bar ``t`` (at its close) pays ``cost_bps`` on the traded
+    fraction. Returns ``(net_returns, turnover)`` arrays.
+    """
+    previous = np.zeros_like(held)
+    previous[1:] = held[:-1]
+    turnover = np.abs(held - previous)
+    return previous * returns - turnover * (cost_bps / 1e4), turnover
+
+def performance(returns, turnover, held, listed):
+    """Per-column performance statistics of a (time x column) strategy return array."""
+    bars = listed.sum(axis=0)
+    years = np.maximum(bars, 1) / TRADING_DAYS
+    equity = np.cumprod(1 + returns, axis=0)
+    drawdown = equity / np.maximum.accumulate(equity, axis=0) - 1
+
+    previous = np.zeros_like(held)
+    previous[1:] = held[:-1]
+    active = (previous != 0) & (returns != 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = returns.sum(axis=0) / np.maximum(bars, 1)
+        std = np.sqrt(np.maximum((returns ** 2).sum(axis=0) / np.maximum(bars, 1) - mean ** 2, 0))
+        total = equity[-1] - 1 if len(equity) else np.zeros(returns.shape[1])
+        return {
+            'bars': bars,
+            'total_return': total,
+            'annual_return': np.power(np.maximum(1 + total, 0), 1 / years) - 1,
+            'annual_volatility': std * np.sqrt(TRADING_DAYS),
+            'sharpe': np.where(std > 0, mean / std * np.sqrt(TRADING_DAYS), np.nan),
+            'hit_rate': (active & (returns > 0)).sum(axis=0) / active.sum(axis=0),
+            'max_drawdown': drawdown.min(axis=0) if len(drawdown) else np.zeros(returns.shape[1]),
+            'annual_turnover': turnover.sum(axis=0) / years,
+            'exposure': (held != 0).sum(axis=0) / np.maximum(bars, 1),
+        }
+
+def universe_returns(returns, turnover, listed):
+    """Equal-weight the symbols listed on each bar into one portfolio return series."""
+    counts = np.maximum(listed.sum(axis=1), 1)
+    return (returns * listed).sum(axis=1) / counts, (turnover * listed).sum(axis=1) / counts
+
+@timed('backtest')
+def backtest(data, weights=None, thresholds=None, positions=None, long_only=False, cost_bps=COST_BPS,
+             panel=None):
+    """Backtest the technical score and recommendation rules on every bar.
+
+    ``data`` maps symbol to an OHLCV DataFrame (or pass a prebuilt ``panel``).
+    The score of each bar is turned into a recommendation and then into a
+    position (``positions``) held until the next close. Returns a dict with
+    ``symbols`` (per-symbol statistics and buy-and-hold return), ``universe``
+    (statistics of the equal-weight portfolio), ``equity`` (its equity curve)
+    and ``positions`` (the time x symbol position frame).
+    """
+    panel = build_panel(data) if panel is None else panel
+    close = panel['Close']
+    conditions, valid = score_conditions(panel)
+    held = positions_from_scores(score_panel(conditions, weights), valid, thresholds, positions, long_only)
+    listed = ~np.isnan(close.to_numpy(dtype=float))
+    returns = bar_returns(close.to_numpy(dtype=float))
+    net, turnover = strategy_returns(returns, held, cost_bps)
+
+    symbols = pd.DataFrame(performance(net, turnover, held, listed), index=close.columns)
+    symbols['buy_hold_return'] = np.prod(1 + returns, axis=0) - 1
+
+    portfolio, portfolio_turnover = universe_returns(net, turnover, listed)
+    universe = performance(portfolio[:, None], portfolio_turnover[:, None],
+                           (held != 0).any(axis=1)[:, None].astype(float), listed.any(axis=1)[:, None])
+    return {
+        'symbols': symbols,
+        'universe': {name: value[0] for name, value in universe.items()},
+        'equity': pd.Series(np.cumprod(1 + portfolio), index=close.index, name='Equity'),
+        'positions': pd.DataFrame(held, index=close.index, columns=close.columns),
+    }
+
+def parameter_grid(weights=None, thresholds=None):
+    """Expand ``{name: [values]}`` weight and threshold options into candidate dicts."""
+    options = [('weights', name, values) for name, values in (weights or {}).items()]
+    options += [('thresholds', name, values) for name, values in (thresholds or {}).items()]
+    candidates = []
+    for combination in itertools.product(*(values for _, _, values in options)):
+        candidate = {'weights': {}, 'thresholds': {}}
+        for (kind, name, _), value in zip(options, combination):
+            candidate[kind][name] = value
+        candidates.append(candidate)
+    return candidates
+
+@timed('backtest')
+def walk_forward(data, candidates, train_bars=3 * TRADING_DAYS, test_bars=TRADING_DAYS, metric='sharpe',
+                 positions=None, long_only=False, cost_bps=COST_BPS, panel=None):
+    """Walk-forward tuning of score weights and thresholds.
+
+    Each candidate (see ``parameter_grid``) is scored once over the whole
+    history. For every fold the candidate with the best ``metric`` on the
+    preceding ``train_bars`` of universe returns is applied to the next
+    ``test_bars``. Returns a dict with ``folds`` (the chosen candidate and
+    its train/test statistics per fold), ``returns`` (the out-of-sample
+    portfolio returns) and ``universe`` (their statistics).
+    """
+    panel = build_panel(data) if panel is None else panel
+    close = panel['Close']
+    conditions, valid = score_conditions(panel)
+    listed = ~np.isnan(close.to_numpy(dtype=float))
+    returns = bar_returns(close.to_numpy(dtype=float))
+    any_listed = listed.any(axis=1)
+
+    series = []
+    for candidate in candidates:
+        held = positions_from_scores(score_panel(conditions, candidate.get('weights')), valid,
+                                     candidate.get('thresholds'), positions, long_only)
+        net, turnover = strategy_returns(returns, held, cost_bps)
+        portfolio, portfolio_turnover = universe_returns(net, turnover, listed)
+        series.append((portfolio, portfolio_turnover, (held != 0).any(axis=1).astype(float)))
+
+    def stats(choice, window):
+        portfolio, portfolio_turnover, exposure = series[choice]
+        result = performance(portfolio[window, None], portfolio_turnover[window, None],
+                             exposure[window, None], any_listed[window, None])
+        return {name: value[0] for name, value in result.items()}
+
+    folds = []
+    out_of_sample = []
+    for start in range(train_bars, len(close), test_bars):
+        train = slice(start - train_bars, start)
+        test = slice(start, min(start + test_bars, len(close)))
+        scores = [stats(choice, train)[metric] for choice in range(len(candidates))]
+        best = int(np.nanargmax(scores)) if not np.all(np.isnan(scores)) else 0
+        test_stats = stats(best, test)
+        folds.append({
+            'train_start': close.index[train.start],
+            'test_start': close.index[test.start],
+            'test_end': close.index[test.stop - 1],
+            'candidate': best,
+            'params': candidates[best],
+            f"train_{metric}": scores[best],
+            **{f"test_{name}": value for name, value in test_stats.items()},
+        })
+        out_of_sample.append((test, best))
+
+    if not out_of_sample:
+        return {'folds': pd.DataFrame(), 'returns': pd.Series(dtype=float), 'universe': {}}
+
+    index = np.concatenate([np.arange(len(close))[test] for test, _ in out_of_sample])
+    oos = [np.concatenate([series[best][k][test] for test, best in out_of_sample]) for k in range(3)]
+    universe = performance(oos[0][:, None], oos[1][:, None], oos[2][:, None], any_listed[index, None])
+    return {
+        'folds': pd.DataFrame(folds),
+        'returns': pd.Series(oos[0], index=close.index[index], name='Return'),
+        'universe': {name: value[0] for name, value in universe.items()},
+    }
+
+def benchmark(symbols=2000, years=10):
+    """Time a full backtest and a small walk-forward run on a synthetic universe."""
+    from utils.fetch_engine import synthetic_ohlcv
+
+    bars = years * TRADING_DAYS
+    data = {f"SYM{i:04d}": synthetic_ohlcv(bars, seed=i) for i in range(symbols)}
+
+    start = time.perf_counter()
+    panel = build_panel(data)
+    panel_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = backtest(data, panel=panel)
+    backtest_seconds = time.perf_counter() - start
+
+    candidates = parameter_grid(thresholds={'Strong Buy': [40, 50, 60], 'Buy': [10, 20, 30]})
+    start = time.perf_counter()
+    walk_forward(data, candidates, panel=panel)
+    walk_forward_seconds = time.perf_counter() - start
+
+    return {
+        'symbols': symbols,
+        'bars': bars,
+        'panel_seconds': round(panel_seconds, 3),
+        'backtest_seconds': round(backtest_seconds, 3),
+        'walk_forward_seconds': round(walk_forward_seconds, 3),
+        'walk_forward_candidates': len(candidates),
+        'universe_sharpe': round(float(result['universe']['sharpe']), 3),
+    }
+
+if __name__ == "__main__":
+    print(benchmark())
@@ -0,0 +1,236 @@
+"""Offline benchmarks for the analysis pipeline at universe scale.
+
+Run a suite and write a JSON report::
+
+    python -m utils.benchmark run --sizes 200x60,2000x1250 --output bench.json
+
+Compare two reports and flag stages that slowed down::
+
+    python -m utils.benchmark compare old.json new.json --threshold 0.2
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from utils.backtest import backtest
+from utils.fetch_engine import FetchEngine, synthetic_ohlcv
+from utils.indicators import add_indicators
+from utils.panel import build_panel, panel_indicators
+from utils.recommendation_engine import analyze_stock, analyze_universe, calculate_technical_score
+from utils.screening import evaluate_rule
+from utils.signals import generate_signals
+from utils.stock_data import get_stock_data_bulk
+
+DEFAULT_SIZES = ((200, 60), (500, 250), (2000, 1250))
+SCREEN_RULE = ['RSI_Oversold', 'Above_SMA20', 'MACD_Bullish']
+SYNTHETIC_END = pd.Timestamp('2025-03-10', tz='Asia/Kolkata')
+# Stages whose output later stages read
+STAGE_DEPENDENCIES = {
+    'generate_signals': ('add_indicators',),
+    'calculate_technical_score': ('add_indicators',),
+}
+
+def synthetic_universe(symbols, bars, interval='1d', nan_fraction=0.0, seed=0):
+    """Generate ``symbols`` synthetic OHLCV frames with optional NaN gaps.
+
+    ``nan_fraction`` of the bars of each symbol (never the last two) have all
+    their fields blanked, like missing rows in provider data.
+    """
+    rng = np.random.default_rng(seed)
+    universe = {}
+    for i in range(symbols):
+        df = synthetic_ohlcv(bars, interval, seed=seed * 100_003 + i, end=SYNTHETIC_END)
+        if nan_fraction and bars > 2:
+            gaps = rng.random(bars - 2) < nan_fraction
+            df.iloc[np.flatnonzero(gaps)] = np.nan
+        universe[f"SYM{i:04d}"] = df
+    return universe
+
+def stub_provider(universe):
+    """Chunk provider for ``get_stock_data_bulk`` that serves a synthetic universe."""
+    def provider(symbols, period='1y', interval='1d', timeout=None):
+        return {symbol: universe[symbol] for symbol in symbols if symbol in universe}
+    return provider
+
+def pipeline_stages(universe):
+    """Return ``(name, callable)`` pairs for every benchmarked stage.
+
+    Per-symbol stages reuse the output of the previous stage so each timing
+    covers only its own work.
+    """
+    state = {}
+
+    def fetch():
+        state['data'], _ = get_stock_data_bulk(list(universe), provider=stub_provider(universe),
+                                               use_cache=False, engine=FetchEngine(rate=None))
+
+    def indicators():
+        state['indicators'] = {symbol: add_indicators(df) for symbol, df in state['data'].items()}
+
+    def signals():
+        for df in state['indicators'].values():
+            generate_signals(df)
+
+    def scores():
+        for df in state['indicators'].values():
+            calculate_technical_score(df)
+
+    def analyze():
+        for symbol, df in state['data'].items():
+            analyze_stock(symbol, df)
+
+    def panel():
+        state['panel'] = build_panel(state['data'])
+        panel_indicators(state['panel']['Close'])
+
+    def analyze_panel():
+        analyze_universe(state['data'])
+
+    def screen():
+        evaluate_rule(SCREEN_RULE, build_panel(state['data']))
+
+    def backtest_panel():
+        backtest(state['data'])
+
+    return [
+        ('fetch_stub', fetch),
+        ('add_indicators', indicators),
+        ('generate_signals', signals),
+        ('calculate_technical_score', scores),
+        ('analyze_stock', analyze),
+        ('panel_indicators', panel),
+        ('analyze_universe', analyze_panel),
+        ('screen_stocks', screen),
+        ('backtest', backtest_panel),
+    ]
+
+def run_suite(sizes=DEFAULT_SIZES, interval='1d', nan_fraction=0.0, stages=None, memory=True):
+    """Time each stage for every ``(symbols, bars)`` size and return result rows."""
+    rows = []
+    for symbols, bars in sizes:
+        universe = synthetic_universe(symbols, bars, interval, nan_fraction)
+        required = {'fetch_stub'}
+        for name in stages or ():
+            required.update(STAGE_DEPENDENCIES.get(name, ()))
+        for name, stage in pipeline_stages(universe):
+            if stages and name not in stages:
+                if name in required:
+                    stage()
+                continue
+            start = time.perf_counter()
+            stage()
+            seconds = time.perf_counter() - start
+
+            peak_mb = None
+            if memory:
+                tracemalloc.start()
+                stage()
+                peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+                tracemalloc.stop()
+
+            rows.append({
+                'symbols': symbols,
+                'bars': bars,
+                'interval': interval,
+                'nan_fraction': nan_fraction,
+                'stage': name,
+                'seconds': round(seconds, 4),
+                'peak_mb': round(peak_mb, 2) if peak_mb is not None else None,
+            })
+            print(f"{symbols:>5} x {bars:<5} {name:<26} {seconds:8.3f}s"
+                  + (f" {peak_mb:9.1f} MB" if peak_mb is not None else ""), file=sys.stderr)
+    return rows
+
+def build_report(rows):
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'results': rows,
+    }
+
+def compare_reports(old, new, threshold=0.2):
+    """Compare two reports stage by stage.
+
+    Returns rows with the old and new time and their ratio; ``slower`` is set
+    when the new run takes more than ``1 + threshold`` times as long.
+    """
+    def key(row):
+        return row['symbols'], row['bars'], row['interval'], row.get('nan_fraction', 0.0), row['stage']
+
+    old_rows = {key(row): row for row in old['results']}
+    comparison = []
+    for row in new['results']:
+        before = old_rows.get(key(row))
+        if before is None:
+            continue
+        ratio = row['seconds'] / before['seconds'] if before['seconds'] else float('inf')
+        comparison.append({
+            'symbols': row['symbols'],
+            'bars': row['bars'],
+            'stage': row['stage'],
+            'old_seconds': before['seconds'],
+            'new_seconds': row['seconds'],
+            'ratio': round(ratio, 3),
+            'slower': ratio > 1 + threshold,
+        })
+    return comparison
+
+def parse_sizes(text):
+    return [tuple(int(part) for part in size.lower().split('x')) for size in text.split(',')]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='run the benchmark suite')
+    run.add_argument('--sizes', type=parse_sizes, default=list(DEFAULT_SIZES),
+                     help='comma-separated SYMBOLSxBARS sizes (default: 200x60,500x250,2000x1250)')
+    run.add_argument('--interval', default='1d')
+    run.add_argument('--nan-fraction', type=float, default=0.0, help='fraction of bars blanked as gaps')
+    run.add_argument('--stages', help='comma-separated stage names to run')
+    run.add_argument('--no-memory', action='store_true', help='skip the tracemalloc peak-memory pass')
+    run.add_argument('--output', help='write the JSON report here instead of stdout')
+
+    compare = commands.add_parser('compare', help='compare two JSON reports')
+    compare.add_argument('old')
+    compare.add_argument('new')
+    compare.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown ratio (default 0.2)')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        stages = set(args.stages.split(',')) if args.stages else None
+        report = build_report(run_suite(args.sizes, args.interval, args.nan_fraction, stages,
+                                        memory=not args.no_memory))
+        text = json.dumps(report, indent=2)
+        if args.output:
+            with open(args.output, 'w') as f:
+                f.write(text)
+        else:
+            print(text)
+        return 0
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    comparison = compare_reports(old, new, args.threshold)
+    print(pd.DataFrame(comparison).to_string(index=False))
+    slower = [row for row in comparison if row['slower']]
+    if slower:
+        print(f"\n{len(slower)} stage(s) slower than {1 + args.threshold:.2f}x the baseline", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Run the screener and the recommendation engine without Streamlit.
+
+Screen a symbol file and write the matches::
+
+    python -m utils.cli screen "RSI < 30" Above_SMA20 --output oversold.csv
+
+Write recommendations of at least medium confidence, e.g. from cron after
+the close (``{now:...}`` in the path is filled with the run time in IST)::
+
+    python -m utils.cli recommend --min-confidence Medium --output "exports/recs-{now:%Y%m%d}.parquet"
+
+The format follows the output extension (.csv, .parquet, .jsonl) unless
+``--format`` is given; ``-`` writes CSV or JSON lines to stdout. Stage
+timings go to stderr and, with ``--timings``, to a JSON file.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from utils import engine, metrics
+from utils.fetch_engine import MAX_WORKERS, FetchEngine
+from utils.market_hours import IST
+from utils.ohlcv_cache import write_atomic
+from utils.scheduler import SYMBOLS_FILE, load_symbols
+
+FORMATS = {'.csv': 'csv', '.parquet': 'parquet', '.jsonl': 'jsonl', '.json': 'jsonl'}
+
+def output_format(path, fmt=None):
+    """Output format from ``fmt`` or the extension of ``path``, CSV by default."""
+    if fmt:
+        return fmt
+    return FORMATS.get(os.path.splitext(path)[1].lower(), 'csv')
+
+def write_results(df, path, fmt):
+    """Write ``df`` as ``fmt`` to ``path`` (``-`` for stdout), replacing the file atomically."""
+    if path == '-':
+        if fmt == 'parquet':
+            raise ValueError("Parquet cannot be written to stdout")
+        if fmt == 'csv':
+            df.to_csv(sys.stdout, index=False)
+        else:
+            df.to_json(sys.stdout, orient='records', lines=True, date_format='iso')
+        return
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if fmt == 'csv':
+        write_atomic(path, lambda tmp_path: df.to_csv(tmp_path, index=False))
+    elif fmt == 'parquet':
+        write_atomic(path, lambda tmp_path: df.to_parquet(tmp_path, index=False))
+    else:
+        write_atomic(path, lambda tmp_path: df.to_json(tmp_path, orient='records', lines=True, date_format='iso'))
+
+def run(args):
+    """Run one command and return ``(results, timings)``."""
+    symbols = load_symbols(args.symbols)
+    fetch_engine = FetchEngine(max_workers=args.workers)
+    metrics.start_run(f"cli {args.command}")
+    start = time.perf_counter()
+
+    if args.command == 'screen':
+        results = engine.screen_stocks(symbols, args.rules, engine=fetch_engine)
+    else:
+        recommendations = engine.generate_recommendations(symbols, args.period, args.interval,
+                                                          engine=fetch_engine)
+        results = engine.recommendations_table(recommendations, args.min_confidence)
+
+    timings = dict(metrics.registry.last_run() or {},
+                   symbols=len(symbols), rows=len(results), seconds=round(time.perf_counter() - start, 3))
+    return results, timings
+
+def print_timings(timings, file=None):
+    file = file or sys.stderr
+    print(f"{timings['rows']} rows from {timings['symbols']} symbols in {timings['seconds']:.2f}s", file=file)
+    for stage, totals in timings.get('stages', {}).items():
+        print(f"  {stage:<12} {totals['seconds']:8.3f}s  {totals['self_seconds']:8.3f}s self  ({totals['calls']} calls)",
+              file=file)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', default=SYMBOLS_FILE, help=f'symbol CSV file (default: {SYMBOLS_FILE})')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS,
+                        help=f'concurrent fetch requests (default: {MAX_WORKERS})')
+    parser.add_argument('--output', default='-', help='output path, or - for stdout (default)')
+    parser.add_argument('--format', choices=sorted(set(FORMATS.values())), help='output format')
+    parser.add_argument('--timings', help='also write stage timings as JSON to this path')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    screen = commands.add_parser('screen', help='screen symbols with rule expressions')
+    screen.add_argument('rules', nargs='+',
+                        help='rule expressions or preset names, combined with AND (e.g. "RSI < 30" Above_SMA20)')
+
+    recommend = commands.add_parser('recommend', help='score symbols and write recommendations')
+    recommend.add_argument('--min-confidence', choices=list(engine.CONFIDENCE_LEVELS), default='Low')
+    recommend.add_argument('--period', default=engine.RECOMMENDATION_PERIOD)
+    recommend.add_argument('--interval', default='1d')
+
+    args = parser.parse_args(argv)
+    path = args.output.format(now=datetime.now(IST))
+    fmt = output_format(path, args.format)
+
+    try:
+        results, timings = run(args)
+        write_results(results, path, fmt)
+    except (ValueError, ImportError, OSError) as e:
+        parser.exit(1, f"error: {e}\n")
+
+    print_timings(timings)
+    if args.timings:
+        def write_timings(tmp_path):
+            with open(tmp_path, 'w') as f:
+                json.dump(timings, f, indent=2, default=str)
+        write_atomic(args.timings, write_timings)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
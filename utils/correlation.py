@@ -0,0 +1,263 @@
+"""Rolling return correlations across the symbol universe.
+
+``CorrelationIndex`` keeps the last ``window`` daily returns of every symbol
+together with their running sums, sums of squares and pairwise cross
+products. A new daily bar replaces the oldest return with a rank-one update,
+so the matrix is never recomputed from scratch. The top-k most correlated
+symbols of every symbol are kept precomputed for lookups. Correlations are
+computed in float32 blocks of rows, so the working memory stays at one
+(symbols x symbols) float32 matrix::
+
+    python -m utils.correlation    # accuracy check and timings up to 2000 symbols
+"""
+import copy
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.metrics import timed
+
+# Daily returns per correlation, about three months of sessions
+WINDOW = 60
+# History fetched for the index: a 3mo download often has fewer than WINDOW + 1 sessions
+CORRELATION_PERIOD = '6mo'
+# Below this many returns correlations are too noisy to show
+MIN_WINDOW = 20
+TOP_K = 10
+BLOCK_SIZE = 256
+
+def daily_returns(values):
+    """Simple returns along axis 0 of a (time x symbol) close array; NaN where either close is missing."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return values[1:] / values[:-1] - 1
+
+class CorrelationIndex:
+    """Correlation of the last ``window`` daily returns between every pair of ``symbols``.
+
+    A symbol with a missing return in the window has no correlations until
+    the gap rolls out. Build one from a close panel with ``from_closes`` and
+    feed later closes to ``update``.
+    """
+
+    def __init__(self, symbols, window=WINDOW, k=TOP_K, block_size=BLOCK_SIZE):
+        self.symbols = pd.Index(symbols)
+        size = len(self.symbols)
+        self.window = window
+        self.k = min(k, max(size - 1, 0))
+        self.block_size = block_size
+
+        # Ring buffer of returns; slots not filled yet count as missing
+        self.returns = np.zeros((window, size))
+        self.missing = np.ones((window, size), dtype=bool)
+        self.head = 0
+        self.sums = np.zeros(size)
+        self.squares = np.zeros(size)
+        self.missing_count = np.full(size, window)
+        self.cross = np.zeros((size, size), dtype=np.float32)
+        self.updates = 0
+
+        self.prev_close = np.full(size, np.nan)
+        self.last_close = np.full(size, np.nan)
+        self.last_time = None
+        self.top_index = np.zeros((size, self.k), dtype=np.int32)
+        self.top_corr = np.full((size, self.k), np.nan, dtype=np.float32)
+
+    @classmethod
+    @timed('correlation')
+    def from_closes(cls, closes, window=WINDOW, k=TOP_K, block_size=BLOCK_SIZE):
+        """Build the index from a (time x symbol) DataFrame of daily closes in one pass."""
+        index = cls(closes.columns, window, k, block_size)
+        values = closes.to_numpy(dtype=float)
+        tail = daily_returns(values)[-window:]
+        index.returns[:len(tail)] = np.nan_to_num(tail)
+        index.missing[:len(tail)] = np.isnan(tail)
+        index.head = len(tail) % window
+        if len(values):
+            index.last_close = values[-1]
+            index.last_time = closes.index[-1]
+        if len(values) > 1:
+            index.prev_close = values[-2]
+        index._rebuild()
+        return index
+
+    def _rebuild(self):
+        """Recompute the running sums from the buffered returns."""
+        returns = np.where(self.missing, 0.0, self.returns)
+        self.sums = returns.sum(axis=0)
+        self.squares = (returns * returns).sum(axis=0)
+        self.missing_count = self.missing.sum(axis=0)
+        returns = returns.astype(np.float32)
+        for start in range(0, len(self.symbols), self.block_size):
+            rows = slice(start, start + self.block_size)
+            self.cross[rows] = returns[:, rows].T @ returns
+        self.updates = 0
+        self._build_top()
+
+    def _replace(self, slot, returns):
+        """Swap the returns in ``slot`` for ``returns``, adjusting the sums in place."""
+        new_missing = np.isnan(returns)
+        new = np.where(new_missing, 0.0, returns)
+        old = np.where(self.missing[slot], 0.0, self.returns[slot])
+        self.sums += new - old
+        self.squares += new * new - old * old
+        self.missing_count += new_missing.astype(int) - self.missing[slot]
+        new32, old32 = new.astype(np.float32), old.astype(np.float32)
+        for start in range(0, len(self.symbols), self.block_size):
+            rows = slice(start, start + self.block_size)
+            self.cross[rows] += np.outer(new32[rows], new32) - np.outer(old32[rows], old32)
+        self.returns[slot] = new
+        self.missing[slot] = new_missing
+
+    @timed('correlation')
+    def update(self, closes, at):
+        """Add the daily closes of time ``at``, a Series by symbol or an array in ``symbols`` order.
+
+        Closes for the latest time already added replace it (an intraday
+        refresh of today's bar); earlier times are ignored. Returns whether
+        the index changed.
+        """
+        if isinstance(closes, pd.Series):
+            closes = closes.reindex(self.symbols)
+        closes = np.asarray(closes, dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if self.last_time is not None and at == self.last_time:
+                slot = (self.head - 1) % self.window
+                returns = closes / self.prev_close - 1
+            elif self.last_time is None or at > self.last_time:
+                slot = self.head
+                self.head = (self.head + 1) % self.window
+                returns = closes / self.last_close - 1
+                self.prev_close = self.last_close
+                self.last_time = at
+            else:
+                return False
+        self.last_close = closes
+        self._replace(slot, returns)
+
+        # float32 round-off accumulates over add/remove updates, so start afresh once per window
+        self.updates += 1
+        if self.updates >= self.window:
+            self._rebuild()
+        else:
+            self._build_top()
+        return True
+
+    def _block(self, rows, cols=slice(None)):
+        """float32 correlations of the symbols at ``rows`` with those at ``cols``."""
+        mean = self.sums / self.window
+        variance = np.maximum(self.squares / self.window - mean * mean, 0.0)
+        std = np.sqrt(variance)
+        valid = (self.missing_count == 0) & (variance > 0)
+        cov = self.cross[rows][:, cols] / self.window - np.outer(mean[rows], mean[cols]).astype(np.float32)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cov / np.outer(std[rows], std[cols]).astype(np.float32)
+        corr[~valid[rows]] = np.nan
+        corr[:, ~valid[cols]] = np.nan
+        return np.clip(corr, -1, 1)
+
+    def _build_top(self):
+        """Precompute the ``k`` most correlated symbols of every symbol, best first."""
+        if not self.k:
+            return
+        size = len(self.symbols)
+        for start in range(0, size, self.block_size):
+            rows = np.arange(start, min(start + self.block_size, size))
+            corr = self._block(rows)
+            corr[np.arange(len(rows)), rows] = np.nan
+            scores = np.where(np.isnan(corr), -np.inf, corr)
+            top = np.argpartition(-scores, self.k - 1, axis=1)[:, :self.k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind='stable')
+            self.top_index[rows] = np.take_along_axis(top, order, axis=1)
+            top_corr = np.take_along_axis(top_scores, order, axis=1)
+            self.top_corr[rows] = np.where(np.isinf(top_corr), np.nan, top_corr)
+
+    def similar(self, symbol, k=None):
+        """The up to ``k`` (default all precomputed) symbols moving most like ``symbol``, with correlations."""
+        position = self.symbols.get_loc(symbol)
+        k = self.k if k is None else min(k, self.k)
+        corr = self.top_corr[position, :k]
+        keep = ~np.isnan(corr)
+        return pd.Series(corr[keep], index=self.symbols[self.top_index[position, :k][keep]],
+                         name='correlation')
+
+    def matrix(self, symbols=None):
+        """Correlation matrix of ``symbols`` (default the universe) as a float32 DataFrame."""
+        positions = np.arange(len(self.symbols)) if symbols is None else self.symbols.get_indexer(symbols)
+        positions = positions[positions >= 0]
+        corr = np.concatenate([self._block(positions[start:start + self.block_size], positions)
+                               for start in range(0, len(positions), self.block_size)] or
+                              [np.zeros((0, len(positions)), dtype=np.float32)])
+        labels = self.symbols[positions]
+        return pd.DataFrame(corr, index=labels, columns=labels)
+
+    def crowding(self, symbols=None):
+        """Mean pairwise correlation among ``symbols`` (default the universe), or NaN below two symbols.
+
+        A high value for, say, the buy list means the signals are largely one bet.
+        """
+        positions = np.arange(len(self.symbols)) if symbols is None else self.symbols.get_indexer(symbols)
+        positions = positions[positions >= 0]
+        total, pairs = 0.0, 0
+        for start in range(0, len(positions), self.block_size):
+            rows = positions[start:start + self.block_size]
+            corr = self._block(rows, positions)
+            corr[np.arange(len(rows)), np.arange(start, start + len(rows))] = np.nan
+            total += float(np.nansum(corr, dtype=np.float64))
+            pairs += int(np.count_nonzero(~np.isnan(corr)))
+        return total / pairs if pairs else float('nan')
+
+    def nbytes(self):
+        return sum(array.nbytes for array in (self.returns, self.missing, self.cross, self.top_index, self.top_corr))
+
+def update_correlation_index(index, closes, window=WINDOW, k=TOP_K):
+    """Bring ``index`` (or None) up to date with a (time x symbol) close panel.
+
+    Rows from the index's last time on are applied as updates; a changed
+    universe or a gap longer than the panel rebuilds it. A panel with fewer
+    than ``window`` returns uses all it has (at least ``MIN_WINDOW``). The
+    given index is left untouched, so a published copy can still be read
+    while this runs.
+    """
+    window = max(min(window, len(closes) - 1), MIN_WINDOW)
+    if (index is None or index.window != window or not index.symbols.equals(closes.columns)
+            or index.last_time is None or index.last_time not in closes.index):
+        return CorrelationIndex.from_closes(closes, window, k)
+    index = copy.deepcopy(index)
+    for at, row in closes.loc[index.last_time:].iterrows():
+        index.update(row.to_numpy(dtype=float), at)
+    return index
+
+def benchmark(symbols=2000, bars=250, window=WINDOW, updates=5, seed=0):
+    """Time a full build and daily updates, and check them against ``np.corrcoef``."""
+    rng = np.random.default_rng(seed)
+    # A market factor plus noise, so correlations are spread out like real returns
+    returns = rng.normal(0, 0.01, (bars + updates, 1)) + rng.normal(0, 0.015, (bars + updates, symbols))
+    closes = pd.DataFrame(100 * np.cumprod(1 + returns, axis=0), columns=[f"SYM{i:04d}" for i in range(symbols)],
+                          index=pd.bdate_range('2024-01-01', periods=bars + updates))
+
+    start = time.perf_counter()
+    index = CorrelationIndex.from_closes(closes.iloc[:bars], window)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for at, row in closes.iloc[bars:].iterrows():
+        index.update(row.to_numpy(), at)
+    update_seconds = (time.perf_counter() - start) / updates
+
+    expected = np.corrcoef(daily_returns(closes.to_numpy())[-window:], rowvar=False)
+    sample = slice(0, min(symbols, 500))
+    error = float(np.abs(index.matrix(index.symbols[sample]).to_numpy() - expected[sample, sample]).max())
+    return {
+        'symbols': symbols,
+        'window': window,
+        'build_seconds': round(build_seconds, 3),
+        'update_seconds': round(update_seconds, 3),
+        'max_error': error,
+        'memory_mb': round(index.nbytes() / 2**20, 1),
+    }
+
+if __name__ == "__main__":
+    for symbols in (216, 2000):
+        print(benchmark(symbols))
@@ -0,0 +1,102 @@
+import time
+import numpy as np
+
+# Points per line and candles per chart; about two per pixel of a full-width chart
+LINE_POINTS = 1500
+CANDLE_POINTS = 600
+
+def chart_times(index):
+    """Bar times as float64 epoch milliseconds of IST wall-clock time.
+
+    Plotly reads numbers on a date axis as milliseconds and sends numpy
+    float arrays as compact typed arrays, unlike lists of timestamps.
+    """
+    if index.tz is not None:
+        index = index.tz_convert('Asia/Kolkata').tz_localize(None)
+    return index.as_unit('ms').asi8.astype(np.float64)
+
+def lttb(x, y, threshold):
+    """Indices of ``threshold`` points chosen by Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept; in between, each bucket keeps
+    the point forming the largest triangle with the previously kept point and
+    the mean of the next bucket, which preserves peaks and troughs.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    edges = (np.arange(threshold - 1) * ((n - 2) / (threshold - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+def downsample_line(x, y, threshold=LINE_POINTS):
+    """LTTB-downsample a line, dropping NaN points (indicator warm-up) first."""
+    y = np.asarray(y, dtype=np.float64)
+    finite = np.flatnonzero(np.isfinite(y))
+    keep = finite[lttb(x[finite], y[finite], threshold)]
+    return x[keep], y[keep]
+
+def bucket_starts(n, max_buckets):
+    """Start offsets of consecutive equal-size buckets covering ``n`` bars."""
+    size = max(1, -(-n // max_buckets))
+    return np.arange(0, n, size), size
+
+def aggregate_ohlc(x, open_, high, low, close, max_bars=CANDLE_POINTS):
+    """Merge consecutive bars into at most ``max_bars`` candles.
+
+    Each candle opens at its first bar's open, closes at its last bar's close
+    and spans their highest high and lowest low, so no price extreme is lost.
+    Returns ``(x, open, high, low, close)`` arrays.
+    """
+    n = len(x)
+    if n <= max_bars:
+        return x, open_, high, low, close
+    starts, size = bucket_starts(n, max_bars)
+    ends = np.minimum(starts + size, n) - 1
+    return (x[starts], open_[starts], np.fmax.reduceat(high, starts), np.fmin.reduceat(low, starts),
+            close[ends])
+
+def aggregate_extreme(x, values, max_bars=CANDLE_POINTS):
+    """Keep the largest-magnitude value of each bucket, e.g. for histogram bars."""
+    n = len(x)
+    if n <= max_bars:
+        return x, values
+    starts, size = bucket_starts(n, max_bars)
+    padded = np.full(len(starts) * size, np.nan)
+    padded[:n] = values
+    blocks = padded.reshape(-1, size)
+    pick = np.argmax(np.nan_to_num(np.abs(blocks), nan=-1.0), axis=1)
+    return x[starts], blocks[np.arange(len(blocks)), pick]
+
+def benchmark(bars=2 * 252 * 7, lines=6):
+    """Time downsampling ``lines`` indicator series and the candles of ``bars`` bars."""
+    from utils.fetch_engine import synthetic_ohlcv
+
+    df = synthetic_ohlcv(bars, interval='1h', seed=0)
+    x = chart_times(df.index)
+    start = time.perf_counter()
+    candles = aggregate_ohlc(x, *(df[column].to_numpy() for column in ('Open', 'High', 'Low', 'Close')))
+    for _ in range(lines):
+        line_x, _ = downsample_line(x, df['Close'].to_numpy())
+    seconds = time.perf_counter() - start
+    return {
+        'bars': bars,
+        'candles': len(candles[0]),
+        'line_points': len(line_x),
+        'seconds': round(seconds, 4),
+    }
+
+if __name__ == "__main__":
+    print(benchmark())
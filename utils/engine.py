@@ -0,0 +1,144 @@
+"""Screening and recommendation runs shared by the Streamlit pages and the CLI.
+
+Results go through the process-wide result cache, so a page and a batch
+run in the same process reuse each other's work.
+"""
+import pandas as pd
+
+from utils import metrics
+from utils.metadata_store import get_metadata_store
+from utils.panel import build_panel
+from utils.patterns import PATTERN_COLUMNS, describe_patterns
+from utils.recommendation_engine import recommendation_basis, stream_recommendations
+from utils.result_cache import cache_key, get_result_cache, ttl_for_interval
+from utils.screening import COLUMNS, Evaluation, compile_rule, evaluate_rule
+from utils.signals import signal_labels
+from utils.stock_data import get_stock_data_bulk
+
+# The scheduler's published snapshot uses the same history, so a live screen matches it
+SCREEN_PERIOD = '3mo'
+RECOMMENDATION_PERIOD = '3mo'
+LABEL_COLUMNS = ['Close', 'RSI', 'MACD', 'MACD_Signal', 'BB_Upper', 'BB_Lower', 'SMA_20']
+CONFIDENCE_LEVELS = {'Low': 0, 'Medium': 1, 'High': 2}
+
+def screen_stocks(symbols, criteria, snapshot=None, engine=None):
+    """Screen stocks based on technical criteria.
+
+    ``criteria`` is a rule expression such as ``"RSI < 30 AND Close > SMA_20"``,
+    a list of expressions combined with AND, or a compiled rule. A precomputed
+    ``latest_snapshot`` frame is screened directly without fetching data,
+    unless it was published before some screening columns existed.
+    """
+    rule = compile_rule(criteria)
+    if snapshot is not None and set(COLUMNS).issubset(snapshot.columns):
+        panel = None
+        evaluation = Evaluation.from_snapshot(snapshot[snapshot.index.isin(symbols)])
+    else:
+        data, _ = get_stock_data_bulk(symbols, period=SCREEN_PERIOD, interval='1d', engine=engine)
+        if not data:
+            return pd.DataFrame()
+
+        # Only the indicators the rule needs are computed, and only for symbols still in play
+        panel = build_panel(data)
+        evaluation = Evaluation(panel)
+    with metrics.span('screening'):
+        matches = evaluate_rule(rule, panel, evaluation)
+    if matches.empty:
+        return pd.DataFrame()
+
+    latest = pd.DataFrame({name: evaluation.column(name, matches) for name in LABEL_COLUMNS + list(PATTERN_COLUMNS)})
+    signal_summary = signal_labels(latest)
+
+    return pd.DataFrame({
+        'Symbol': matches,
+        'Close': latest['Close'].to_numpy(),
+        'RSI': latest['RSI'].to_numpy(),
+        'MACD_Signal': signal_summary['MACD_Signal'].to_numpy(),
+        'MA_Signal': signal_summary['MA_Signal'].to_numpy(),
+        'Patterns': describe_patterns(latest).to_numpy(),
+        'Sector': get_metadata_store().sectors(matches)
+    })
+
+def run_screen(symbols, criteria, snapshot=None, refreshed_at=None, engine=None):
+    """``screen_stocks`` through the result cache.
+
+    ``refreshed_at`` is the publish time of ``snapshot`` and keys its
+    results apart from those of other snapshots and of fetched data.
+    """
+    rule = compile_rule(criteria)
+    key = cache_key('screen', str(rule), refreshed_at if snapshot is not None else None,
+                    symbols=tuple(symbols))
+    return get_result_cache().get_or_compute(
+        key,
+        lambda: screen_stocks(symbols, rule, snapshot, engine),
+        ttl_for_interval('1d')
+    )
+
+def recommendations_key(symbols, period=RECOMMENDATION_PERIOD, interval='1d'):
+    return cache_key('recommendations', period, interval, symbols=tuple(symbols))
+
+def cached_recommendations(symbols, period=RECOMMENDATION_PERIOD, interval='1d'):
+    """The last generated recommendations for this universe, if still valid, else None."""
+    return get_result_cache().get(recommendations_key(symbols, period, interval))
+
+def generate_recommendations(symbols, period=RECOMMENDATION_PERIOD, interval='1d', progress=None, engine=None):
+    """Fetch and score ``symbols``, reusing a cached run of the same universe.
+
+    ``progress`` is called as ``progress(done, total, recommendations)`` with
+    everything scored so far after each fetched chunk. Concurrent callers for
+    the same universe share one run; only the caller running it gets the
+    chunk updates. Returns the list of ``analyze_stock``-style dicts.
+    """
+    def compute():
+        recommendations = []
+        for done, total, results in stream_recommendations(symbols, period, interval, engine=engine):
+            recommendations.extend(results)
+            if progress:
+                progress(done, total, recommendations)
+        return recommendations
+
+    return get_result_cache().get_or_compute(recommendations_key(symbols, period, interval), compute,
+                                             ttl_for_interval(interval))
+
+def filter_recommendations(recommendations, min_confidence='Low'):
+    """Frame of the recommendations at or above ``min_confidence``, best score first.
+
+    A ``sector`` column is added from the metadata store.
+    """
+    rec_df = pd.DataFrame(recommendations)
+    if rec_df.empty:
+        return rec_df
+    rec_df = rec_df[rec_df['confidence'].map(CONFIDENCE_LEVELS) >= CONFIDENCE_LEVELS[min_confidence]]
+    rec_df = rec_df.assign(sector=get_metadata_store().sectors(rec_df['symbol']))
+    return rec_df.sort_values('technical_score', ascending=False)
+
+def sector_summary(rec_df):
+    """Per-sector stock count, buy and sell counts and mean technical score, best first."""
+    recommendation = rec_df['recommendation']
+    return (
+        rec_df.assign(buy=recommendation.isin(['Buy', 'Strong Buy']), sell=recommendation.isin(['Sell', 'Strong Sell']))
+        .groupby('sector')
+        .agg(stocks=('symbol', 'size'), buy=('buy', 'sum'), sell=('sell', 'sum'),
+             mean_score=('technical_score', 'mean'))
+        .sort_values('mean_score', ascending=False)
+    )
+
+def similar_stocks(index, symbol, rec_df, k=None):
+    """The stocks moving most like ``symbol`` in a ``CorrelationIndex``, with their recommendations."""
+    similar = index.similar(symbol, k).rename_axis('symbol').reset_index()
+    return similar.merge(rec_df[['symbol', 'recommendation', 'technical_score']], on='symbol', how='left')
+
+def recommendations_table(recommendations, min_confidence='Low'):
+    """Flat ``filter_recommendations`` table for files.
+
+    The signal summary dict becomes one ``signal_*`` column per signal and
+    the reasons are added as ``basis``.
+    """
+    rec_df = filter_recommendations(recommendations, min_confidence)
+    if rec_df.empty:
+        return rec_df
+    signals = pd.DataFrame(list(rec_df['signal_summary']), index=rec_df.index)
+    signals.columns = ['signal_' + name.lower().replace(' ', '_') for name in signals.columns]
+    table = pd.concat([rec_df.drop(columns='signal_summary'), signals], axis=1)
+    table['basis'] = recommendation_basis(rec_df)
+    return table.reset_index(drop=True)
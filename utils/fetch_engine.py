@@ -0,0 +1,198 @@
+import contextvars
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+MAX_WORKERS = 8
+RATE_PER_SECOND = 4.0
+BURST = 8
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+REQUEST_TIMEOUT = 20
+
+# Substrings of provider error messages that indicate throttling
+TRANSIENT_MESSAGES = ('too many requests', 'rate limit', '429', 'timed out', 'temporarily')
+
+class TransientError(Exception):
+    """A provider failure that is worth retrying."""
+
+def is_transient(error):
+    """Whether an exception from a provider call should be retried."""
+    if isinstance(error, (TransientError, TimeoutError, ConnectionError)):
+        return True
+    message = str(error).lower()
+    return any(text in message for text in TRANSIENT_MESSAGES)
+
+class TokenBucket:
+    """Thread-safe token bucket that refills at ``rate`` tokens per second."""
+
+    def __init__(self, rate=RATE_PER_SECOND, capacity=BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available and take it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class FetchEngine:
+    """Run provider calls on a bounded thread pool with rate limiting and retries.
+
+    Every call receives a ``timeout`` keyword so the provider can abandon a
+    slow request; timeouts and throttling errors are retried with exponential
+    backoff, anything else fails immediately.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, rate=RATE_PER_SECOND, burst=BURST,
+                 max_retries=MAX_RETRIES, backoff=BACKOFF_BASE, timeout=REQUEST_TIMEOUT):
+        self.max_workers = max_workers
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.stats = {'calls': 0, 'retries': 0, 'failures': 0}
+        self.stats_lock = threading.Lock()
+
+    def _count(self, key):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def call(self, fn, *args, **kwargs):
+        """Call ``fn`` with retries, raising the last error once they run out."""
+        for attempt in range(self.max_retries + 1):
+            if self.bucket:
+                self.bucket.acquire()
+            self._count('calls')
+            try:
+                return fn(*args, timeout=self.timeout, **kwargs)
+            except Exception as e:
+                if attempt == self.max_retries or not is_transient(e):
+                    self._count('failures')
+                    raise
+                self._count('retries')
+                delay = min(BACKOFF_MAX, self.backoff * 2 ** attempt)
+                time.sleep(delay * random.uniform(0.5, 1.0))
+
+    def map(self, fn, items, *args, **kwargs):
+        """Call ``fn(item, ...)`` for every item concurrently.
+
+        Yields ``(item, result, error)`` in completion order; exactly one of
+        ``result`` and ``error`` is None.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # Each call runs in a copy of the caller's context, so its spans count toward the caller's metrics run
+            futures = {executor.submit(contextvars.copy_context().run, self.call, fn, item, *args, **kwargs): item
+                       for item in items}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
+
+_default_engine = None
+
+def get_engine():
+    """Return the process-wide engine used by the data helpers."""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = FetchEngine()
+    return _default_engine
+
+def set_engine(engine):
+    """Replace the process-wide engine, e.g. with different limits."""
+    global _default_engine
+    _default_engine = engine
+
+# pandas frequencies used for synthetic bars of each yfinance interval
+SYNTHETIC_FREQ = {'1m': 'min', '5m': '5min', '15m': '15min', '1h': 'h', '1d': 'B', '5d': '5B', '1wk': 'W-FRI', '1mo': 'BME'}
+
+def synthetic_ohlcv(bars=120, interval='1d', seed=None, end=None):
+    """Generate a random-walk OHLCV frame shaped like a yfinance download."""
+    rng = np.random.default_rng(seed)
+    freq = SYNTHETIC_FREQ.get(interval, 'B')
+    end = end if end is not None else pd.Timestamp.now(tz='Asia/Kolkata').normalize()
+    index = pd.date_range(end=end, periods=bars, freq=freq)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+    open_ = close * (1 + rng.normal(0, 0.003, bars))
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, bars)),
+        'Low': np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, bars)),
+        'Close': close,
+        'Volume': rng.integers(10_000, 1_000_000, bars).astype(float),
+    }, index=index)
+
+class MockProvider:
+    """Offline stand-in for the chunk download provider.
+
+    ``latency`` seconds (plus up to ``jitter``) are spent per call, and each
+    call fails with probability ``failure_rate``; ``transient`` controls whether
+    those failures look like throttling (retried) or hard errors.
+    """
+
+    def __init__(self, latency=0.05, jitter=0.0, failure_rate=0.0, transient=True, bars=120, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.transient = transient
+        self.bars = bars
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, symbols, period='1y', interval='1d', timeout=None):
+        with self.lock:
+            self.calls += 1
+            delay = self.latency + self.rng.uniform(0, self.jitter)
+            failed = self.rng.random() < self.failure_rate
+
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"Request timed out after {timeout}s")
+        time.sleep(delay)
+        if failed:
+            if self.transient:
+                raise TransientError("Too Many Requests")
+            raise ValueError("Mock provider failure")
+
+        return {symbol: synthetic_ohlcv(self.bars, interval, seed=zlib.crc32(symbol.encode())) for symbol in symbols}
+
+def benchmark(symbols, engine=None, provider=None, chunk_size=10):
+    """Time a bulk fetch of ``symbols`` through an engine and mock provider."""
+    from utils.stock_data import get_stock_data_bulk
+
+    engine = engine or FetchEngine()
+    provider = provider or MockProvider()
+    start = time.perf_counter()
+    data, errors = get_stock_data_bulk(symbols, chunk_size=chunk_size, provider=provider,
+                                       use_cache=False, engine=engine)
+    elapsed = time.perf_counter() - start
+    return {
+        'symbols': len(symbols),
+        'fetched': len(data),
+        'errors': len(errors),
+        'seconds': round(elapsed, 3),
+        'symbols_per_second': round(len(symbols) / elapsed, 1) if elapsed else None,
+        **engine.stats,
+    }
+
+if __name__ == "__main__":
+    symbols = [f"SYM{i}" for i in range(216)]
+    print(benchmark(symbols, provider=MockProvider(latency=0.2, jitter=0.1, failure_rate=0.1)))
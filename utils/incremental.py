@@ -0,0 +1,244 @@
+import math
+from collections import deque
+
+NAN = float('nan')
+
+class RunningEMA:
+    """EMA updated one value at a time, as ``ewm(span=period, adjust=False)``.
+
+    ``alpha`` can be given instead of the span (Wilder smoothing is
+    ``1/period``). A NaN is a missing bar: the average is held and, as in
+    pandas, the old value's weight keeps decaying until the next value.
+    """
+
+    def __init__(self, period=20, value=None, alpha=None, weight=1.0):
+        self.period = period
+        self.alpha = 2.0 / (period + 1.0) if alpha is None else alpha
+        self.value = value
+        self.weight = weight
+
+    def update(self, x):
+        if self.value is None:
+            if math.isnan(x):
+                return NAN
+            self.value = x
+            return self.value
+        self.weight *= 1.0 - self.alpha
+        if not math.isnan(x):
+            self.value = (self.weight * self.value + self.alpha * x) / (self.weight + self.alpha)
+            self.weight = 1.0
+        return self.value
+
+    def to_dict(self):
+        return {'period': self.period, 'value': self.value, 'alpha': self.alpha, 'weight': self.weight}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(**state)
+
+class RunningWindow:
+    """Rolling mean and sample standard deviation over the last ``period`` values.
+
+    Keeps the window, its sum and its sum of squared deviations (updated with
+    Welford's add/remove steps so large prices don't lose precision). A NaN
+    is a missing value: both statistics are NaN until it leaves the window.
+    """
+
+    def __init__(self, period=20, values=(), total=0.0, mean=0.0, m2=0.0):
+        self.period = period
+        self.values = deque(values, maxlen=period)
+        self.count = sum(not math.isnan(value) for value in self.values)
+        self.total = total
+        self.mean = mean
+        self.m2 = m2
+
+    def _add(self, x):
+        self.count += 1
+        self.total += x
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    def _remove(self, x):
+        self.count -= 1
+        self.total -= x
+        if not self.count:
+            self.total = self.mean = self.m2 = 0.0
+            return
+        old_mean = self.mean
+        self.mean -= (x - old_mean) / self.count
+        self.m2 -= (x - old_mean) * (x - self.mean)
+
+    def update(self, x):
+        old = self.values[0] if len(self.values) == self.period else NAN
+        self.values.append(x)
+        if math.isnan(old):
+            if not math.isnan(x):
+                self._add(x)
+        elif math.isnan(x):
+            self._remove(old)
+        else:
+            self.total += x - old
+            old_mean = self.mean
+            self.mean += (x - old) / self.count
+            self.m2 += (x - old) * (x - self.mean + old - old_mean)
+        return self.sma
+
+    @property
+    def full(self):
+        return self.count == self.period
+
+    @property
+    def sma(self):
+        return self.total / self.period if self.full else NAN
+
+    @property
+    def std(self):
+        if not self.full or self.period < 2:
+            return NAN
+        return math.sqrt(max(self.m2, 0.0) / (self.period - 1))
+
+    def to_dict(self):
+        return {'period': self.period, 'values': list(self.values),
+                'total': self.total, 'mean': self.mean, 'm2': self.m2}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(**state)
+
+class RunningRSI:
+    """RSI from gains and losses since the previous close.
+
+    ``smoothing='sma'`` keeps rolling sums and matches ``calculate_rsi``;
+    ``smoothing='wilder'`` uses Wilder's recursive averages instead. NaN
+    closes are missing bars, handled as ``kernels.rsi`` does.
+    """
+
+    def __init__(self, period=14, smoothing='sma', prev=None, gains=(), losses=(),
+                 avg_gain=None, avg_loss=None, count=0):
+        if smoothing not in ('sma', 'wilder'):
+            raise ValueError(f"Unknown RSI smoothing: {smoothing}")
+        self.period = period
+        self.smoothing = smoothing
+        self.prev = prev
+        self.gains = RunningWindow(period, **gains) if isinstance(gains, dict) else RunningWindow(period)
+        self.losses = RunningWindow(period, **losses) if isinstance(losses, dict) else RunningWindow(period)
+        self.avg_gain = RunningEMA.from_dict(avg_gain) if avg_gain else RunningEMA(period, alpha=1.0 / period)
+        self.avg_loss = RunningEMA.from_dict(avg_loss) if avg_loss else RunningEMA(period, alpha=1.0 / period)
+        self.count = count
+        self.value = NAN
+
+    def update(self, x):
+        delta = NAN if self.prev is None else x - self.prev
+        self.prev = x
+
+        if self.smoothing == 'sma':
+            # A listed bar without a previous close counts as a zero gain and loss
+            if math.isnan(x):
+                gain = loss = NAN
+            elif math.isnan(delta):
+                gain = loss = 0.0
+            else:
+                gain, loss = max(delta, 0.0), max(-delta, 0.0)
+            self.gains.update(gain)
+            self.losses.update(loss)
+            avg_gain, avg_loss = self.gains.sma, self.losses.sma
+        else:
+            if math.isnan(delta):
+                avg_gain, avg_loss = self.avg_gain.update(NAN), self.avg_loss.update(NAN)
+            else:
+                self.count += 1
+                avg_gain, avg_loss = self.avg_gain.update(max(delta, 0.0)), self.avg_loss.update(max(-delta, 0.0))
+            if self.count < self.period:
+                return NAN
+
+        self.value = _rsi(avg_gain, avg_loss)
+        return self.value
+
+    def to_dict(self):
+        state = {'period': self.period, 'smoothing': self.smoothing, 'prev': self.prev}
+        if self.smoothing == 'sma':
+            state['gains'] = {k: v for k, v in self.gains.to_dict().items() if k != 'period'}
+            state['losses'] = {k: v for k, v in self.losses.to_dict().items() if k != 'period'}
+        else:
+            state.update(avg_gain=self.avg_gain.to_dict(), avg_loss=self.avg_loss.to_dict(), count=self.count)
+        return state
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(**state)
+
+def _rsi(avg_gain, avg_loss):
+    if math.isnan(avg_gain) or math.isnan(avg_loss):
+        return NAN
+    if avg_loss == 0:
+        return 100.0 if avg_gain > 0 else NAN
+    return 100 - (100 / (1 + avg_gain / avg_loss))
+
+class RunningMACD:
+    """MACD line, signal and histogram built from two EMAs and a signal EMA."""
+
+    def __init__(self, fast=None, slow=None, signal=None):
+        self.fast = RunningEMA.from_dict(fast) if fast else RunningEMA(12)
+        self.slow = RunningEMA.from_dict(slow) if slow else RunningEMA(26)
+        self.signal = RunningEMA.from_dict(signal) if signal else RunningEMA(9)
+
+    def update(self, x):
+        macd = self.fast.update(x) - self.slow.update(x)
+        signal = self.signal.update(macd)
+        return macd, signal, macd - signal
+
+    def to_dict(self):
+        return {'fast': self.fast.to_dict(), 'slow': self.slow.to_dict(), 'signal': self.signal.to_dict()}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(**state)
+
+class IndicatorState:
+    """Incremental version of ``add_indicators`` for one symbol.
+
+    ``update(bar)`` takes a mapping with a ``Close`` value and returns the
+    indicator columns for that bar in O(1). A NaN close is a missing bar and
+    gives the values ``add_indicators`` has at a gap.
+    """
+
+    def __init__(self, sma=None, ema=None, rsi=None, macd=None, rsi_smoothing='sma'):
+        self.sma = RunningWindow.from_dict(sma) if sma else RunningWindow(20)
+        self.ema = RunningEMA.from_dict(ema) if ema else RunningEMA(20)
+        self.rsi = RunningRSI.from_dict(rsi) if rsi else RunningRSI(14, smoothing=rsi_smoothing)
+        self.macd = RunningMACD.from_dict(macd) if macd else RunningMACD()
+
+    def update(self, bar):
+        close = float(bar['Close'])
+        sma = self.sma.update(close)
+        std = self.sma.std
+        macd, signal, hist = self.macd.update(close)
+        return {
+            'SMA_20': sma,
+            'EMA_20': self.ema.update(close),
+            'RSI': self.rsi.update(close),
+            'MACD': macd,
+            'MACD_Signal': signal,
+            'MACD_Hist': hist,
+            'BB_Upper': sma + std * 2,
+            'BB_Middle': sma,
+            'BB_Lower': sma - std * 2,
+        }
+
+    @classmethod
+    def from_history(cls, df, rsi_smoothing='sma'):
+        """Seed the state by replaying a historical OHLCV frame."""
+        state = cls(rsi_smoothing=rsi_smoothing)
+        for close in df['Close'].to_numpy(dtype=float):
+            state.update({'Close': close})
+        return state
+
+    def to_dict(self):
+        """JSON-serialisable state, restored with ``from_dict``."""
+        return {'sma': self.sma.to_dict(), 'ema': self.ema.to_dict(),
+                'rsi': self.rsi.to_dict(), 'macd': self.macd.to_dict()}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(**state)
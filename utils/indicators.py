@@ -1,24 +1,71 @@
+import os
 import pandas as pd
 import numpy as np
+from utils import kernels
+from utils.metrics import timed
 
-def calculate_sma(data, period=20):
+# 'numpy' computes indicators with the utils.kernels arrays, 'pandas' with rolling/ewm objects
+BACKENDS = ('numpy', 'pandas')
+BACKEND = os.environ.get('NSE_INDICATOR_BACKEND', 'numpy')
+
+def _use_kernels(backend):
+    backend = backend or BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown indicator backend: {backend}")
+    return backend == 'numpy'
+
+def _like(values, data):
+    """Wrap a kernel result in the Series or DataFrame shape of ``data``."""
+    if isinstance(data, pd.DataFrame):
+        return pd.DataFrame(values, index=data.index, columns=data.columns)
+    return pd.Series(values, index=data.index, name=data.name)
+
+def calculate_sma(data, period=20, backend=None):
     """Calculate Simple Moving Average."""
+    if _use_kernels(backend):
+        return _like(kernels.rolling_mean(data.to_numpy(dtype=float), period), data)
     return data.rolling(window=period).mean()
 
-def calculate_ema(data, period=20):
+def calculate_ema(data, period=20, backend=None):
     """Calculate Exponential Moving Average."""
+    if _use_kernels(backend):
+        return _like(kernels.ewm_mean(data.to_numpy(dtype=float), period), data)
     return data.ewm(span=period, adjust=False).mean()
 
-def calculate_rsi(data, period=14):
-    """Calculate Relative Strength Index."""
+def calculate_rsi(data, period=14, smoothing='sma', backend=None):
+    """Calculate Relative Strength Index.
+
+    ``smoothing='sma'`` averages gains and losses over a simple rolling
+    window; ``smoothing='wilder'`` uses Wilder's recursive averages.
+    """
+    if _use_kernels(backend):
+        return _like(kernels.rsi(data.to_numpy(dtype=float), period, smoothing), data)
+    if smoothing not in kernels.RSI_SMOOTHING:
+        raise ValueError(f"Unknown RSI smoothing: {smoothing}")
     delta = data.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+    if smoothing == 'sma':
+        gain = gain.rolling(window=period).mean()
+        loss = loss.rolling(window=period).mean()
+    else:
+        # The first bar has no change to average
+        gain = gain.where(delta.notna()).ewm(alpha=1 / period, adjust=False, min_periods=period).mean()
+        loss = loss.where(delta.notna()).ewm(alpha=1 / period, adjust=False, min_periods=period).mean()
     rs = gain / loss
     return 100 - (100 / (1 + rs))
 
-def calculate_macd(data):
+def calculate_macd(data, backend=None):
     """Calculate MACD."""
+    if _use_kernels(backend):
+        values = data.to_numpy(dtype=float)
+        macd = kernels.ewm_mean(values, 12) - kernels.ewm_mean(values, 26)
+        signal = kernels.ewm_mean(macd, 9)
+        return pd.DataFrame({
+            'MACD': macd,
+            'Signal': signal,
+            'Histogram': macd - signal
+        }, index=data.index)
     exp1 = data.ewm(span=12, adjust=False).mean()
     exp2 = data.ewm(span=26, adjust=False).mean()
     macd = exp1 - exp2
@@ -30,8 +77,17 @@ def calculate_macd(data):
         'Histogram': hist
     })
 
-def calculate_bollinger_bands(data, period=20, num_std=2):
+def calculate_bollinger_bands(data, period=20, num_std=2, backend=None):
     """Calculate Bollinger Bands."""
+    if _use_kernels(backend):
+        values = data.to_numpy(dtype=float)
+        sma = kernels.rolling_mean(values, period)
+        std = kernels.rolling_std(values, period)
+        return pd.DataFrame({
+            'Upper': sma + (std * num_std),
+            'Middle': sma,
+            'Lower': sma - (std * num_std)
+        }, index=data.index)
     sma = data.rolling(window=period).mean()
     std = data.rolling(window=period).std()
     upper = sma + (std * num_std)
@@ -42,25 +98,53 @@ def calculate_bollinger_bands(data, period=20, num_std=2):
         'Lower': lower
     })
 
-def add_indicators(df):
-    """Add all technical indicators to the dataframe."""
+def indicator_arrays(close, rsi_smoothing='sma'):
+    """Every ``add_indicators`` column as NumPy arrays, for a 1-D or 2-D close array."""
+    sma = kernels.rolling_mean(close, 20)
+    std = kernels.rolling_std(close, 20)
+    macd = kernels.ewm_mean(close, 12) - kernels.ewm_mean(close, 26)
+    signal = kernels.ewm_mean(macd, 9)
+    return {
+        'SMA_20': sma,
+        'EMA_20': kernels.ewm_mean(close, 20),
+        'RSI': kernels.rsi(close, 14, rsi_smoothing),
+        'MACD': macd,
+        'MACD_Signal': signal,
+        'MACD_Hist': macd - signal,
+        'BB_Upper': sma + std * 2,
+        'BB_Middle': sma,
+        'BB_Lower': sma - std * 2,
+    }
+
+@timed('indicators')
+def add_indicators(df, rsi_smoothing='sma', backend=None):
+    """Add all technical indicators to the dataframe.
+
+    ``backend`` ('numpy' or 'pandas') defaults to ``NSE_INDICATOR_BACKEND``.
+    """
+    if _use_kernels(backend):
+        # Joining all columns at once costs far less than inserting them one by one
+        columns = indicator_arrays(df['Close'].to_numpy(dtype=float), rsi_smoothing)
+        df = df.drop(columns=[name for name in columns if name in df.columns])
+        return pd.concat([df, pd.DataFrame(columns, index=df.index)], axis=1)
+
     df = df.copy()
 
     # Calculate indicators
-    df['SMA_20'] = calculate_sma(df['Close'], 20)
-    df['EMA_20'] = calculate_ema(df['Close'], 20)
-    df['RSI'] = calculate_rsi(df['Close'])
+    df['SMA_20'] = calculate_sma(df['Close'], 20, backend=backend)
+    df['EMA_20'] = calculate_ema(df['Close'], 20, backend=backend)
+    df['RSI'] = calculate_rsi(df['Close'], smoothing=rsi_smoothing, backend=backend)
 
     # MACD
-    macd_data = calculate_macd(df['Close'])
+    macd_data = calculate_macd(df['Close'], backend=backend)
     df['MACD'] = macd_data['MACD']
     df['MACD_Signal'] = macd_data['Signal']
     df['MACD_Hist'] = macd_data['Histogram']
 
     # Bollinger Bands
-    bbands = calculate_bollinger_bands(df['Close'])
+    bbands = calculate_bollinger_bands(df['Close'], backend=backend)
     df['BB_Upper'] = bbands['Upper']
     df['BB_Middle'] = bbands['Middle']
     df['BB_Lower'] = bbands['Lower']
 
-    return df
\ No newline at end of file
+    return df
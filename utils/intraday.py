@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+
+from utils import ohlcv_cache
+from utils.market_hours import IST, SESSION_OPEN, SESSION_CLOSE, is_trading_day
+from utils.result_cache import get_result_cache, ttl_for_interval
+from utils.stock_data import get_stock_data
+
+INTRADAY_INTERVALS = ('1m', '5m', '15m', '1h')
+INTERVAL_MINUTES = {'1m': 1, '5m': 5, '15m': 15, '1h': 60}
+# Levels fetched from the provider, finest first, with the period fetched for each.
+# Yahoo keeps 1m bars for 7 days and 5m bars for 60 days.
+BASE_LEVELS = (('1m', '5d'), ('5m', '1mo'), ('1h', '2y'))
+PERIOD_ORDER = tuple(ohlcv_cache.PERIOD_OFFSETS)
+# Bins start at the session open, so 1h bars run 09:15, 10:15, ..., 15:15
+SESSION_ORIGIN = pd.Timestamp(f"2000-01-03 {SESSION_OPEN:%H:%M}", tz=IST)
+# Shortest period that still holds two bars of each daily-or-longer interval
+DAILY_INTERVALS = {'1d': '5d', '5d': '1mo', '1wk': '1mo', '1mo': '3mo'}
+AGGREGATION = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+def base_level(interval, period):
+    """Return ``(base_interval, base_period)`` to fetch for an intraday request, or None.
+
+    The finest level that divides ``interval`` and whose fetched period still
+    reaches back over ``period`` is used, so nearby timeframes share one fetch.
+    """
+    for base, base_period in BASE_LEVELS:
+        if INTERVAL_MINUTES[interval] % INTERVAL_MINUTES[base]:
+            continue
+        if period in PERIOD_ORDER and PERIOD_ORDER.index(period) <= PERIOD_ORDER.index(base_period):
+            return base, base_period
+    return None
+
+def timeframe_intervals(period):
+    """Intervals that can be charted over ``period``, intraday ones first."""
+    intraday = [interval for interval in INTRADAY_INTERVALS if base_level(interval, period)]
+    longer = [interval for interval, shortest in DAILY_INTERVALS.items()
+              if PERIOD_ORDER.index(period) >= PERIOD_ORDER.index(shortest)]
+    return intraday + longer
+
+def session_bars(df):
+    """Keep the bars inside NSE session hours, with the index in IST."""
+    index = df.index.tz_localize(IST) if df.index.tz is None else df.index.tz_convert(IST)
+    df = df.set_axis(index)
+    times = index.time
+    return df[(times >= SESSION_OPEN) & (times < SESSION_CLOSE)]
+
+def resample_session(df, interval):
+    """Aggregate finer OHLCV bars into ``interval`` bars aligned to the session open.
+
+    Bars are labelled by their start time, as Yahoo labels intraday bars, and
+    intervals with no trades are dropped. The last bar of a session may be
+    shorter (15:15-15:30 for 1h).
+    """
+    df = session_bars(df[list(AGGREGATION)])
+    rule = f"{INTERVAL_MINUTES[interval]}min"
+    bars = df.resample(rule, origin=SESSION_ORIGIN, label='left', closed='left').agg(AGGREGATION)
+    return bars[bars['Open'].notna()]
+
+def get_intraday_data(symbol, period='5d', interval='5m'):
+    """Fetch intraday bars, resampling locally from the finest cached level.
+
+    The base level is fetched once per symbol (through ``get_stock_data``,
+    so it is cached on disk and in memory) and coarser intervals are built
+    from it, so switching between intraday timeframes needs no new request.
+    Returns ``(df, error)`` like ``get_stock_data``.
+    """
+    level = base_level(interval, period)
+    if level is None:
+        return None, f"{interval} bars are not available for a {period} period"
+    base, base_period = level
+
+    df, error = get_stock_data(symbol, base_period, base)
+    if error:
+        return None, error
+
+    if interval != base:
+        key = ('resampled', symbol, base, base_period, interval, len(df), df.index[-1])
+        df = get_result_cache().get_or_compute(key, lambda: resample_session(df, interval),
+                                               ttl_for_interval(interval))
+    # The base period reaches further back than ``period``
+    df = ohlcv_cache.slice_period(df, period)
+    if df.empty:
+        return None, "No data available for this symbol"
+    return df, None
+
+def synthetic_session_ohlcv(days=5, interval='1m', seed=None, end=None):
+    """Random-walk intraday bars over ``days`` trading sessions, for offline checks."""
+    rng = np.random.default_rng(seed)
+    end = (end or pd.Timestamp.now(tz=IST)).normalize()
+    sessions = []
+    day = end
+    while len(sessions) < days:
+        if is_trading_day(day.date()):
+            sessions.append(day)
+        day -= pd.Timedelta(days=1)
+
+    step = pd.Timedelta(minutes=INTERVAL_MINUTES[interval])
+    opening = pd.Timedelta(hours=SESSION_OPEN.hour, minutes=SESSION_OPEN.minute)
+    closing = pd.Timedelta(hours=SESSION_CLOSE.hour, minutes=SESSION_CLOSE.minute)
+    ranges = [pd.date_range(session + opening, session + closing - step, freq=step) for session in reversed(sessions)]
+    index = ranges[0].append(ranges[1:])
+    bars = len(index)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, bars)))
+    open_ = close * (1 + rng.normal(0, 0.0005, bars))
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) * (1 + rng.uniform(0, 0.001, bars)),
+        'Low': np.minimum(open_, close) * (1 - rng.uniform(0, 0.001, bars)),
+        'Close': close,
+        'Volume': rng.integers(100, 10_000, bars).astype(float),
+    }, index=index)
+
+def compare_with_direct(resampled, direct, rtol=1e-6):
+    """Compare locally resampled bars with directly fetched ones.
+
+    Returns a dict with the number of common bars, bars only on either
+    side, and bars whose OHLC (relative ``rtol``) or volume differ.
+    """
+    common = resampled.index.intersection(direct.index)
+    left = resampled.loc[common, list(AGGREGATION)].to_numpy(dtype=float)
+    right = direct.loc[common, list(AGGREGATION)].to_numpy(dtype=float)
+    mismatched = ~np.isclose(left, right, rtol=rtol, equal_nan=True).all(axis=1)
+    return {
+        'common': len(common),
+        'only_resampled': len(resampled.index.difference(direct.index)),
+        'only_direct': len(direct.index.difference(resampled.index)),
+        'mismatched': int(mismatched.sum()),
+        'mismatched_at': list(common[mismatched][:10]),
+    }
+
+if __name__ == "__main__":
+    import sys
+
+    # Compare local resampling with the provider's own bars for a symbol
+    symbol = sys.argv[1] if len(sys.argv) > 1 else 'RELIANCE'
+    for interval in ('5m', '15m', '1h'):
+        resampled, error = get_intraday_data(symbol, '5d', interval)
+        direct, direct_error = get_stock_data(symbol, '5d', interval, use_cache=False)
+        if error or direct_error:
+            print(interval, error or direct_error)
+            continue
+        print(interval, compare_with_direct(resampled, session_bars(direct)))
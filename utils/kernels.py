@@ -0,0 +1,175 @@
+"""Pure NumPy indicator kernels.
+
+Every kernel works along axis 0 of a 1-D series or a 2-D (time x symbol)
+array and treats NaN as a missing bar, like the pandas ``rolling`` and
+``ewm`` calls in ``utils.indicators`` they replace::
+
+    python -m utils.kernels    # microbenchmarks
+"""
+import time
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+RSI_SMOOTHING = ('sma', 'wilder')
+# Largest rescaling exponent used by the closed-form EMA; exp(300) is far below float64 overflow
+MAX_LOG_SCALE = 300.0
+
+def rolling_mean(values, window):
+    """Rolling mean along axis 0, NaN until ``window`` valid values are in the window."""
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    sums = np.cumsum(np.where(valid, values, 0.0), axis=0)
+    counts = np.cumsum(valid, axis=0)
+    sums[window:] = sums[window:] - sums[:-window]
+    counts[window:] = counts[window:] - counts[:-window]
+    out = np.full(values.shape, np.nan)
+    full = counts == window
+    out[full] = sums[full] / window
+    return out
+
+def rolling_std(values, window):
+    """Rolling sample standard deviation along axis 0."""
+    values = np.asarray(values, dtype=float)
+    out = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        windows = sliding_window_view(values, window, axis=0)
+        out[window - 1:] = windows.std(axis=-1, ddof=1)
+    return out
+
+def rolling_max(values, window):
+    """Rolling maximum along axis 0, NaN unless all ``window`` values are present."""
+    values = np.asarray(values, dtype=float)
+    out = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        out[window - 1:] = sliding_window_view(values, window, axis=0).max(axis=-1)
+    return out
+
+def rolling_min(values, window):
+    """Rolling minimum along axis 0, NaN unless all ``window`` values are present."""
+    values = np.asarray(values, dtype=float)
+    out = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        out[window - 1:] = sliding_window_view(values, window, axis=0).min(axis=-1)
+    return out
+
+def _ewm_closed_form(values, alpha, start):
+    """EMA of columns with no missing bars after ``start``, a block of rows at a time.
+
+    Within a block y[j] = r**(j+1) * (y_before + sum(a * x[i] / r**(i+1))), with
+    r = 1 - alpha, so each block is one cumulative sum. Blocks are short
+    enough that r**-(j+1) stays finite. A column's first value enters with
+    weight 1 instead of alpha, which seeds the average with it.
+    """
+    decay = 1.0 - alpha
+    if decay == 0.0:
+        return np.where(np.arange(len(values))[:, None] >= start, values, np.nan)
+    block = max(1, int(MAX_LOG_SCALE / -np.log(decay)))
+    terms = np.where(np.isnan(values), 0.0, values) * alpha
+    cols = np.flatnonzero(start < len(values))
+    terms[start[cols], cols] /= alpha
+
+    out = np.empty(values.shape)
+    state = np.zeros(values.shape[1])
+    for first in range(0, len(values), block):
+        growth = decay ** -np.arange(1.0, min(block, len(values) - first) + 1.0)
+        rows = slice(first, first + len(growth))
+        out[rows] = (state + np.cumsum(terms[rows] * growth[:, None], axis=0)) / growth[:, None]
+        state = out[rows.stop - 1]
+    return out
+
+def _ewm_recursive(values, alpha):
+    """Row-by-row EMA that decays over missing bars, as pandas does with ``ignore_na=False``."""
+    out = np.empty(values.shape)
+    weighted = np.full(values.shape[1:], np.nan)
+    old_wt = np.ones(values.shape[1:])
+    for i, row in enumerate(values):
+        observed = ~np.isnan(row)
+        started = ~np.isnan(weighted)
+        old_wt = np.where(started, old_wt * (1.0 - alpha), old_wt)
+        update = started & observed
+        weighted = np.where(update, (old_wt * weighted + alpha * row) / (old_wt + alpha), weighted)
+        old_wt = np.where(update, 1.0, old_wt)
+        weighted = np.where(~started & observed, row, weighted)
+        out[i] = weighted
+    return out
+
+def ewm_mean(values, span=None, alpha=None, min_periods=0):
+    """Recursive EMA along axis 0, matching ``ewm(span=span, adjust=False).mean()``.
+
+    ``alpha`` can be given instead of ``span`` (Wilder smoothing is
+    ``alpha=1/period``), and values are NaN until ``min_periods`` bars have
+    been observed. Columns without gaps after their first bar use a blocked
+    closed form; the others fall back to a row-by-row recurrence.
+    """
+    values = np.asarray(values, dtype=float)
+    alpha = 2.0 / (span + 1.0) if alpha is None else alpha
+    flat = values.ndim == 1
+    values = values.reshape(len(values), -1)
+
+    valid = ~np.isnan(values)
+    rows = np.arange(len(values))[:, None]
+    start = np.where(valid.any(axis=0), np.argmax(valid, axis=0), len(values))
+    gapped = (~valid & (rows > start)).any(axis=0)
+
+    out = _ewm_closed_form(values, alpha, start)
+    out[rows < start] = np.nan
+    if gapped.any():
+        out[:, gapped] = _ewm_recursive(values[:, gapped], alpha)
+    if min_periods > 1:
+        out[np.cumsum(valid, axis=0) < min_periods] = np.nan
+    return out[:, 0] if flat else out
+
+def rsi(values, period=14, smoothing='sma'):
+    """RSI along axis 0.
+
+    ``smoothing='sma'`` averages gains and losses with simple rolling means,
+    as ``calculate_rsi`` always did, counting the first bar as no change.
+    ``smoothing='wilder'`` uses Wilder's recursive averages (alpha 1/period)
+    from the first change, NaN until ``period`` changes are seen.
+    """
+    if smoothing not in RSI_SMOOTHING:
+        raise ValueError(f"Unknown RSI smoothing: {smoothing}")
+    values = np.asarray(values, dtype=float)
+    delta = np.full(values.shape, np.nan)
+    delta[1:] = values[1:] - values[:-1]
+    if smoothing == 'sma':
+        listed = ~np.isnan(values)
+        gain = np.where(listed, np.where(delta > 0, delta, 0.0), np.nan)
+        loss = np.where(listed, np.where(delta < 0, -delta, 0.0), np.nan)
+        average = lambda x: rolling_mean(x, period)
+    else:
+        gain = np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0))
+        loss = np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0))
+        average = lambda x: ewm_mean(x, alpha=1.0 / period, min_periods=period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = average(gain) / average(loss)
+        return 100 - (100 / (1 + rs))
+
+def benchmark(symbols=216, bars=63, repeat=3):
+    """Time ``add_indicators`` per symbol with each backend and the kernels on one panel."""
+    from utils.fetch_engine import synthetic_ohlcv
+    from utils.indicators import BACKENDS, add_indicators
+
+    data = [synthetic_ohlcv(bars, seed=i) for i in range(symbols)]
+    results = {'symbols': symbols, 'bars': bars}
+    for backend in BACKENDS:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for df in data:
+                add_indicators(df, backend=backend)
+        results[f"add_indicators_{backend}_seconds"] = round((time.perf_counter() - start) / repeat, 4)
+
+    close = np.column_stack([df['Close'].to_numpy() for df in data])
+    start = time.perf_counter()
+    for _ in range(repeat):
+        rolling_mean(close, 20)
+        rolling_std(close, 20)
+        ewm_mean(close, 12)
+        ewm_mean(close, 26)
+        rsi(close)
+    results['panel_kernels_seconds'] = round((time.perf_counter() - start) / repeat, 4)
+    return results
+
+if __name__ == "__main__":
+    for symbols, bars in [(216, 63), (216, 250)]:
+        print(benchmark(symbols, bars))
@@ -0,0 +1,555 @@
+"""Live tick ingestion, session-aligned bar aggregation and signal alerts.
+
+Ticks arrive in batches from a source (``ReplaySource`` for recorded or
+synthetic ticks, ``QueueSource`` as the hand-off point for a websocket
+client). ``LiveEngine`` folds each batch into the current bar of every
+symbol, updates the ``add_indicators`` columns for the symbols it touched
+as if the bar closed at their latest price, and puts an alert on an
+``AlertQueue`` whenever a ``utils.signals`` condition switches on (RSI
+oversold, price above the upper Bollinger band, ...). All per-symbol state
+lives in arrays over the universe, so a batch costs a handful of NumPy
+operations whatever its size. Measure it with the load generator::
+
+    python -m utils.live --symbols 2000 --rate 5000 --seconds 10
+"""
+import argparse
+import queue
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from utils import metrics
+from utils.intraday import INTERVAL_MINUTES
+from utils.market_hours import IST, SESSION_CLOSE, SESSION_OPEN
+from utils.signals import NEUTRAL, SIGNAL_COLUMNS, SIGNAL_LABELS, signal_code_arrays
+
+MINUTE_NS = 60 * 10**9
+DAY_NS = 24 * 60 * MINUTE_NS
+# IST has no daylight saving, so session times are a fixed offset from UTC
+IST_OFFSET_NS = (5 * 60 + 30) * MINUTE_NS
+OPEN_MINUTE = SESSION_OPEN.hour * 60 + SESSION_OPEN.minute
+CLOSE_MINUTE = SESSION_CLOSE.hour * 60 + SESSION_CLOSE.minute
+ALERT_QUEUE_SIZE = 10_000
+# A signal that flickers on and off alerts at most once per bar, and not again within this many seconds
+DEDUP_SECONDS = 15 * 60
+
+TickBatch = namedtuple('TickBatch', 'stamps symbols prices volumes received')
+TickBatch.__doc__ = """Ticks in time order: UTC epoch-ns ``stamps``, ``symbols`` (names or
+universe positions), ``prices`` and ``volumes``, plus the ``time.monotonic()``
+at which the batch was received, for latency measurements."""
+
+class SessionClock:
+    """Maps tick times to bars of ``interval`` aligned to the NSE session open.
+
+    Bar ids increase with time and are -1 outside session hours. The last
+    bar of a session may be shorter (15:15-15:30 for 1h).
+    """
+
+    def __init__(self, interval='1m'):
+        self.minutes = INTERVAL_MINUTES[interval]
+        self.slots = -(-(CLOSE_MINUTE - OPEN_MINUTE) // self.minutes)
+
+    def bar_ids(self, stamps):
+        local = np.asarray(stamps, dtype=np.int64) + IST_OFFSET_NS
+        day, minute = np.divmod(local, DAY_NS)
+        minute //= MINUTE_NS
+        in_session = (minute >= OPEN_MINUTE) & (minute < CLOSE_MINUTE)
+        return np.where(in_session, day * self.slots + (minute - OPEN_MINUTE) // self.minutes, -1)
+
+    def bar_start(self, bar_ids):
+        day, slot = np.divmod(np.asarray(bar_ids, dtype=np.int64), self.slots)
+        return day * DAY_NS + (OPEN_MINUTE + slot * self.minutes) * MINUTE_NS - IST_OFFSET_NS
+
+    def bar_end(self, bar_ids):
+        day, slot = np.divmod(np.asarray(bar_ids, dtype=np.int64), self.slots)
+        minute = np.minimum(OPEN_MINUTE + (slot + 1) * self.minutes, CLOSE_MINUTE)
+        return day * DAY_NS + minute * MINUTE_NS - IST_OFFSET_NS
+
+class UniverseIndicators:
+    """``IndicatorState`` for a whole universe at once, one array slot per symbol.
+
+    ``preview`` gives the indicator columns the given symbols would have if
+    their current bar closed at ``close``; ``commit`` makes that bar part
+    of the history. Values match ``IndicatorState`` (and so ``add_indicators``).
+    """
+
+    def __init__(self, size, rsi_smoothing='sma', period=20, rsi_period=14):
+        self.rsi_smoothing = rsi_smoothing
+        self.rsi_period = rsi_period
+        self.window = np.zeros((size, period))
+        self.count = np.zeros(size, dtype=np.int64)
+        self.last_close = np.full(size, np.nan)
+        self.ema = {span: np.full(size, np.nan) for span in (12, 20, 26)}
+        self.macd_signal = np.full(size, np.nan)
+        self.gains = np.zeros((size, rsi_period))
+        self.losses = np.zeros((size, rsi_period))
+        self.avg_gain = np.zeros(size)
+        self.avg_loss = np.zeros(size)
+        self.changes = np.zeros(size, dtype=np.int64)
+
+    @staticmethod
+    def _ema(previous, x, span):
+        return np.where(np.isnan(previous), x, previous + 2.0 / (span + 1.0) * (x - previous))
+
+    def _step(self, idx, close):
+        """Indicators and the state after one more bar closing at ``close``, for symbols ``idx``."""
+        period = self.window.shape[1]
+        window = np.concatenate([self.window[idx, 1:], close[:, None]], axis=1)
+        count = self.count[idx] + 1
+        full = count >= period
+        sma = np.where(full, window.mean(axis=1), np.nan)
+        std = np.where(full, window.std(axis=1, ddof=1), np.nan)
+
+        ema = {span: self._ema(self.ema[span][idx], close, span) for span in self.ema}
+        macd = ema[12] - ema[26]
+        macd_signal = self._ema(self.macd_signal[idx], macd, 9)
+
+        delta = close - self.last_close[idx]
+        changed = ~np.isnan(delta)
+        gain = np.where(changed & (delta > 0), delta, 0.0)
+        loss = np.where(changed & (delta < 0), -delta, 0.0)
+        gains = np.concatenate([self.gains[idx, 1:], gain[:, None]], axis=1)
+        losses = np.concatenate([self.losses[idx, 1:], loss[:, None]], axis=1)
+        changes = self.changes[idx] + changed
+        if self.rsi_smoothing == 'sma':
+            # The first bar counts as a zero change, as in calculate_rsi
+            ready = count >= self.rsi_period
+            avg_gain, avg_loss = gains.mean(axis=1), losses.mean(axis=1)
+        else:
+            first = changes == 1
+            avg_gain = np.where(first, gain, self.avg_gain[idx] + (gain - self.avg_gain[idx]) / self.rsi_period)
+            avg_loss = np.where(first, loss, self.avg_loss[idx] + (loss - self.avg_loss[idx]) / self.rsi_period)
+            avg_gain = np.where(changed, avg_gain, self.avg_gain[idx])
+            avg_loss = np.where(changed, avg_loss, self.avg_loss[idx])
+            ready = changes >= self.rsi_period
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = np.where(ready, 100 - 100 / (1 + avg_gain / avg_loss), np.nan)
+
+        columns = {
+            'Close': close,
+            'SMA_20': sma,
+            'EMA_20': ema[20],
+            'RSI': rsi,
+            'MACD': macd,
+            'MACD_Signal': macd_signal,
+            'MACD_Hist': macd - macd_signal,
+            'BB_Upper': sma + std * 2,
+            'BB_Middle': sma,
+            'BB_Lower': sma - std * 2,
+        }
+        state = {'window': window, 'count': count, 'last_close': close, 'ema': ema, 'macd_signal': macd_signal,
+                 'gains': gains, 'losses': losses, 'avg_gain': avg_gain, 'avg_loss': avg_loss, 'changes': changes}
+        return columns, state
+
+    def preview(self, idx, close):
+        return self._step(idx, close)[0]
+
+    def commit(self, idx, close):
+        """Close one bar at ``close`` for symbols ``idx`` and return its indicator columns."""
+        columns, state = self._step(idx, close)
+        self.window[idx] = state['window']
+        self.count[idx] = state['count']
+        self.last_close[idx] = close
+        for span, values in state['ema'].items():
+            self.ema[span][idx] = values
+        self.macd_signal[idx] = state['macd_signal']
+        self.gains[idx] = state['gains']
+        self.losses[idx] = state['losses']
+        self.avg_gain[idx] = state['avg_gain']
+        self.avg_loss[idx] = state['avg_loss']
+        self.changes[idx] = state['changes']
+        return columns
+
+class AlertQueue:
+    """Bounded, deduplicated queue of alert dicts.
+
+    An alert whose ``key`` was queued within ``dedup_seconds`` is dropped
+    as a duplicate. When the queue is full the oldest alert is discarded,
+    so a slow consumer never stalls ingestion.
+    """
+
+    def __init__(self, maxsize=ALERT_QUEUE_SIZE, dedup_seconds=DEDUP_SECONDS):
+        self.alerts = deque()
+        self.maxsize = maxsize
+        self.dedup_seconds = dedup_seconds
+        self.seen = OrderedDict()
+        self.ready = threading.Condition()
+        self.stats = {'queued': 0, 'duplicates': 0, 'dropped': 0}
+
+    def put(self, alert, key):
+        """Queue ``alert`` unless ``key`` is a recent duplicate; return whether it was queued."""
+        now = time.monotonic()
+        with self.ready:
+            # Keys are kept in insertion order, so expired ones are at the front
+            while self.seen and next(iter(self.seen.values())) <= now:
+                self.seen.popitem(last=False)
+            if key in self.seen:
+                self.stats['duplicates'] += 1
+                return False
+            self.seen[key] = now + self.dedup_seconds
+            if len(self.alerts) >= self.maxsize:
+                self.alerts.popleft()
+                self.stats['dropped'] += 1
+                metrics.count('live_alerts_dropped')
+            self.alerts.append(alert)
+            self.stats['queued'] += 1
+            self.ready.notify()
+        return True
+
+    def get(self, timeout=None):
+        """Remove and return the oldest alert, or None if none arrives within ``timeout``."""
+        with self.ready:
+            if not self.alerts and not self.ready.wait_for(lambda: self.alerts, timeout):
+                return None
+            return self.alerts.popleft()
+
+    def drain(self, max_items=None):
+        """Remove and return every queued alert (at most ``max_items``) without waiting."""
+        with self.ready:
+            count = len(self.alerts) if max_items is None else min(max_items, len(self.alerts))
+            return [self.alerts.popleft() for _ in range(count)]
+
+    def __len__(self):
+        return len(self.alerts)
+
+class LiveEngine:
+    """Aggregates ticks into bars and raises alerts when signals switch on.
+
+    ``symbols`` is the universe; ticks for other symbols, outside session
+    hours or for bars already closed are counted and skipped. Completed bars
+    are passed to ``on_bars`` as a DataFrame. Alerts are dicts with the
+    symbol, signal column, state label, price, bar start, tick time and the
+    seconds from receiving the tick batch to queueing the alert.
+    """
+
+    def __init__(self, symbols, interval='1m', alerts=None, on_bars=None, rsi_smoothing='sma'):
+        self.symbols = pd.Index(symbols)
+        size = len(self.symbols)
+        self.clock = SessionClock(interval)
+        self.alerts = alerts if alerts is not None else AlertQueue()
+        self.on_bars = on_bars
+        self.indicators = UniverseIndicators(size, rsi_smoothing)
+
+        self.bar_id = np.full(size, -1, dtype=np.int64)
+        self.last_bar = np.full(size, -1, dtype=np.int64)
+        self.open = np.full(size, np.nan)
+        self.high = np.full(size, np.nan)
+        self.low = np.full(size, np.nan)
+        self.close = np.full(size, np.nan)
+        self.volume = np.zeros(size)
+        self.last_tick = np.zeros(size, dtype=np.int64)
+        self.codes = np.full((size, len(SIGNAL_COLUMNS)), NEUTRAL, dtype=np.int8)
+        self.stats = {'ticks': 0, 'unknown': 0, 'outside_session': 0, 'late': 0, 'bars': 0, 'alerts': 0}
+
+    def seed(self, closes):
+        """Replay completed bars of history, a (time x symbol) DataFrame of closes.
+
+        Signals already on at the end of the history do not alert again.
+        """
+        cols = self.symbols.get_indexer(closes.columns)
+        values = closes.to_numpy(dtype=float)[:, cols >= 0]
+        cols = cols[cols >= 0]
+        for row in values:
+            listed = ~np.isnan(row)
+            if listed.any():
+                idx = cols[listed]
+                columns = self.indicators.commit(idx, row[listed])
+                self.codes[idx] = np.column_stack([signal_code_arrays(columns)[c] for c in SIGNAL_COLUMNS])
+
+    def _positions(self, symbols):
+        symbols = np.asarray(symbols)
+        if symbols.dtype.kind in 'iu':
+            return symbols.astype(np.int64)
+        return self.symbols.get_indexer(symbols)
+
+    def process(self, batch):
+        """Fold one ``TickBatch`` into the bars and queue any new alerts."""
+        start = time.perf_counter()
+        idx = self._positions(batch.symbols)
+        stamps = np.asarray(batch.stamps, dtype=np.int64)
+        prices = np.asarray(batch.prices, dtype=float)
+        volumes = np.asarray(batch.volumes, dtype=float)
+        bars = self.clock.bar_ids(stamps)
+        self.stats['ticks'] += len(idx)
+
+        known = idx >= 0
+        in_session = bars >= 0
+        keep = known & in_session
+        self.stats['unknown'] += int((~known).sum())
+        self.stats['outside_session'] += int((known & ~in_session).sum())
+        late = np.zeros(len(idx), dtype=bool)
+        late[keep] = (bars[keep] <= self.last_bar[idx[keep]]) | (bars[keep] < self.bar_id[idx[keep]])
+        self.stats['late'] += int(late.sum())
+        keep &= ~late
+        idx, stamps, prices, volumes, bars = idx[keep], stamps[keep], prices[keep], volumes[keep], bars[keep]
+
+        touched = []
+        for bar in np.unique(bars):
+            group = bars == bar
+            touched.append(self._aggregate(bar, idx[group], stamps[group], prices[group], volumes[group],
+                                           batch.received))
+        if len(stamps):
+            self.advance(stamps[-1], batch.received)
+            touched = np.unique(np.concatenate(touched))
+            # Symbols whose bar closed in advance() were evaluated on that bar's close by _commit
+            touched = touched[self.bar_id[touched] >= 0]
+            self._evaluate(touched, self.indicators.preview(touched, self.close[touched]), batch.received)
+        metrics.observe('live_batch', time.perf_counter() - start)
+
+    def _aggregate(self, bar, idx, stamps, prices, volumes, received):
+        rolling = np.unique(idx[(self.bar_id[idx] >= 0) & (self.bar_id[idx] < bar)])
+        if len(rolling):
+            self._commit(rolling, received)
+
+        symbols, first = np.unique(idx, return_index=True)
+        opening = self.bar_id[symbols] != bar
+        new = symbols[opening]
+        self.bar_id[new] = bar
+        self.open[new] = prices[first[opening]]
+        self.high[new] = -np.inf
+        self.low[new] = np.inf
+        self.volume[new] = 0.0
+        np.maximum.at(self.high, idx, prices)
+        np.minimum.at(self.low, idx, prices)
+        np.add.at(self.volume, idx, volumes)
+        reverse, last = np.unique(idx[::-1], return_index=True)
+        self.close[reverse] = prices[len(prices) - 1 - last]
+        self.last_tick[reverse] = stamps[len(stamps) - 1 - last]
+        return symbols
+
+    def advance(self, now, received=None):
+        """Close every open bar that ended at or before UTC epoch-ns ``now``.
+
+        ``received`` is the ``time.monotonic()`` latencies of alerts raised
+        on those closes are measured from.
+        """
+        open_bars = np.flatnonzero(self.bar_id >= 0)
+        ended = open_bars[self.clock.bar_end(self.bar_id[open_bars]) <= now]
+        if len(ended):
+            self._commit(ended, received)
+
+    def _commit(self, idx, received=None):
+        """Close the current bars of symbols ``idx``, alerting on signals their closes switch on."""
+        self._evaluate(idx, self.indicators.commit(idx, self.close[idx]), received)
+        if self.on_bars is not None:
+            self.on_bars(pd.DataFrame({
+                'Symbol': self.symbols[idx],
+                'Start': pd.to_datetime(self.clock.bar_start(self.bar_id[idx]), utc=True).tz_convert(IST),
+                'Open': self.open[idx],
+                'High': self.high[idx],
+                'Low': self.low[idx],
+                'Close': self.close[idx],
+                'Volume': self.volume[idx],
+            }))
+        self.last_bar[idx] = self.bar_id[idx]
+        self.bar_id[idx] = -1
+        self.stats['bars'] += len(idx)
+
+    def _evaluate(self, touched, columns, received):
+        """Queue alerts for the signals ``columns`` (of symbols ``touched``) switch on."""
+        if not len(touched):
+            return
+        codes = signal_code_arrays(columns)
+        codes = np.column_stack([codes[column] for column in SIGNAL_COLUMNS])
+        switched_on = (codes != self.codes[touched]) & (codes != NEUTRAL)
+        self.codes[touched] = codes
+
+        rows, signals = np.nonzero(switched_on)
+        if not len(rows):
+            return
+        queued_at = time.monotonic()
+        for row, signal in zip(rows.tolist(), signals.tolist()):
+            position = int(touched[row])
+            column = SIGNAL_COLUMNS[signal]
+            code = int(codes[row, signal])
+            bar = int(self.bar_id[position])
+            alert = {
+                'symbol': self.symbols[position],
+                'signal': column,
+                'state': SIGNAL_LABELS[column][code + 1],
+                'price': float(self.close[position]),
+                'bar_start': pd.Timestamp(int(self.clock.bar_start(bar)), tz='UTC').tz_convert(IST),
+                'tick_time': pd.Timestamp(int(self.last_tick[position]), tz='UTC').tz_convert(IST),
+                'latency': queued_at - received if received is not None else None,
+            }
+            if self.alerts.put(alert, (position, column, code, bar)):
+                self.stats['alerts'] += 1
+                metrics.count('live_alerts')
+
+    def run(self, source, stop=None):
+        """Process batches from ``source`` until it is exhausted or ``stop`` (an Event) is set."""
+        for batch in source:
+            self.process(batch)
+            if stop is not None and stop.is_set():
+                break
+
+class ReplaySource:
+    """Replays a tick frame (``time``, ``symbol``, ``price``, ``volume`` columns) in batches.
+
+    With ``speed`` the batches are paced to the tick times (``speed=60``
+    plays a minute per second); otherwise they come as fast as they are read.
+    """
+
+    def __init__(self, ticks, batch_size=500, speed=None):
+        self.ticks = ticks.sort_values('time', kind='stable')
+        self.batch_size = batch_size
+        self.speed = speed
+
+    def __iter__(self):
+        stamps = pd.DatetimeIndex(self.ticks['time']).as_unit('ns').asi8
+        symbols = self.ticks['symbol'].to_numpy()
+        prices = self.ticks['price'].to_numpy(dtype=float)
+        volumes = self.ticks['volume'].to_numpy(dtype=float)
+        started = time.monotonic()
+        for first in range(0, len(stamps), self.batch_size):
+            rows = slice(first, first + self.batch_size)
+            if self.speed:
+                due = started + (stamps[rows][-1] - stamps[0]) / 1e9 / self.speed
+                time.sleep(max(0.0, due - time.monotonic()))
+            yield TickBatch(stamps[rows], symbols[rows], prices[rows], volumes[rows], time.monotonic())
+
+class QueueSource:
+    """Ticks pushed by another thread (e.g. a websocket client callback), read in batches.
+
+    ``push`` blocks once ``maxsize`` ticks are waiting, which pushes back on
+    the feed instead of dropping ticks. A batch is handed out as soon as
+    ``max_batch`` ticks are waiting or ``max_wait`` seconds have passed
+    since its first tick. Iteration ends after ``close()``.
+    """
+
+    _CLOSED = object()
+
+    def __init__(self, max_batch=2000, max_wait=0.05, maxsize=100_000):
+        self.queue = queue.Queue(maxsize)
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+
+    def push(self, stamp, symbol, price, volume=0.0):
+        """Add one tick; ``stamp`` is UTC epoch nanoseconds."""
+        self.queue.put((stamp, symbol, price, volume, time.monotonic()))
+
+    def close(self):
+        self.queue.put(self._CLOSED)
+
+    def __iter__(self):
+        closed = False
+        while not closed:
+            item = self.queue.get()
+            if item is self._CLOSED:
+                return
+            ticks = [item]
+            deadline = item[4] + self.max_wait
+            while len(ticks) < self.max_batch:
+                try:
+                    item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is self._CLOSED:
+                    closed = True
+                    break
+                ticks.append(item)
+            stamps, symbols, prices, volumes, received = zip(*ticks)
+            # Latency is measured from the oldest tick of the batch
+            yield TickBatch(np.array(stamps, dtype=np.int64), np.array(symbols), np.array(prices, dtype=float),
+                            np.array(volumes, dtype=float), received[0])
+
+def synthetic_history(symbols, bars=60, seed=0):
+    """Random-walk closes, a (bar x symbol) DataFrame, to seed a ``LiveEngine``."""
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (bars, len(symbols))), axis=0))
+    return pd.DataFrame(closes, columns=symbols)
+
+def session_time(day=None, minute=OPEN_MINUTE):
+    """UTC epoch nanoseconds of ``minute`` past midnight IST on ``day`` (default today)."""
+    day = pd.Timestamp(day or pd.Timestamp.now(tz=IST).date())
+    return (day.value // DAY_NS) * DAY_NS + minute * MINUTE_NS - IST_OFFSET_NS
+
+def load_test(symbols=2000, rate=5000, seconds=10.0, interval='1m', clock_speed=60.0, seed=0):
+    """Push ``rate`` random-walk ticks per second over ``symbols`` through a ``LiveEngine``.
+
+    A producer thread paces ticks into a ``QueueSource`` like a websocket
+    feed, with tick times running ``clock_speed`` times faster than the
+    wall clock from the session open so bars keep closing. Returns the
+    achieved tick rate, batch processing times, tick-to-alert latency
+    percentiles and the engine and queue counters.
+    """
+    rng = np.random.default_rng(seed)
+    names = [f"SYM{i:04d}" for i in range(symbols)]
+    history = synthetic_history(names, seed=seed)
+    last = history.iloc[-1].to_numpy()
+
+    source = QueueSource()
+    engine = LiveEngine(names, interval)
+    engine.seed(history)
+    batch_seconds = []
+    latencies = []
+    done = threading.Event()
+
+    def produce():
+        start_stamp = session_time(minute=OPEN_MINUTE)
+        started = time.monotonic()
+        prices = last.copy()
+        sent = 0
+        chunk = max(1, rate // 100)
+        while sent < rate * seconds:
+            due = started + sent / rate
+            time.sleep(max(0.0, due - time.monotonic()))
+            picks = rng.integers(0, symbols, chunk)
+            prices[picks] *= np.exp(rng.normal(0, 0.002, chunk))
+            stamp = start_stamp + int((time.monotonic() - started) * clock_speed * 1e9)
+            for pick in picks.tolist():
+                source.push(stamp, pick, prices[pick], 1.0)
+            sent += chunk
+        source.close()
+
+    def consume():
+        while not done.is_set() or len(engine.alerts):
+            alert = engine.alerts.get(timeout=0.1)
+            if alert is not None:
+                latencies.append(alert['latency'])
+
+    producer = threading.Thread(target=produce, daemon=True)
+    consumer = threading.Thread(target=consume, daemon=True)
+    started = time.monotonic()
+    producer.start()
+    consumer.start()
+    for batch in source:
+        batch_start = time.perf_counter()
+        engine.process(batch)
+        batch_seconds.append(time.perf_counter() - batch_start)
+    elapsed = time.monotonic() - started
+    done.set()
+    consumer.join()
+
+    def percentiles(values):
+        if not values:
+            return None
+        p50, p99, top = (float(value) * 1000 for value in np.percentile(values, [50, 99, 100]))
+        return {'p50_ms': round(p50, 2), 'p99_ms': round(p99, 2), 'max_ms': round(top, 2)}
+
+    return {
+        'symbols': symbols,
+        'target_rate': rate,
+        'ticks_per_second': round(engine.stats['ticks'] / elapsed),
+        'batches': len(batch_seconds),
+        'batch': percentiles(batch_seconds),
+        'tick_to_alert': percentiles(latencies),
+        **engine.stats,
+        **{f"queue_{name}": value for name, value in engine.alerts.stats.items()},
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, default=2000)
+    parser.add_argument('--rate', type=int, default=5000, help='ticks per second')
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--interval', default='1m', choices=list(INTERVAL_MINUTES))
+    parser.add_argument('--clock-speed', type=float, default=60.0, help='simulated seconds per wall-clock second')
+    args = parser.parse_args(argv)
+    print(load_test(args.symbols, args.rate, args.seconds, args.interval, args.clock_speed))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import os
+import pickle
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from utils.ohlcv_cache import write_atomic
+from utils.panel import PANEL_FIELDS, align_frames
+
+DEFAULT_DTYPE = np.float32
+
+class MarketData:
+    """Compact OHLCV store for a universe of symbols.
+
+    All fields live in one contiguous ``(field, time, symbol)`` array of
+    ``dtype`` (float32 by default) over a single DatetimeIndex shared by
+    every symbol, with NaN where a symbol has no bar. Columns other than
+    ``fields`` (dividends, splits, indicators) are not kept. The array can
+    be an ordinary array, a view of a ``multiprocessing.shared_memory``
+    block (``to_shared_memory``/``attach``) or a read-only memory-mapped
+    file (``save``/``load``), so other processes read it without copying.
+    """
+
+    def __init__(self, values, index, symbols, fields=PANEL_FIELDS, buffer=None):
+        self.values = values
+        self.index = index
+        self.symbols = pd.Index(symbols, name='Symbol')
+        self.fields = tuple(fields)
+        self.buffer = buffer
+        self._columns = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    @classmethod
+    def from_frames(cls, data, dtype=DEFAULT_DTYPE, fields=PANEL_FIELDS):
+        """Build from a dict of symbol to OHLCV DataFrame, aligned as ``build_panel`` does."""
+        values, index, symbols = align_frames(data, fields, dtype)
+        return cls(values, index, symbols, fields)
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.index.nbytes
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self._columns
+
+    def field(self, name):
+        """(time x symbol) array view of one field."""
+        return self.values[self.fields.index(name)]
+
+    def to_panel(self):
+        """Dict of field to (time x symbol) DataFrame, as returned by ``build_panel``."""
+        return {field: pd.DataFrame(self.values[i], index=self.index, columns=self.symbols, copy=False)
+                for i, field in enumerate(self.fields)}
+
+    def frame(self, symbol):
+        """One symbol's bars as an OHLCV DataFrame, without the rows it has no data for."""
+        block = self.values[:, :, self._columns[symbol]].T
+        listed = ~np.isnan(block).all(axis=1)
+        return pd.DataFrame(block[listed], index=self.index[listed], columns=list(self.fields))
+
+    def take(self, symbols):
+        """Copy the given symbols into a new in-memory ``MarketData``, trimmed to their bars."""
+        cols = [self._columns[symbol] for symbol in symbols]
+        values = self.values[:, :, cols]
+        listed = ~np.isnan(values).all(axis=(0, 2))
+        if not listed.all():
+            values = values[:, listed]
+        return MarketData(np.ascontiguousarray(values), self.index[listed], symbols, self.fields)
+
+    def _metadata(self):
+        index = self.index
+        tz = str(index.tz) if getattr(index, 'tz', None) is not None else None
+        return {'shape': self.values.shape, 'dtype': self.values.dtype.str, 'fields': self.fields,
+                'symbols': list(self.symbols), 'stamps': index.as_unit('ns').asi8, 'tz': tz}
+
+    @staticmethod
+    def _index(metadata):
+        index = pd.DatetimeIndex(metadata['stamps'].view('datetime64[ns]'))
+        if metadata['tz'] is not None:
+            index = index.tz_localize('UTC').tz_convert(metadata['tz'])
+        return index
+
+    def to_shared_memory(self, name=None):
+        """Copy the array into a new shared-memory block.
+
+        Returns ``(block, descriptor)``. ``descriptor`` is a small picklable
+        dict for ``MarketData.attach`` in other processes. The caller owns
+        ``block`` and must ``close()`` and ``unlink()`` it when done.
+        """
+        block = shared_memory.SharedMemory(name=name, create=True, size=max(self.values.nbytes, 1))
+        np.ndarray(self.values.shape, self.values.dtype, buffer=block.buf)[...] = self.values
+        return block, dict(self._metadata(), shm=block.name)
+
+    @classmethod
+    def attach(cls, descriptor, untrack=False):
+        """Map a block created by ``to_shared_memory`` without copying it.
+
+        Call ``close()`` on the result (after dropping views of its arrays)
+        when done; the creator unlinks the block. Processes not started by
+        the creator through ``multiprocessing`` have their own resource
+        tracker, which would unlink the block when they exit; pass
+        ``untrack=True`` there.
+        """
+        block = shared_memory.SharedMemory(name=descriptor['shm'])
+        if untrack:
+            resource_tracker.unregister(block._name, 'shared_memory')
+        values = np.ndarray(descriptor['shape'], np.dtype(descriptor['dtype']), buffer=block.buf)
+        return cls(values, cls._index(descriptor), descriptor['symbols'], descriptor['fields'], buffer=block)
+
+    def close(self):
+        """Release a shared-memory mapping from ``attach``."""
+        if self.buffer is not None:
+            self.values = None
+            self.buffer.close()
+            self.buffer = None
+
+    def save(self, path):
+        """Write the array and its metadata under directory ``path`` for ``load``."""
+        os.makedirs(path, exist_ok=True)
+        metadata = self._metadata()
+        metadata.pop('shape')
+        metadata.pop('dtype')
+
+        def write_values(tmp_path):
+            # np.save would add .npy to a path without it
+            with open(tmp_path, 'wb') as f:
+                np.save(f, self.values)
+
+        def write_metadata(tmp_path):
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(metadata, f)
+
+        write_atomic(os.path.join(path, 'values.npy'), write_values)
+        write_atomic(os.path.join(path, 'metadata.pkl'), write_metadata)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Load a ``save``d directory, memory-mapping the array read-only by default."""
+        with open(os.path.join(path, 'metadata.pkl'), 'rb') as f:
+            metadata = pickle.load(f)
+        values = np.load(os.path.join(path, 'values.npy'), mmap_mode='r' if mmap else None)
+        return cls(values, cls._index(metadata), metadata['symbols'], metadata['fields'])
+
+def frames_nbytes(data):
+    """Total memory of a dict of DataFrames, including their indexes."""
+    return sum(int(df.memory_usage(index=True, deep=True).sum()) for df in data.values())
+
+def benchmark(symbols=2000, bars=250):
+    """Compare per-symbol DataFrames with ``MarketData`` for memory and build time."""
+    from utils.fetch_engine import synthetic_ohlcv
+    from utils.indicators import add_indicators
+
+    data = {}
+    for i in range(symbols):
+        df = synthetic_ohlcv(bars, seed=i)
+        # Ticker.history also returns corporate action columns
+        df['Dividends'] = 0.0
+        df['Stock Splits'] = 0.0
+        data[f"SYM{i:04d}"] = df
+
+    frames_mb = frames_nbytes(data) / 2**20
+    with_indicators_mb = frames_mb + frames_nbytes({s: add_indicators(df) for s, df in data.items()}) / 2**20
+
+    start = time.perf_counter()
+    compact = MarketData.from_frames(data)
+    build_seconds = time.perf_counter() - start
+    float64 = MarketData.from_frames(data, dtype=np.float64)
+
+    start = time.perf_counter()
+    block, descriptor = compact.to_shared_memory()
+    try:
+        attached = MarketData.attach(descriptor)
+        attached.close()
+    finally:
+        block.close()
+        block.unlink()
+    shared_seconds = time.perf_counter() - start
+
+    return {
+        'symbols': symbols,
+        'bars': bars,
+        'frames_mb': round(frames_mb, 2),
+        'frames_with_indicators_mb': round(with_indicators_mb, 2),
+        'market_data_float64_mb': round(float64.nbytes / 2**20, 2),
+        'market_data_float32_mb': round(compact.nbytes / 2**20, 2),
+        'build_seconds': round(build_seconds, 3),
+        'shared_memory_seconds': round(shared_seconds, 3),
+        'descriptor_bytes': len(pickle.dumps(descriptor)),
+    }
+
+if __name__ == "__main__":
+    print(benchmark())
@@ -0,0 +1,75 @@
+import csv
+import os
+from datetime import date, datetime, timedelta, time as dt_time
+
+import pytz
+
+IST = pytz.timezone('Asia/Kolkata')
+SESSION_OPEN = dt_time(9, 15)
+SESSION_CLOSE = dt_time(15, 30)
+# NSE's published trading holidays, one "YYYY-MM-DD,Holiday" row each; add each year's list as it is announced
+HOLIDAYS_FILE = os.environ.get(
+    'NSE_HOLIDAYS_FILE', os.path.join(os.path.dirname(__file__), '..', 'attached_assets', 'nse_holidays.csv')
+)
+
+def load_holidays(path=HOLIDAYS_FILE):
+    """Dates of the exchange holidays listed in ``path``."""
+    with open(path, newline='') as f:
+        return {date.fromisoformat(row['Date']) for row in csv.DictReader(f)}
+
+# Exchange holidays (dates in IST) on which no session runs
+NSE_HOLIDAYS = load_holidays()
+# Daily bars settle a little after the close
+POST_CLOSE_DELAY = timedelta(minutes=20)
+
+def is_trading_day(day):
+    return day.weekday() < 5 and day not in NSE_HOLIDAYS
+
+def is_market_open(now=None):
+    """Whether an NSE equity session is running at ``now`` (IST)."""
+    now = (now or datetime.now(IST)).astimezone(IST)
+    return is_trading_day(now.date()) and SESSION_OPEN <= now.time() < SESSION_CLOSE
+
+def last_session_close(now=None):
+    """The most recent session close at or before ``now``, plus the settle delay.
+
+    The result is later than ``now`` while that session's bars are settling.
+    """
+    now = (now or datetime.now(IST)).astimezone(IST)
+    day = now.date()
+    while True:
+        close = IST.localize(datetime.combine(day, SESSION_CLOSE))
+        if is_trading_day(day) and close <= now:
+            return close + POST_CLOSE_DELAY
+        day -= timedelta(days=1)
+
+def session_start(sessions, now=None):
+    """Midnight (IST) starting the ``sessions``-th most recent session opened at or before ``now``."""
+    now = (now or datetime.now(IST)).astimezone(IST)
+    day = now.date() if now.time() >= SESSION_OPEN else now.date() - timedelta(days=1)
+    while True:
+        if is_trading_day(day):
+            sessions -= 1
+            if sessions <= 0:
+                return IST.localize(datetime.combine(day, dt_time()))
+        day -= timedelta(days=1)
+
+def next_session_open(now=None):
+    """The next session open strictly after ``now``."""
+    now = (now or datetime.now(IST)).astimezone(IST)
+    day = now.date()
+    while True:
+        opening = IST.localize(datetime.combine(day, SESSION_OPEN))
+        if is_trading_day(day) and opening > now:
+            return opening
+        day += timedelta(days=1)
+
+def next_session_close(now=None):
+    """The next session close (plus the settle delay) strictly after ``now``."""
+    now = (now or datetime.now(IST)).astimezone(IST)
+    day = now.date()
+    while True:
+        close = IST.localize(datetime.combine(day, SESSION_CLOSE)) + POST_CLOSE_DELAY
+        if is_trading_day(day) and close > now:
+            return close
+        day += timedelta(days=1)
@@ -0,0 +1,201 @@
+"""Persistent company metadata: name, sector, industry, share count and market cap.
+
+Values are stored in SQLite, one row per symbol and field with the time it
+was fetched, so every field expires on its own schedule. The whole table
+is mirrored in memory, so lookups and sector grouping need neither a query
+nor a network call. Run ``python -m utils.metadata_store`` to prefetch the
+symbol universe.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+DB_PATH = os.environ.get('NSE_METADATA_DB', os.path.join('.cache', 'metadata.sqlite'))
+DAY = 24 * 60 * 60
+# yfinance info key and TTL in seconds of each stored field
+FIELDS = {
+    'name': ('longName', 30 * DAY),
+    'sector': ('sector', 30 * DAY),
+    'industry': ('industry', 30 * DAY),
+    'shares_outstanding': ('sharesOutstanding', 7 * DAY),
+    'market_cap': ('marketCap', DAY),
+    'volume': ('volume', DAY),
+}
+UNKNOWN_SECTOR = 'N/A'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS company (
+    symbol TEXT NOT NULL,
+    field TEXT NOT NULL,
+    value,
+    fetched REAL NOT NULL,
+    PRIMARY KEY (symbol, field)
+);
+"""
+
+class MetadataStore:
+    """Company fields with per-field TTLs, in SQLite and mirrored in memory.
+
+    A field fetched without a value (an ETF has no sector) is remembered as
+    missing until it expires. Writes by other processes (for example a
+    scheduler run with ``python -m utils.scheduler``) are picked up on the
+    next lookup.
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self.version = None
+        self.rows = {}
+        self.by_sector = {}
+        with self.lock:
+            self._sync()
+
+    def _sync(self):
+        """Reload the mirror if another connection committed since. Call with the lock held."""
+        version = self.conn.execute('PRAGMA data_version').fetchone()[0]
+        if version == self.version:
+            return
+        self.version = version
+        self.rows = {}
+        for symbol, field, value, fetched in self.conn.execute('SELECT symbol, field, value, fetched FROM company'):
+            self.rows.setdefault(symbol, {})[field] = (value, fetched)
+        self.by_sector = {}
+        for symbol, fields in self.rows.items():
+            self._index(symbol, fields)
+
+    def _index(self, symbol, fields):
+        sector = fields.get('sector', (None,))[0] or UNKNOWN_SECTOR
+        self.by_sector.setdefault(sector, set()).add(symbol)
+
+    def get(self, symbol):
+        """Stored values of ``symbol``, however old, without missing ones."""
+        with self.lock:
+            self._sync()
+            fields = self.rows.get(symbol, {})
+        return {field: value for field, (value, _) in fields.items() if value is not None}
+
+    def expired(self, symbol, now=None):
+        """Fields of ``symbol`` that were never fetched or have outlived their TTL."""
+        now = now or time.time()
+        with self.lock:
+            self._sync()
+            fields = self.rows.get(symbol, {})
+        return [field for field, (_, ttl) in FIELDS.items()
+                if field not in fields or fields[field][1] + ttl <= now]
+
+    def update(self, values, fetched=None):
+        """Store ``{symbol: {field: value}}``.
+
+        A None value marks the field as fetched but missing, except that a
+        value already stored is kept (and counts as fresh again), so a
+        partial provider response does not erase good data.
+        """
+        fetched = fetched or time.time()
+        with self.lock, self.conn:
+            # Other processes cannot commit while this holds the write lock, so
+            # the mirror synced here plus these rows is exactly what is stored
+            self.conn.execute('BEGIN IMMEDIATE')
+            self._sync()
+            rows = []
+            for symbol, fields in values.items():
+                stored = self.rows.setdefault(symbol, {})
+                for field, value in fields.items():
+                    if value is None and stored.get(field, (None,))[0] is not None:
+                        value = stored[field][0]
+                    stored[field] = (value, fetched)
+                    rows.append((symbol, field, value, fetched))
+                for members in self.by_sector.values():
+                    members.discard(symbol)
+                self._index(symbol, stored)
+            try:
+                self.conn.executemany(
+                    'INSERT OR REPLACE INTO company (symbol, field, value, fetched) VALUES (?, ?, ?, ?)', rows
+                )
+            except BaseException:
+                # The mirror already has the rows; reload it on the next lookup
+                self.version = None
+                raise
+            # Our own commit bumps no data_version, so the version read by _sync stays current
+
+    def update_info(self, infos, fetched=None):
+        """Store the fields of yfinance info dicts, ``{symbol: info}``."""
+        self.update({
+            symbol: {field: info.get(key) for field, (key, _) in FIELDS.items()}
+            for symbol, info in infos.items()
+        }, fetched)
+
+    def update_prices(self, data, fetched=None):
+        """Refresh market cap and volume from the latest bars, ``{symbol: OHLCV frame}``.
+
+        Market cap is the stored share count times the last close, so the
+        daily fields stay current without info requests.
+        """
+        values = {}
+        for symbol, df in data.items():
+            shares = self.get(symbol).get('shares_outstanding')
+            if shares is None or df is None or df.empty:
+                continue
+            last = df.iloc[-1]
+            values[symbol] = {'market_cap': float(shares * last['Close']), 'volume': float(last['Volume'])}
+        if values:
+            self.update(values, fetched)
+        return len(values)
+
+    def sectors(self, symbols):
+        """Sector of each symbol, ``UNKNOWN_SECTOR`` where none is stored."""
+        with self.lock:
+            self._sync()
+            rows = self.rows
+        return [(rows.get(symbol, {}).get('sector', (None,))[0] or UNKNOWN_SECTOR) for symbol in symbols]
+
+    def sector_names(self):
+        """Sectors with at least one stored symbol, ``UNKNOWN_SECTOR`` included."""
+        with self.lock:
+            self._sync()
+            return sorted(sector for sector, members in self.by_sector.items() if members)
+
+    def symbols_in_sector(self, sector):
+        """Symbols stored under ``sector``, sorted."""
+        with self.lock:
+            self._sync()
+            return sorted(self.by_sector.get(sector, ()))
+
+    def prefetch(self, symbols, engine=None, force=False):
+        """Fetch the info of every symbol with an expired field, concurrently through ``engine``.
+
+        Returns counts of fetched, failed and skipped (still fresh) symbols.
+        """
+        from utils.fetch_engine import get_engine
+        from utils.stock_data import download_info
+
+        pending = [symbol for symbol in symbols if force or self.expired(symbol)]
+        stats = {'fetched': 0, 'failed': 0, 'skipped': len(symbols) - len(pending)}
+        for symbol, info, error in (engine or get_engine()).map(download_info, pending):
+            if error is not None or not info:
+                stats['failed'] += 1
+                continue
+            self.update_info({symbol: info})
+            stats['fetched'] += 1
+        return stats
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_metadata_store():
+    """Return the process-wide metadata store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = MetadataStore()
+    return _store
+
+if __name__ == "__main__":
+    from utils.scheduler import load_symbols
+
+    print(get_metadata_store().prefetch(load_symbols()))
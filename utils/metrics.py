@@ -0,0 +1,291 @@
+import bisect
+import contextvars
+import functools
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENABLED = os.environ.get('NSE_METRICS', '1') != '0'
+METRICS_PORT = os.environ.get('NSE_METRICS_PORT')
+
+# Latency histogram bucket bounds in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SLOWEST_ITEMS = 10
+# Run summaries kept for sessions to look up
+MAX_RUNS = 100
+
+# Run that spans in this context count toward; FetchEngine workers inherit it
+_current_run = contextvars.ContextVar('metrics_run', default=None)
+# Spans open in this thread, innermost last, for self times
+_local = threading.local()
+
+class Histogram:
+    """Cumulative latency histogram with fixed bucket bounds."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def to_dict(self):
+        return {'count': self.count, 'sum': round(self.sum, 6),
+                'buckets': dict(zip([*map(str, self.buckets), '+Inf'], self.counts))}
+
+class Registry:
+    """Process-wide counters and stage histograms, plus a record of each recent run.
+
+    A run belongs to the context that started it (a page session's script
+    run, a CLI command), so concurrent sessions each see their own.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.runs = OrderedDict()
+        self.run_ids = itertools.count(1)
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, stage, seconds, label=None, self_seconds=None):
+        """Record ``seconds`` for ``stage``; ``self_seconds`` excludes nested stages."""
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+            run = self.runs.get(_current_run.get())
+            if run is not None:
+                totals = run['stages'].setdefault(stage, [0, 0.0, 0.0])
+                totals[0] += 1
+                totals[1] += seconds
+                totals[2] += seconds if self_seconds is None else self_seconds
+                if label is not None:
+                    item = (seconds, stage, label)
+                    if len(run['slowest']) < SLOWEST_ITEMS:
+                        heapq.heappush(run['slowest'], item)
+                    else:
+                        heapq.heappushpop(run['slowest'], item)
+
+    def start_run(self, name):
+        """Begin recording a run (stage totals, slowest items, counters) for the current context.
+
+        Returns the run id for ``last_run``.
+        """
+        with self.lock:
+            run_id = next(self.run_ids)
+            self.runs[run_id] = {'name': name, 'started': time.time(), 'stages': {}, 'slowest': [],
+                                 'counters_at_start': dict(self.counters)}
+            while len(self.runs) > MAX_RUNS:
+                self.runs.popitem(last=False)
+        _current_run.set(run_id)
+        return run_id
+
+    def last_run(self, run_id=None):
+        """Summary of run ``run_id`` (default the current context's), or None.
+
+        A stage's ``seconds`` include the stages nested inside it ('scoring'
+        includes 'indicators' and 'signals'); ``self_seconds`` do not.
+        Counters are process-wide, so they include other sessions' activity
+        during the run.
+        """
+        with self.lock:
+            run = self.runs.get(_current_run.get() if run_id is None else run_id)
+            if run is None:
+                return None
+            counters = {name: value - run['counters_at_start'].get(name, 0)
+                        for name, value in self.counters.items()
+                        if value != run['counters_at_start'].get(name, 0)}
+            return {
+                'name': run['name'],
+                'started': run['started'],
+                'elapsed': time.time() - run['started'],
+                'stages': {stage: {'calls': calls, 'seconds': round(total, 4), 'self_seconds': round(own, 4)}
+                           for stage, (calls, total, own) in run['stages'].items()},
+                'slowest': [{'stage': stage, 'item': label, 'seconds': round(seconds, 4)}
+                            for seconds, stage, label in sorted(run['slowest'], reverse=True)],
+                'counters': counters,
+            }
+
+    def to_dict(self, run_id=None):
+        with self.lock:
+            histograms = {stage: histogram.to_dict() for stage, histogram in self.histograms.items()}
+            counters = dict(self.counters)
+        return {'counters': counters, 'histograms': histograms, 'last_run': self.last_run(run_id)}
+
+    def to_prometheus(self):
+        """Render counters and histograms in the Prometheus text exposition format."""
+        lines = []
+        with self.lock:
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE nse_{name}_total counter")
+                lines.append(f"nse_{name}_total {value}")
+            lines.append("# TYPE nse_stage_seconds histogram")
+            for stage, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip([*map(str, histogram.buckets), '+Inf'], histogram.counts):
+                    cumulative += count
+                    lines.append(f'nse_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'nse_stage_seconds_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+                lines.append(f'nse_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.runs.clear()
+
+registry = Registry()
+
+def _open_spans():
+    if not hasattr(_local, 'spans'):
+        _local.spans = []
+    return _local.spans
+
+class Span:
+    """Times a block and records it under ``stage`` (and ``label`` for slowest items).
+
+    Time spent in spans nested inside it on the same thread is subtracted
+    from its self time.
+    """
+
+    __slots__ = ('stage', 'label', 'start', 'nested')
+
+    def __init__(self, stage, label=None):
+        self.stage = stage
+        self.label = label
+
+    def __enter__(self):
+        self.nested = 0.0
+        _open_spans().append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        spans = _open_spans()
+        # A span left open across a generator's yield may close out of order
+        if spans and spans[-1] is self:
+            spans.pop()
+        elif self in spans:
+            spans.remove(self)
+        if spans:
+            spans[-1].nested += elapsed
+        registry.observe(self.stage, elapsed, self.label, elapsed - self.nested)
+        return False
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+def span(stage, label=None):
+    """Context manager timing a pipeline stage; a shared no-op when metrics are disabled."""
+    if not ENABLED:
+        return _NULL_SPAN
+    return Span(stage, label)
+
+def timed(stage, label_arg=None):
+    """Decorator timing every call of a function as ``stage``.
+
+    ``label_arg`` names a positional index or keyword whose value labels the
+    call in the slowest-items list (e.g. the symbol).
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            label = None
+            if isinstance(label_arg, int) and len(args) > label_arg:
+                label = args[label_arg]
+            elif isinstance(label_arg, str):
+                label = kwargs.get(label_arg)
+            with Span(stage, label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def count(name, value=1):
+    """Increment counter ``name``; a no-op when metrics are disabled."""
+    if ENABLED:
+        registry.count(name, value)
+
+def observe(stage, seconds, label=None):
+    """Record an already measured duration for ``stage``."""
+    if ENABLED:
+        registry.observe(stage, seconds, label)
+
+def start_run(name):
+    """Start recording the per-run summary shown in the performance panel; returns its id or None."""
+    if ENABLED:
+        return registry.start_run(name)
+    return None
+
+def current_run():
+    """Id of the run the current context records into, or None."""
+    return _current_run.get()
+
+def chunk_label(symbols):
+    """Slowest-items label for a batch of symbols, e.g. ``RELIANCE +49``."""
+    return symbols[0] if len(symbols) == 1 else f"{symbols[0]} +{len(symbols) - 1}"
+
+def cache_hit_rates(counters):
+    """Hit rates for the ``<cache>_hit``/``<cache>_miss`` counter pairs."""
+    rates = {}
+    for name, hits in counters.items():
+        if name.endswith('_hit'):
+            cache = name[:-len('_hit')]
+            total = hits + counters.get(f"{cache}_miss", 0)
+            rates[cache] = hits / total if total else None
+    return rates
+
+class _ExporterHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith('/metrics.json'):
+            body, content_type = json.dumps(registry.to_dict(), default=str).encode(), 'application/json'
+        elif self.path.startswith('/metrics'):
+            body, content_type = registry.to_prometheus().encode(), 'text/plain; version=0.0.4'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+_exporter = None
+
+def start_exporter(port=None):
+    """Serve ``/metrics`` (Prometheus text) and ``/metrics.json`` on ``port`` once per process."""
+    global _exporter
+    port = port or METRICS_PORT
+    if _exporter is None and port and ENABLED:
+        _exporter = ThreadingHTTPServer(('0.0.0.0', int(port)), _ExporterHandler)
+        threading.Thread(target=_exporter.serve_forever, name='metrics-exporter', daemon=True).start()
+    return _exporter
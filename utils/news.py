@@ -0,0 +1,172 @@
+import hashlib
+import threading
+import time
+import urllib.request
+from datetime import datetime
+from urllib.error import HTTPError
+from urllib.parse import quote
+
+import feedparser
+import pytz
+
+from utils import metrics
+from utils.fetch_engine import FetchEngine, TransientError
+
+IST = pytz.timezone('Asia/Kolkata')
+GOOGLE_NEWS_URL = "https://news.google.com/rss/search?q={query}&hl=en-IN&gl=IN&ceid=IN:en"
+ENTRIES_PER_FEED = 5
+NEWS_TTL = 15 * 60
+USER_AGENT = "Mozilla/5.0 (NSE Stock Analysis news reader)"
+
+def download_feed(url, etag=None, modified=None, timeout=None):
+    """GET a feed, conditionally when ``etag``/``modified`` are known.
+
+    Returns ``(status, body, etag, modified)``; a 304 response has no body and
+    keeps the validators that were sent.
+    """
+    request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+    if etag:
+        request.add_header('If-None-Match', etag)
+    if modified:
+        request.add_header('If-Modified-Since', modified)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return (response.status, response.read(),
+                    response.headers.get('ETag'), response.headers.get('Last-Modified'))
+    except HTTPError as e:
+        if e.code == 304:
+            return 304, None, etag, modified
+        if e.code == 429 or e.code >= 500:
+            raise TransientError(f"HTTP Error {e.code}: {e.reason}")
+        raise
+
+def parse_entries(symbol, body, limit=ENTRIES_PER_FEED):
+    """Parse an RSS body into news items for ``symbol``."""
+    feed = feedparser.parse(body)
+    items = []
+    for entry in feed.entries[:limit]:
+        if getattr(entry, 'published_parsed', None):
+            # feedparser normalises published dates to UTC
+            utc_time = datetime(*entry.published_parsed[:6], tzinfo=pytz.UTC)
+        else:
+            utc_time = datetime.strptime(entry.published, '%a, %d %b %Y %H:%M:%S %Z').replace(tzinfo=pytz.UTC)
+        items.append({
+            'Symbol': symbol,
+            'Title': entry.title,
+            'Link': entry.link,
+            'Published': utc_time.astimezone(IST),
+            'Source': entry.source.title if hasattr(entry, 'source') else 'Unknown'
+        })
+    return items
+
+def article_keys(item):
+    """Hashes identifying an article by link and by normalised title."""
+    title = ' '.join(item['Title'].lower().split())
+    return (hashlib.sha1(item['Link'].encode()).hexdigest(),
+            hashlib.sha1(title.encode()).hexdigest())
+
+def deduplicate(items):
+    """Merge articles that appear under several symbols, newest first.
+
+    Articles are the same when either their link or title hash matches; the
+    merged item lists every symbol it was found under.
+    """
+    merged = []
+    seen = {}
+    for item in sorted(items, key=lambda x: x['Published'], reverse=True):
+        keys = article_keys(item)
+        existing = next((seen[key] for key in keys if key in seen), None)
+        if existing is None:
+            existing = dict(item, Symbols=[item['Symbol']])
+            merged.append(existing)
+        elif item['Symbol'] not in existing['Symbols']:
+            existing['Symbols'].append(item['Symbol'])
+        for key in keys:
+            seen.setdefault(key, existing)
+
+    for item in merged:
+        item['Symbol'] = ', '.join(item.pop('Symbols'))
+    return merged
+
+class NewsService:
+    """Fetch, cache and deduplicate per-symbol news feeds.
+
+    Feeds are fetched concurrently through a ``FetchEngine``. Parsed entries
+    are served from memory for ``ttl`` seconds, after which the feed is
+    revalidated with its ETag/Last-Modified so unchanged feeds cost a 304.
+    """
+
+    def __init__(self, url_template=GOOGLE_NEWS_URL, ttl=NEWS_TTL, engine=None, download=download_feed):
+        self.url_template = url_template
+        self.ttl = ttl
+        self.engine = engine or FetchEngine(max_workers=8, rate=10, burst=10, max_retries=2, timeout=10)
+        self.download = download
+        self.feeds = {}
+        self.lock = threading.Lock()
+
+    def feed_url(self, symbol):
+        return self.url_template.format(query=quote(f"{symbol} NSE stock"))
+
+    def fetch_feed(self, symbol, timeout=None):
+        """Return ``(items, report)`` for one symbol, using the cache when fresh."""
+        url = self.feed_url(symbol)
+        with self.lock:
+            cached = self.feeds.get(url)
+        now = time.time()
+        if cached and now - cached['fetched_at'] < self.ttl:
+            metrics.count('news_cache_hit')
+            return cached['items'], {'symbol': symbol, 'status': 'cached', 'seconds': 0.0,
+                                     'entries': len(cached['items'])}
+
+        metrics.count('news_cache_miss')
+        start = time.perf_counter()
+        status, body, etag, modified = self.download(
+            url,
+            etag=cached['etag'] if cached else None,
+            modified=cached['modified'] if cached else None,
+            timeout=timeout
+        )
+        if status == 304 and cached:
+            metrics.count('news_not_modified')
+            items = cached['items']
+        else:
+            if status == 304:
+                # Nothing cached to fall back on, so ask for the whole feed
+                status, body, etag, modified = self.download(url, timeout=timeout)
+            if body is None:
+                raise ValueError(f"Feed for {symbol} returned status {status} without a body")
+            items = parse_entries(symbol, body)
+        elapsed = time.perf_counter() - start
+        metrics.observe('news_fetch', elapsed, symbol)
+
+        with self.lock:
+            self.feeds[url] = {'items': items, 'etag': etag, 'modified': modified, 'fetched_at': now}
+        return items, {'symbol': symbol, 'status': status, 'seconds': round(elapsed, 3), 'entries': len(items)}
+
+    def fetch_all(self, symbols):
+        """Fetch news for every symbol concurrently.
+
+        Returns ``(items, report)``: deduplicated items sorted newest first,
+        and one report dict per feed with its status, latency and entry count
+        (or error).
+        """
+        items = []
+        report = []
+        for symbol, result, error in self.engine.map(self.fetch_feed, symbols):
+            if error is not None:
+                report.append({'symbol': symbol, 'status': 'error', 'seconds': None,
+                               'entries': 0, 'error': str(error)})
+                continue
+            feed_items, feed_report = result
+            items.extend(feed_items)
+            report.append(feed_report)
+        return deduplicate(items), report
+
+_news_service = None
+
+def get_news_service():
+    """Return the process-wide news service shared by page reruns and sessions."""
+    global _news_service
+    if _news_service is None:
+        _news_service = NewsService()
+    return _news_service
@@ -0,0 +1,197 @@
+import os
+import tempfile
+import time
+import pandas as pd
+
+from utils import metrics
+from utils.market_hours import session_start
+
+# One pickle file per symbol/interval under this directory
+CACHE_DIR = os.environ.get('NSE_OHLCV_CACHE_DIR', os.path.join('.cache', 'ohlcv'))
+CACHE_ENABLED = os.environ.get('NSE_OHLCV_CACHE', '1') != '0'
+
+# How long a cached partition is served without a top-up fetch
+STALENESS = {
+    '1m': pd.Timedelta(minutes=1),
+    '2m': pd.Timedelta(minutes=2),
+    '5m': pd.Timedelta(minutes=5),
+    '15m': pd.Timedelta(minutes=15),
+    '30m': pd.Timedelta(minutes=30),
+    '60m': pd.Timedelta(hours=1),
+    '90m': pd.Timedelta(minutes=90),
+    '1h': pd.Timedelta(hours=1),
+    '1d': pd.Timedelta(hours=4),
+    '5d': pd.Timedelta(hours=12),
+    '1wk': pd.Timedelta(days=1),
+    '1mo': pd.Timedelta(days=1),
+    '3mo': pd.Timedelta(days=1),
+}
+DEFAULT_STALENESS = pd.Timedelta(hours=1)
+
+PERIOD_OFFSETS = {
+    '1d': pd.DateOffset(days=1),
+    '5d': pd.DateOffset(days=5),
+    '1mo': pd.DateOffset(months=1),
+    '3mo': pd.DateOffset(months=3),
+    '6mo': pd.DateOffset(months=6),
+    '1y': pd.DateOffset(years=1),
+    '2y': pd.DateOffset(years=2),
+    '5y': pd.DateOffset(years=5),
+    '10y': pd.DateOffset(years=10),
+}
+
+# yfinance day periods count trading sessions, not calendar days
+SESSION_PERIODS = {'1d': 1, '5d': 5}
+
+TIMEZONE = 'Asia/Kolkata'
+
+def _now():
+    return pd.Timestamp.now(tz=TIMEZONE)
+
+def to_market_time(df):
+    """``df`` with its index in market time; a tz-naive index is taken to be market time already."""
+    if df is None or not isinstance(df.index, pd.DatetimeIndex):
+        return df
+    if df.index.tz is None:
+        return df.tz_localize(TIMEZONE)
+    if str(df.index.tz) != TIMEZONE:
+        return df.tz_convert(TIMEZONE)
+    return df
+
+def _path(symbol, interval):
+    return os.path.join(CACHE_DIR, interval, f"{symbol}.pkl")
+
+def period_start(period, now=None):
+    """Return the first timestamp covered by a yfinance period, or None for 'max'.
+
+    Day periods start at the earliest of their trading sessions.
+    """
+    now = now if now is not None else _now()
+    if period in SESSION_PERIODS:
+        return pd.Timestamp(session_start(SESSION_PERIODS[period], now)).tz_convert(TIMEZONE)
+    if period == 'ytd':
+        return now.normalize().replace(month=1, day=1)
+    if period not in PERIOD_OFFSETS:
+        return None
+    return (now - PERIOD_OFFSETS[period]).normalize()
+
+def top_up_period(last_timestamp, now=None):
+    """Pick the shortest yfinance period that reaches back to the last cached bar."""
+    now = now if now is not None else _now()
+    for period, offset in PERIOD_OFFSETS.items():
+        # One day of slack so the last (possibly partial) bar is refetched
+        if now - offset <= last_timestamp - pd.Timedelta(days=1):
+            return period
+    return 'max'
+
+def load(symbol, interval):
+    """Load the cached history for a symbol/interval, or None."""
+    path = _path(symbol, interval)
+    if not CACHE_ENABLED or not os.path.exists(path):
+        return None
+    try:
+        # Partitions written before indexes were normalised may be tz-naive
+        return to_market_time(pd.read_pickle(path))
+    except Exception:
+        return None
+
+def save(symbol, interval, df):
+    """Write the history for a symbol/interval atomically."""
+    if not CACHE_ENABLED:
+        return
+    path = _path(symbol, interval)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_atomic(path, lambda tmp_path: to_market_time(df).to_pickle(tmp_path))
+
+def write_atomic(path, write):
+    """Call ``write(tmp_path)`` and move the file over ``path``.
+
+    The temporary file is unique to the call and lives next to ``path``, so
+    threads and processes writing the same file never share one.
+    """
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.", suffix='.tmp',
+                                    dir=os.path.dirname(path) or '.')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+def is_fresh(symbol, interval, max_age=None):
+    """Whether the cached partition was topped up within ``max_age`` (default its staleness window)."""
+    path = _path(symbol, interval)
+    if not os.path.exists(path):
+        return False
+    age = pd.Timedelta(seconds=time.time() - os.path.getmtime(path))
+    return age < (STALENESS.get(interval, DEFAULT_STALENESS) if max_age is None else max_age)
+
+def covers(df, period):
+    """Whether a cached history reaches back far enough to serve ``period``."""
+    if df is None or df.empty:
+        return False
+    covered_from = df.attrs.get('covered_from')
+    if covered_from == 'max':
+        return True
+    start = period_start(period)
+    if start is None or covered_from is None:
+        return False
+    return covered_from <= start
+
+def plan(symbol, period, interval, max_age=None):
+    """Return ``(cached, fetch_period)`` for a request.
+
+    ``fetch_period`` is None when the cache can serve the request as is, a short
+    period when only newer bars are needed, or ``period`` for a full download.
+    ``max_age`` overrides how long the cache is served without a top-up.
+    """
+    cached = load(symbol, interval)
+    if not covers(cached, period):
+        metrics.count('ohlcv_cache_miss')
+        return cached, period
+    if is_fresh(symbol, interval, max_age):
+        metrics.count('ohlcv_cache_hit')
+        return cached, None
+    metrics.count('ohlcv_cache_miss')
+    metrics.count('ohlcv_cache_topup')
+    return cached, top_up_period(cached.index[-1])
+
+def update(symbol, interval, cached, fresh, period):
+    """Merge freshly downloaded bars into the cached history and persist it."""
+    # Cached timestamps are compared with tz-aware period starts, so keep them in market time
+    fresh = to_market_time(fresh)
+    if cached is None or cached.empty:
+        merged = fresh
+    else:
+        cached = to_market_time(cached)
+        # Newer download wins for overlapping bars, e.g. a partial last bar
+        merged = pd.concat([cached[~cached.index.isin(fresh.index)], fresh]).sort_index()
+        merged.attrs = dict(cached.attrs)
+
+    start = period_start(period)
+    if period == 'max':
+        merged.attrs['covered_from'] = 'max'
+    elif start is not None and not covers(merged, period):
+        merged.attrs['covered_from'] = start
+
+    save(symbol, interval, merged)
+    return merged
+
+def slice_period(df, period):
+    """Return the rows of the cached history that fall inside ``period``.
+
+    Day periods keep the last sessions present in ``df``, as many as the
+    period counts, so a '5d' view on a Monday still holds five sessions.
+    """
+    if period in SESSION_PERIODS:
+        days = df.index.normalize()
+        return df[days >= days.unique()[-SESSION_PERIODS[period]:].min()] if len(df) else df
+    start = period_start(period)
+    if start is None:
+        return df
+    if df.index.tz is not None:
+        start = start.tz_convert(df.index.tz)
+    else:
+        start = start.tz_localize(None)
+    return df[df.index >= start]
@@ -0,0 +1,194 @@
+import time
+import numpy as np
+import pandas as pd
+
+from utils.kernels import ewm_mean, rolling_mean, rolling_std, rsi
+from utils.metrics import timed
+from utils.patterns import latest_patterns
+
+PANEL_FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+def align_frames(data, fields=PANEL_FIELDS, dtype=float):
+    """Align per-symbol OHLCV frames into one ``(field, time, symbol)`` array.
+
+    Returns ``(values, index, symbols)``: the array of ``dtype`` with NaN
+    where a symbol has no bar, the union DatetimeIndex and the symbols with
+    data, in ``data`` order.
+    """
+    symbols = [symbol for symbol, df in data.items() if df is not None and not df.empty]
+    index = data[symbols[0]].index if symbols else pd.DatetimeIndex([])
+    for symbol in symbols[1:]:
+        if not data[symbol].index.equals(index):
+            index = index.union(data[symbol].index)
+
+    values = np.full((len(fields), len(index), len(symbols)), np.nan, dtype=dtype)
+    for col, symbol in enumerate(symbols):
+        df = data[symbol]
+        rows = slice(None) if df.index.equals(index) else index.get_indexer(df.index)
+        for i, field in enumerate(fields):
+            values[i, rows, col] = df[field].to_numpy(dtype=dtype)
+    return values, index, symbols
+
+def build_panel(data, fields=PANEL_FIELDS):
+    """Align per-symbol OHLCV frames into wide (time x symbol) frames.
+
+    ``data`` maps symbol to a DataFrame as returned by ``get_stock_data``.
+    Returns a dict of field name to DataFrame sharing one DatetimeIndex, with
+    NaN where a symbol has no bar.
+    """
+    values, index, symbols = align_frames(data, fields)
+    columns = pd.Index(symbols, name='Symbol')
+    return {field: pd.DataFrame(values[i], index=index, columns=columns) for i, field in enumerate(fields)}
+
+class Compaction:
+    """Moves each column's valid rows to the bottom of a shorter array, in order, and back.
+
+    Symbols whose bars do not line up leave NaN rows in a panel, which the
+    kernels would treat as gaps. Run on the compacted array, they see each
+    symbol's own bars as ``add_indicators`` does on its frame. Every column
+    with data ends on the last compacted row.
+    """
+
+    def __init__(self, valid):
+        counts = valid.sum(axis=0)
+        self.shape = valid.shape
+        self.length = int(counts.max()) if counts.size else 0
+        self.aligned = bool(valid.all())
+        if not self.aligned:
+            self.rows, self.cols = np.nonzero(valid)
+            rank = np.cumsum(valid, axis=0)[self.rows, self.cols] - 1
+            self.targets = self.length - counts[self.cols] + rank
+
+    def compact(self, values):
+        """``(length x symbol)`` array of each column's valid rows, NaN above them."""
+        if self.aligned:
+            return values
+        out = np.full((self.length, self.shape[1]), np.nan)
+        out[self.targets, self.cols] = values[self.rows, self.cols]
+        return out
+
+    def expand(self, values, fill=np.nan):
+        """Inverse of ``compact``: values back on their panel rows, ``fill`` elsewhere."""
+        if self.aligned:
+            return values
+        out = np.full(self.shape, fill, dtype=np.result_type(values, np.asarray(fill)))
+        out[self.rows, self.cols] = values[self.targets, self.cols]
+        return out
+
+# Indicator columns produced together by one computation
+INDICATOR_GROUPS = {
+    'SMA': ('SMA_20', 'BB_Upper', 'BB_Middle', 'BB_Lower'),
+    'EMA': ('EMA_20',),
+    'RSI': ('RSI',),
+    'MACD': ('MACD', 'MACD_Signal', 'MACD_Hist'),
+}
+INDICATOR_COLUMNS = tuple(name for group in INDICATOR_GROUPS.values() for name in group)
+
+def indicator_group(name):
+    """Return the ``INDICATOR_GROUPS`` key that produces column ``name``, or None."""
+    for group, columns in INDICATOR_GROUPS.items():
+        if name in columns:
+            return group
+    return None
+
+@timed('indicators')
+def panel_indicators(close, groups=None, rsi_smoothing='sma'):
+    """Compute the ``add_indicators`` columns for every symbol of a close panel.
+
+    ``close`` is a (time x symbol) DataFrame. Returns a dict of indicator name
+    to a DataFrame of the same shape, NaN where a symbol has no close. Each
+    symbol's values are computed over its own bars, so they match
+    ``add_indicators`` on its frame. ``groups`` limits the work to some of
+    the ``INDICATOR_GROUPS`` and ``rsi_smoothing`` picks the RSI averaging
+    ('sma' or 'wilder').
+    """
+    groups = INDICATOR_GROUPS if groups is None else groups
+    values = close.to_numpy(dtype=float)
+    compaction = Compaction(~np.isnan(values))
+    values = compaction.compact(values)
+    columns = {}
+
+    if 'SMA' in groups:
+        sma = rolling_mean(values, 20)
+        std = rolling_std(values, 20)
+        columns['SMA_20'] = sma
+        columns['BB_Upper'] = sma + std * 2
+        columns['BB_Middle'] = sma
+        columns['BB_Lower'] = sma - std * 2
+    if 'EMA' in groups:
+        columns['EMA_20'] = ewm_mean(values, 20)
+    if 'RSI' in groups:
+        columns['RSI'] = rsi(values, smoothing=rsi_smoothing)
+    if 'MACD' in groups:
+        macd = ewm_mean(values, 12) - ewm_mean(values, 26)
+        macd_signal = ewm_mean(macd, 9)
+        columns['MACD'] = macd
+        columns['MACD_Signal'] = macd_signal
+        columns['MACD_Hist'] = macd - macd_signal
+
+    ordered = [name for name in INDICATOR_COLUMNS if name in columns]
+    return {name: pd.DataFrame(compaction.expand(columns[name]), index=close.index, columns=close.columns)
+            for name in ordered}
+
+def latest_snapshot(panel, indicators=None, groups=None, patterns=True):
+    """Return one row per symbol with its last bar's fields and indicators.
+
+    Besides the panel fields and indicators, the snapshot carries
+    ``Prev_Close`` (the symbol's previous bar) and ``Volume_SMA_20`` for
+    scoring and, with ``patterns``, the ``utils.patterns`` codes of the last
+    bar. Like the indicators, they look only at each symbol's own bars.
+    ``groups`` is passed to ``panel_indicators`` when ``indicators`` is not
+    given.
+    """
+    if indicators is None:
+        indicators = panel_indicators(panel['Close'], groups)
+    close = panel['Close'].to_numpy(dtype=float)
+    valid = ~np.isnan(close)
+    has_data = valid.any(axis=0)
+    symbols = panel['Close'].columns[has_data]
+    last = len(close) - 1 - np.argmax(valid[::-1], axis=0)[has_data]
+    cols = np.flatnonzero(has_data)
+
+    frames = {**panel, **indicators}
+    snapshot = {name: frame.to_numpy(dtype=float)[last, cols] for name, frame in frames.items()}
+
+    # Every symbol's last bar is the last compacted row, its previous bar the one above
+    compaction = Compaction(valid[:, cols])
+    compact = {field: compaction.compact(panel[field].to_numpy(dtype=float)[:, cols])
+               for field in ('Open', 'High', 'Low', 'Close', 'Volume')}
+    snapshot['Volume_SMA_20'] = rolling_mean(compact['Volume'], 20)[-1]
+    snapshot['Prev_Close'] = compact['Close'][-2] if compaction.length > 1 else np.full(len(cols), np.nan)
+    if patterns:
+        snapshot.update(latest_patterns(
+            *(compact[field] for field in ('Open', 'High', 'Low', 'Close')), np.full(len(cols), compaction.length - 1)
+        ))
+    return pd.DataFrame(snapshot, index=symbols)
+
+def benchmark(symbols=216, bars=63):
+    """Time the per-symbol ``add_indicators`` loop against the panel engine."""
+    from utils.fetch_engine import synthetic_ohlcv
+    from utils.indicators import add_indicators
+
+    data = {f"SYM{i}": synthetic_ohlcv(bars, seed=i) for i in range(symbols)}
+
+    start = time.perf_counter()
+    for df in data.values():
+        add_indicators(df)
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    panel = build_panel(data)
+    panel_indicators(panel['Close'])
+    panel_seconds = time.perf_counter() - start
+
+    return {
+        'symbols': symbols,
+        'bars': bars,
+        'loop_seconds': round(loop_seconds, 4),
+        'panel_seconds': round(panel_seconds, 4),
+        'speedup': round(loop_seconds / panel_seconds, 1),
+    }
+
+if __name__ == "__main__":
+    for symbols, bars in [(216, 63), (216, 250), (2000, 250)]:
+        print(benchmark(symbols, bars))
@@ -0,0 +1,178 @@
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from utils import metrics
+from utils.market_data import MarketData
+from utils.recommendation_engine import analyze_universe
+
+SCORING_FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+# Symbols per worker task; the vectorized panel scoring amortises its per-call overhead over a chunk
+CHUNK_SIZE = 250
+# float32 halves the shared panel. It resolves NSE's 5-paise tick below 5 lakh rupees, far above any
+# listed price, so only a close tied with an indicator to that precision can score differently
+SHARED_DTYPE = np.float32
+# Worker processes are recycled after this many chunks to bound their memory
+MAX_TASKS_PER_CHILD = 200
+
+_pool = None
+_pool_workers = None
+
+def get_pool(max_workers):
+    """Return the shared scoring process pool, starting it on first use."""
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != max_workers:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        # spawn avoids forking the threads of the Streamlit server
+        _pool = ProcessPoolExecutor(max_workers=max_workers,
+                                    mp_context=multiprocessing.get_context('spawn'),
+                                    max_tasks_per_child=MAX_TASKS_PER_CHILD)
+        _pool_workers = max_workers
+    return _pool
+
+def discard_pool(pool):
+    """Drop ``pool`` if it is still the shared one, so ``get_pool`` starts a new one.
+
+    A worker that dies (killed for memory, say) breaks its whole pool, and
+    every later submit to it would fail.
+    """
+    global _pool, _pool_workers
+    if _pool is pool:
+        _pool = _pool_workers = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def pack_chunk(data, symbols):
+    """Pack the frames of ``symbols`` into plain arrays for a worker.
+
+    Only the scoring fields are shipped, as one float64 block per symbol and
+    its index as int64 nanoseconds, which pickle far smaller than DataFrames.
+    """
+    packed = []
+    for symbol in symbols:
+        df = data[symbol]
+        index = df.index
+        tz = str(index.tz) if getattr(index, 'tz', None) is not None else None
+        packed.append((symbol, index.as_unit('ns').asi8, tz, df[list(SCORING_FIELDS)].to_numpy(dtype=np.float64)))
+    return packed
+
+def unpack_chunk(packed):
+    """Rebuild the frames packed by ``pack_chunk``."""
+    data = {}
+    for symbol, stamps, tz, values in packed:
+        index = pd.DatetimeIndex(stamps.view('datetime64[ns]'))
+        if tz is not None:
+            index = index.tz_localize('UTC').tz_convert(tz)
+        data[symbol] = pd.DataFrame(values, index=index, columns=SCORING_FIELDS)
+    return data
+
+def score_chunk(packed):
+    """Worker entry point: analyze one packed chunk of symbols.
+
+    Returns ``(results, seconds)`` so the parent can record the worker time.
+    """
+    start = time.perf_counter()
+    data = unpack_chunk(packed)
+    try:
+        results = analyze_universe(data)
+    except Exception:
+        results = []
+    return results, time.perf_counter() - start
+
+def score_shared_chunk(descriptor, symbols):
+    """Worker entry point: analyze ``symbols`` read from a shared ``MarketData`` block."""
+    start = time.perf_counter()
+    market_data = MarketData.attach(descriptor)
+    try:
+        chunk = market_data.take([symbol for symbol in symbols if symbol in market_data])
+    finally:
+        market_data.close()
+    try:
+        results = analyze_universe(panel=chunk.to_panel())
+    except Exception:
+        results = []
+    if chunk.values.dtype != np.float64:
+        # Prices are shown to the paisa; this drops float32's trailing digits (123.44999695 -> 123.45)
+        for result in results:
+            result['last_price'] = round(float(result['last_price']), 2)
+    return results, time.perf_counter() - start
+
+def score_universe(data, max_workers=None, chunk_size=CHUNK_SIZE, max_in_flight=None, shared=True):
+    """Analyze every symbol of ``data`` across worker processes.
+
+    Yields ``(done, total, results)`` as each chunk finishes, in completion
+    order, where ``results`` is that chunk's list of ``analyze_stock``-style
+    dicts. With ``shared`` the universe is copied once into shared memory
+    and workers read their chunk from it; otherwise each chunk is packed and
+    pickled to its worker, at most ``max_in_flight`` at a time so memory
+    stays bounded as the universe grows.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    symbols = list(data)
+    total = len(symbols)
+    chunks = [symbols[start:start + chunk_size] for start in range(0, total, chunk_size)]
+
+    # Small universes are cheaper to score in-process
+    if len(chunks) < 2 or max_workers == 1:
+        done = 0
+        for chunk in chunks:
+            done += len(chunk)
+            yield done, total, analyze_universe({symbol: data[symbol] for symbol in chunk})
+        return
+
+    pool = get_pool(max_workers)
+    max_in_flight = max_in_flight or 2 * max_workers
+    pending = {}
+    queued = iter(chunks)
+    done = 0
+
+    block = descriptor = None
+    if shared:
+        block, descriptor = MarketData.from_frames(data, dtype=SHARED_DTYPE).to_shared_memory()
+
+    try:
+        while True:
+            while len(pending) < max_in_flight:
+                chunk = next(queued, None)
+                if chunk is None:
+                    break
+                task = (score_shared_chunk, descriptor, chunk) if shared else (score_chunk, pack_chunk(data, chunk))
+                try:
+                    future = pool.submit(*task)
+                except BrokenProcessPool:
+                    discard_pool(pool)
+                    pool = get_pool(max_workers)
+                    future = pool.submit(*task)
+                pending[future] = (chunk, pool)
+            if not pending:
+                return
+
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                chunk, source = pending.pop(future)
+                done += len(chunk)
+                try:
+                    results, seconds = future.result()
+                    # Worker processes have their own registry; record their time here
+                    metrics.observe('scoring', seconds, metrics.chunk_label(chunk))
+                except BrokenProcessPool:
+                    # Later chunks go to a new pool; this one is scored here rather than lost
+                    metrics.count('scoring_pool_broken')
+                    discard_pool(source)
+                    if source is pool:
+                        pool = get_pool(max_workers)
+                    results = analyze_universe({symbol: data[symbol] for symbol in chunk})
+                except Exception:
+                    results = []
+                yield done, total, results
+    finally:
+        if block is not None:
+            # Queued chunks must attach before the block's name is released
+            wait(pending)
+            block.close()
+            block.unlink()
@@ -0,0 +1,165 @@
+"""Candlestick and swing-structure patterns over OHLC arrays.
+
+Every detector compares shifted copies of the Open/High/Low/Close arrays, so
+it runs over every bar of a single series or of a whole (time x symbol)
+panel in a few array operations. Patterns are int8 codes like the signals
+in ``utils.signals``: 1 for the bullish form, -1 for the bearish form, 0
+for none (a doji is 1 when present)::
+
+    python -m utils.patterns    # throughput on a synthetic 2000-symbol panel
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.kernels import rolling_max, rolling_min
+
+# Label of each pattern column, indexed by code + 1 (bearish form, none, bullish form)
+PATTERN_LABELS = {
+    'Engulfing': ('Bearish Engulfing', None, 'Bullish Engulfing'),
+    'Doji': (None, None, 'Doji'),
+    'Hammer': ('Shooting Star', None, 'Hammer'),
+    'Star': ('Evening Star', None, 'Morning Star'),
+    'Swing_Trend': ('Lower Highs and Lows', None, 'Higher Highs and Lows'),
+    'Breakout': ('Range Breakdown', None, 'Range Breakout'),
+}
+PATTERN_COLUMNS = tuple(PATTERN_LABELS)
+
+# A doji's body is at most this fraction of its range
+DOJI_BODY = 0.1
+# A hammer's lower shadow (a shooting star's upper one) is at least this many bodies long
+SHADOW_RATIO = 2.0
+# Bars over which a hammer needs a prior decline (a shooting star a prior rise)
+TREND_BARS = 5
+# A star's first candle has a body of at least half its range, its middle one at most 30% of that body
+STAR_BODY = 0.5
+STAR_MIDDLE = 0.3
+# Higher highs and lows compare the latest SWING_BARS bars with the SWING_BARS before them
+SWING_BARS = 5
+# A breakout closes beyond the range of the previous BREAKOUT_BARS bars
+BREAKOUT_BARS = 20
+# History any pattern looks at, including the bar itself
+PATTERN_BARS = max(3, TREND_BARS + 2, 2 * SWING_BARS, BREAKOUT_BARS + 1)
+
+def _shift(values, bars):
+    """``values`` moved ``bars`` rows later along axis 0, NaN at the start."""
+    out = np.full(values.shape, np.nan)
+    if bars < len(values):
+        out[bars:] = values[:len(values) - bars]
+    return out
+
+def _code(bullish, bearish):
+    return np.select([bullish, bearish], [1, -1], 0).astype(np.int8)
+
+def detect_patterns(open_, high, low, close):
+    """Pattern codes for every bar of 1-D series or 2-D (time x symbol) arrays.
+
+    Returns a dict of ``PATTERN_COLUMNS`` name to an int8 array of the
+    input shape. Patterns that would need a missing bar are 0.
+    """
+    open_, high, low, close = (np.asarray(values, dtype=float) for values in (open_, high, low, close))
+    body = close - open_
+    size = np.abs(body)
+    span = high - low
+    top = np.maximum(open_, close)
+    bottom = np.minimum(open_, close)
+    upper_shadow = high - top
+    lower_shadow = bottom - low
+
+    prev_open, prev_close, prev_body = _shift(open_, 1), _shift(close, 1), _shift(body, 1)
+    first_open, first_close, first_body = _shift(open_, 2), _shift(close, 2), _shift(body, 2)
+    first_span = _shift(span, 2)
+    middle_size, middle_top, middle_bottom = _shift(size, 1), _shift(top, 1), _shift(bottom, 1)
+    # Direction of the move into the previous bar
+    trend = prev_close - _shift(close, TREND_BARS + 1)
+
+    recent_high, recent_low = rolling_max(high, SWING_BARS), rolling_min(low, SWING_BARS)
+    range_high = _shift(rolling_max(high, BREAKOUT_BARS), 1)
+    range_low = _shift(rolling_min(low, BREAKOUT_BARS), 1)
+
+    with np.errstate(invalid='ignore'):
+        first_long = np.abs(first_body) >= STAR_BODY * first_span
+        middle_small = middle_size <= STAR_MIDDLE * np.abs(first_body)
+        first_midpoint = (first_open + first_close) / 2
+        small_wick = np.maximum(size, DOJI_BODY * span)
+        return {
+            'Engulfing': _code(
+                (prev_body < 0) & (body > 0) & (open_ <= prev_close) & (close >= prev_open) & (size > -prev_body),
+                (prev_body > 0) & (body < 0) & (open_ >= prev_close) & (close <= prev_open) & (size > prev_body),
+            ),
+            'Doji': ((span > 0) & (size <= DOJI_BODY * span)).astype(np.int8),
+            'Hammer': _code(
+                (span > 0) & (lower_shadow >= SHADOW_RATIO * size) & (upper_shadow <= small_wick) & (trend < 0),
+                (span > 0) & (upper_shadow >= SHADOW_RATIO * size) & (lower_shadow <= small_wick) & (trend > 0),
+            ),
+            'Star': _code(
+                (first_body < 0) & first_long & middle_small & (middle_top <= first_close)
+                & (body > 0) & (close > first_midpoint),
+                (first_body > 0) & first_long & middle_small & (middle_bottom >= first_close)
+                & (body < 0) & (close < first_midpoint),
+            ),
+            'Swing_Trend': _code(
+                (recent_high > _shift(recent_high, SWING_BARS)) & (recent_low > _shift(recent_low, SWING_BARS)),
+                (recent_high < _shift(recent_high, SWING_BARS)) & (recent_low < _shift(recent_low, SWING_BARS)),
+            ),
+            'Breakout': _code(close > range_high, close < range_low),
+        }
+
+def pattern_frame(df):
+    """Pattern codes for every bar of an OHLC DataFrame."""
+    codes = detect_patterns(*(df[column].to_numpy(dtype=float) for column in ('Open', 'High', 'Low', 'Close')))
+    return pd.DataFrame(codes, index=df.index)
+
+def latest_patterns(open_, high, low, close, last):
+    """Pattern codes of bar ``last[j]`` of column ``j`` of (time x symbol) arrays.
+
+    Only the ``PATTERN_BARS`` bars up to each symbol's bar are examined, so
+    the cost does not grow with the history length.
+    """
+    rows = np.asarray(last)[None, :] + np.arange(1 - PATTERN_BARS, 1)[:, None]
+    cols = np.arange(len(last))[None, :]
+    inside = rows >= 0
+    window = [np.where(inside, values[np.maximum(rows, 0), cols], np.nan) for values in (open_, high, low, close)]
+    return {name: codes[-1] for name, codes in detect_patterns(*window).items()}
+
+def describe_patterns(patterns):
+    """Comma-separated labels of the patterns in each row of a frame of pattern codes, or "None"."""
+    described = pd.Series('', index=patterns.index)
+    for column in PATTERN_COLUMNS:
+        labels = np.asarray(PATTERN_LABELS[column], dtype=object)[patterns[column].to_numpy(dtype=int) + 1]
+        present = pd.notna(labels)
+        described = described.where(~present, described + ', ' + labels.astype(str))
+    described = described.str[2:]
+    return described.where(described != '', "None")
+
+def benchmark(symbols=2000, bars=250, repeat=3):
+    """Bars per second of ``detect_patterns`` over a whole panel, and of the latest-bar path."""
+    from utils.fetch_engine import synthetic_ohlcv
+    from utils.panel import build_panel
+
+    panel = build_panel({f"SYM{i:04d}": synthetic_ohlcv(bars, seed=i) for i in range(symbols)})
+    arrays = [panel[column].to_numpy(dtype=float) for column in ('Open', 'High', 'Low', 'Close')]
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        codes = detect_patterns(*arrays)
+    panel_seconds = (time.perf_counter() - start) / repeat
+
+    last = np.full(symbols, bars - 1)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        latest_patterns(*arrays, last)
+    latest_seconds = (time.perf_counter() - start) / repeat
+
+    return {
+        'symbols': symbols,
+        'bars': bars,
+        'panel_seconds': round(panel_seconds, 4),
+        'bars_per_second': round(symbols * bars / panel_seconds),
+        'latest_seconds': round(latest_seconds, 4),
+        'patterns_found': {name: int(np.count_nonzero(values)) for name, values in codes.items()},
+    }
+
+if __name__ == "__main__":
+    print(benchmark())
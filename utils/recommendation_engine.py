@@ -1,7 +1,10 @@
 import pandas as pd
 import numpy as np
 from utils.indicators import add_indicators
-from utils.signals import generate_signals, get_signal_summary
+from utils.signals import generate_signals, get_signal_summary, signal_codes, get_signal_summaries
+from utils.panel import build_panel, latest_snapshot
+from utils.patterns import PATTERN_COLUMNS
+from utils.metrics import timed
 
 def calculate_technical_score(df):
     """Calculate technical analysis score based on multiple indicators."""
@@ -42,6 +45,18 @@ def calculate_technical_score(df):
         
     return max(min(score, 100), -100)  # Normalize between -100 and 100
 
+def calculate_technical_scores(snapshot):
+    """Vectorized ``calculate_technical_score`` over a ``latest_snapshot`` frame."""
+    close = snapshot['Close']
+    score = (
+        np.select([snapshot['RSI'] < 30, snapshot['RSI'] > 70], [20, -20], 10)
+        + np.select([snapshot['MACD'] > snapshot['MACD_Signal'], snapshot['MACD'] < snapshot['MACD_Signal']], [20, -20], 0)
+        + np.where(close > snapshot['SMA_20'], 15, -15)
+        + np.select([close < snapshot['BB_Lower'], close > snapshot['BB_Upper']], [15, -15], 0)
+        + np.where(snapshot['Volume'] > snapshot['Volume_SMA_20'] * 1.5, 10, 0)
+    )
+    return pd.Series(np.clip(score, -100, 100), index=snapshot.index)
+
 def get_recommendation(score):
     """Convert technical score to recommendation."""
     if score >= 50:
@@ -65,14 +80,15 @@ def get_confidence_level(score):
     else:
         return 'Low'
 
+@timed('scoring', label_arg=0)
 def analyze_stock(symbol, df):
     """Generate comprehensive stock analysis and recommendation."""
     try:
         # Add technical indicators
         df = add_indicators(df)
         
-        # Generate signals
-        signals = generate_signals(df)
+        # Generate signals (only the latest bar is summarised)
+        signals = generate_signals(df, latest_only=True)
         signal_summary = get_signal_summary(signals)
         
         # Calculate technical score
@@ -93,3 +109,79 @@ def analyze_stock(symbol, df):
         }
     except Exception as e:
         return None
+
+@timed('scoring')
+def analyze_universe(data=None, panel=None):
+    """Run ``analyze_stock`` for every symbol at once from one panel.
+
+    ``data`` maps symbol to an OHLCV DataFrame; a prebuilt ``panel`` (for
+    example ``MarketData.to_panel()``) can be passed instead. Returns the list
+    of analysis dicts, skipping symbols with fewer than two bars.
+    """
+    panel = build_panel(data) if panel is None else panel
+    snapshot = latest_snapshot(panel)
+    snapshot = snapshot[snapshot['Prev_Close'].notna()]
+    scores = calculate_technical_scores(snapshot)
+    summaries = get_signal_summaries(pd.concat([signal_codes(snapshot), snapshot[list(PATTERN_COLUMNS)]], axis=1))
+    price_change = ((snapshot['Close'] / snapshot['Prev_Close']) - 1) * 100
+
+    return [
+        {
+            'symbol': symbol,
+            'recommendation': get_recommendation(score),
+            'technical_score': score,
+            'confidence': get_confidence_level(score),
+            'signal_summary': summaries[symbol],
+            'last_price': snapshot.at[symbol, 'Close'],
+            'price_change': price_change[symbol]
+        }
+        for symbol, score in scores.items()
+    ]
+
+# Reasons listed in the recommendation table, as (reason, summary key, summary value)
+BASIS_SIGNALS = (
+    ("Oversold (RSI)", 'RSI', 'Oversold'),
+    ("Bullish MACD crossover", 'MACD', 'Buy'),
+    ("Above key moving averages", 'Moving Average', 'Bullish'),
+)
+
+def recommendation_basis(recommendations):
+    """Vectorized "Basis" column for a frame of ``analyze_stock`` results.
+
+    Lists the reasons behind each recommendation, comma-separated, or
+    "Multiple factors" when none apply.
+    """
+    summaries = pd.DataFrame(list(recommendations['signal_summary']), index=recommendations.index)
+    flags = [("Strong technical indicators", recommendations['technical_score'].round(2) > 50)]
+    for reason, key, value in BASIS_SIGNALS:
+        column = summaries[key] if key in summaries else pd.Series(None, index=summaries.index)
+        flags.append((reason, column == value))
+
+    basis = pd.Series('', index=recommendations.index)
+    for reason, flag in flags:
+        basis = basis.where(~flag.to_numpy(dtype=bool), basis + ', ' + reason)
+    basis = basis.str[2:]
+    return basis.where(basis != '', "Multiple factors")
+
+def stream_recommendations(symbols, period='3mo', interval='1d', max_workers=None, **fetch_options):
+    """Fetch and analyze ``symbols``, yielding results as each fetch chunk lands.
+
+    Yields ``(done, total, results)`` where ``results`` is the list of
+    ``analyze_stock``-style dicts for that chunk, so callers can show ranked
+    partial results long before the whole universe has been fetched. Each
+    fetched batch is scored by ``parallel.score_universe``, which spreads
+    large ones (typically the cached bulk of the universe, served first)
+    over ``max_workers`` processes and scores small ones in-process.
+    ``fetch_options`` are passed to ``iter_stock_data_bulk``.
+    """
+    from utils.parallel import score_universe
+    from utils.stock_data import iter_stock_data_bulk
+
+    for done, total, data, errors in iter_stock_data_bulk(symbols, period, interval, **fetch_options):
+        if not data:
+            yield done, total, []
+            continue
+        # Progress within the batch; its failed symbols count once it is scored
+        start = done - len(data) - len(errors)
+        for scored, _, results in score_universe(data, max_workers):
+            yield (done if scored == len(data) else start + scored), total, results
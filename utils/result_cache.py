@@ -0,0 +1,173 @@
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import pandas as pd
+
+from utils import metrics
+from utils.market_hours import IST, is_market_open, next_session_close, next_session_open
+from utils.ohlcv_cache import DEFAULT_STALENESS, STALENESS
+
+MAX_ENTRIES = int(os.environ.get('NSE_RESULT_CACHE_ENTRIES', 1024))
+MAX_BYTES = int(os.environ.get('NSE_RESULT_CACHE_MB', 256)) * 2**20
+DAILY_INTERVALS = ('1d', '5d', '1wk', '1mo', '3mo')
+
+def ttl_for_interval(interval, now=None):
+    """Seconds a result computed from ``interval`` bars stays valid.
+
+    Intraday results expire after one bar. Daily and longer bars only change
+    while a session runs: during one they expire at the close (or after the
+    interval's staleness, if sooner), outside one at the next open.
+    """
+    if interval not in DAILY_INTERVALS:
+        return STALENESS.get(interval, DEFAULT_STALENESS).total_seconds()
+    now = (now or datetime.now(IST)).astimezone(IST)
+    if is_market_open(now):
+        until_close = (next_session_close(now) - now).total_seconds()
+        return min(until_close, STALENESS.get(interval, DEFAULT_STALENESS).total_seconds())
+    return (next_session_open(now) - now).total_seconds()
+
+def cache_key(kind, *parts, **params):
+    """Key for ``kind`` of result from ``parts`` plus a short hash of ``params``."""
+    if not params:
+        return (kind, *parts)
+    digest = hashlib.sha1(repr(sorted(params.items())).encode()).hexdigest()[:12]
+    return (kind, *parts, digest)
+
+def sizeof(value):
+    """Approximate memory held by a cached value."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(index=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(sizeof(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(item) for item in value.values())
+    return sys.getsizeof(value)
+
+class _Flight:
+    """A computation in progress that concurrent callers of the same key wait for."""
+
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class ResultCache:
+    """Process-wide LRU cache of computed results with per-entry TTLs.
+
+    Entries are evicted least recently used first once there are more than
+    ``max_entries`` or they hold more than ``max_bytes``. Concurrent misses
+    on one key run the computation once; the other callers wait for its
+    result. Cached values are shared between sessions and must not be
+    mutated by callers.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES, name='result_cache'):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.name = name
+        self.entries = OrderedDict()
+        self.flights = {}
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'waits': 0, 'evictions': 0}
+
+    def _lookup(self, key):
+        """Return the live entry for ``key`` and count a hit, or None. Call with the lock held."""
+        entry = self.entries.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            return None
+        self.entries.move_to_end(key)
+        self.stats['hits'] += 1
+        metrics.count(f"{self.name}_hit")
+        return entry
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self._lookup(key)
+        return entry[0] if entry is not None else default
+
+    def put(self, key, value, ttl):
+        size = sizeof(value)
+        with self.lock:
+            self._remove(key)
+            if size > self.max_bytes:
+                return
+            self.entries[key] = (value, time.monotonic() + ttl, size)
+            self.bytes += size
+            while self.entries and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+                self._remove(next(iter(self.entries)))
+                self.stats['evictions'] += 1
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+    def get_or_compute(self, key, compute, ttl, cache_if=None):
+        """Return the cached value for ``key``, computing and storing it on a miss.
+
+        ``ttl`` is in seconds. Results for which ``cache_if(value)`` is false
+        (for example error tuples) are returned but not stored.
+        """
+        with self.lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry[0]
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = _Flight()
+                self.stats['misses'] += 1
+            else:
+                self.stats['waits'] += 1
+
+        if not leader:
+            # Another caller is computing this key already
+            flight.done.wait()
+            metrics.count(f"{self.name}_hit")
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        metrics.count(f"{self.name}_miss")
+        try:
+            flight.value = compute()
+            if cache_if is None or cache_if(flight.value):
+                self.put(key, flight.value, ttl)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+
+    def invalidate(self, kind=None):
+        """Drop every entry, or only those whose key starts with ``kind``."""
+        with self.lock:
+            for key in [key for key in self.entries if kind is None or key[0] == kind]:
+                self._remove(key)
+
+    def info(self):
+        with self.lock:
+            return dict(self.stats, entries=len(self.entries), bytes=self.bytes)
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_result_cache():
+    """Return the process-wide result cache shared by every page session."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache()
+    return _cache
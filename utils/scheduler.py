@@ -0,0 +1,229 @@
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from utils.correlation import CORRELATION_PERIOD, update_correlation_index
+from utils.engine import SCREEN_PERIOD
+from utils.market_hours import IST, is_market_open, last_session_close, next_session_open
+from utils.metadata_store import get_metadata_store
+from utils.ohlcv_cache import period_start, slice_period, write_atomic
+from utils.panel import build_panel, latest_snapshot
+from utils.recommendation_engine import analyze_universe
+from utils.result_cache import get_result_cache
+from utils.stock_data import get_stock_data_bulk
+
+SYMBOLS_FILE = "attached_assets/symbol.csv"
+RESULTS_DIR = os.environ.get('NSE_RESULTS_DIR', os.path.join('.cache', 'results'))
+REFRESH_PERIOD = SCREEN_PERIOD
+SESSION_REFRESH_SECONDS = 5 * 60
+# A symbol refreshed more recently than this is not re-queued by request_priority
+PRIORITY_MIN_AGE = timedelta(minutes=1)
+BACKGROUND_REFRESH = os.environ.get('NSE_BACKGROUND_REFRESH', '1') != '0'
+
+# Symbol lists are keyed by file modification time, so this only bounds memory
+SYMBOLS_TTL = 24 * 60 * 60
+
+def load_symbols(path=SYMBOLS_FILE):
+    """Read the symbol universe from the CSV file, re-reading it only when it changes."""
+    def read():
+        symbols = pd.read_csv(path, names=['Symbol'], skiprows=1)
+        return symbols['Symbol'].dropna().tolist()
+    return get_result_cache().get_or_compute(('symbols', path, os.path.getmtime(path)), read, SYMBOLS_TTL)
+
+def seconds_until_refresh(last_refresh, now=None):
+    """How long to wait before the next universe refresh.
+
+    During a session the universe is refreshed every
+    ``SESSION_REFRESH_SECONDS``; outside it, once the last session's daily
+    bars have settled and then not again until the next open.
+    """
+    now = (now or datetime.now(IST)).astimezone(IST)
+    if last_refresh is None:
+        return 0
+    if is_market_open(now):
+        return max(0, SESSION_REFRESH_SECONDS - (now - last_refresh).total_seconds())
+    settled = last_session_close(now)
+    if last_refresh < settled:
+        return max(0, (settled - now).total_seconds())
+    return (next_session_open(now) - now).total_seconds()
+
+class ResultStore:
+    """Named results shared between the scheduler and every page session.
+
+    Values are kept in memory and mirrored to pickle files in ``directory``,
+    so results published by a scheduler in another process are picked up too.
+    """
+
+    def __init__(self, directory=RESULTS_DIR):
+        self.directory = directory
+        self.entries = {}
+        self.mtimes = {}
+        self.lock = threading.Lock()
+
+    def _path(self, name):
+        return os.path.join(self.directory, f"{name}.pkl")
+
+    def publish(self, name, value):
+        published = datetime.now(IST)
+        with self.lock:
+            self.entries[name] = (value, published)
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            write_atomic(self._path(name), lambda tmp_path: pd.to_pickle((value, published), tmp_path))
+            with self.lock:
+                self.mtimes[name] = os.path.getmtime(self._path(name))
+        return published
+
+    def get(self, name):
+        """Return ``(value, published_at)``, or ``(None, None)`` if never published."""
+        with self.lock:
+            entry = self.entries.get(name)
+        path = self._path(name) if self.directory else None
+        if path and os.path.exists(path):
+            # Another process may have published a newer file
+            modified = os.path.getmtime(path)
+            if entry is None or modified != self.mtimes.get(name):
+                try:
+                    entry = pd.read_pickle(path)
+                    with self.lock:
+                        self.entries[name] = entry
+                        self.mtimes[name] = modified
+                except Exception:
+                    pass
+        return entry if entry is not None else (None, None)
+
+    def last_refresh(self, name):
+        return self.get(name)[1]
+
+class RefreshScheduler(threading.Thread):
+    """Daemon thread that keeps precomputed universe results up to date.
+
+    Publishes ``recommendations`` (``analyze_stock``-style dicts) and
+    ``snapshot`` (the latest-bar indicator frame) to ``store``, plus
+    per-symbol refresh times under ``symbol_refresh``; the time of the last
+    full run is ``store.last_refresh('universe_refresh')``. Full runs also
+    update the return ``correlation`` index and prefetch expired company
+    metadata. Symbols passed to ``request_priority`` are refreshed ahead of
+    the schedule.
+    """
+
+    def __init__(self, store=None, symbols=None, period=REFRESH_PERIOD):
+        super().__init__(name='universe-refresh', daemon=True)
+        self.store = store or ResultStore()
+        self.symbols = symbols
+        self.period = period
+        self.priority = []
+        self.wakeup = threading.Condition()
+        self.stopped = False
+        self.last_error = None
+
+    def request_priority(self, symbols):
+        """Refresh ``symbols`` as soon as possible, ahead of the next full run."""
+        symbol_refresh, _ = self.store.get('symbol_refresh')
+        recent = datetime.now(IST) - PRIORITY_MIN_AGE
+        with self.wakeup:
+            for symbol in symbols:
+                refreshed = (symbol_refresh or {}).get(symbol)
+                if symbol not in self.priority and (refreshed is None or refreshed < recent):
+                    self.priority.append(symbol)
+            if self.priority:
+                self.wakeup.notify()
+
+    def stop(self):
+        with self.wakeup:
+            self.stopped = True
+            self.wakeup.notify()
+
+    def refresh(self, symbols, full=False):
+        """Fetch and analyze ``symbols``, merging them into the published results."""
+        # The daily cache is served for hours; during a session every refresh tops it up
+        max_age = pd.Timedelta(0) if is_market_open() else None
+        # Full runs feed the correlation index, which needs a longer history than the scoring
+        history = self.period
+        start = period_start(self.period)
+        if full and start is not None and period_start(CORRELATION_PERIOD) < start:
+            history = CORRELATION_PERIOD
+        data, _ = get_stock_data_bulk(symbols, period=history, interval='1d', max_age=max_age)
+        if not data:
+            return
+        panel = build_panel(data)
+        closes = panel['Close']
+        if history != self.period:
+            data = {symbol: slice_period(df, self.period) for symbol, df in data.items()}
+            panel = build_panel(data)
+        snapshot = latest_snapshot(panel)
+        results = analyze_universe(data)
+        refreshed = datetime.now(IST)
+
+        previous_snapshot, _ = self.store.get('snapshot')
+        if previous_snapshot is not None:
+            snapshot = pd.concat([previous_snapshot.drop(snapshot.index, errors='ignore'), snapshot])
+        previous_results, _ = self.store.get('recommendations')
+        if previous_results:
+            results = [r for r in previous_results if r['symbol'] not in data] + results
+        symbol_refresh, _ = self.store.get('symbol_refresh')
+        symbol_refresh = dict(symbol_refresh or {}, **{symbol: refreshed for symbol in data})
+
+        self.store.publish('snapshot', snapshot)
+        self.store.publish('recommendations', results)
+        self.store.publish('symbol_refresh', symbol_refresh)
+        if full:
+            # Today's bar is revised in place until the next session adds a new one
+            correlation, _ = self.store.get('correlation')
+            self.store.publish('correlation', update_correlation_index(correlation, closes))
+            self.store.publish('universe_refresh', refreshed)
+
+        # Market caps follow the new closes; other company fields are fetched once they expire
+        metadata = get_metadata_store()
+        metadata.update_prices(data)
+        if full:
+            metadata.prefetch(symbols)
+
+    def run(self):
+        while True:
+            with self.wakeup:
+                delay = seconds_until_refresh(self.store.last_refresh('universe_refresh'))
+                if not self.priority and delay > 0 and not self.stopped:
+                    self.wakeup.wait(timeout=delay)
+                if self.stopped:
+                    return
+                priority, self.priority = self.priority, []
+
+            try:
+                if priority:
+                    self.refresh(priority)
+                elif seconds_until_refresh(self.store.last_refresh('universe_refresh')) <= 0:
+                    self.refresh(self.symbols or load_symbols(), full=True)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                # Back off before retrying a failed refresh
+                with self.wakeup:
+                    self.wakeup.wait(timeout=60)
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_store():
+    """Return the shared result store, starting the background scheduler if enabled."""
+    scheduler = get_scheduler()
+    return scheduler.store if scheduler else ResultStore()
+
+def get_scheduler():
+    """Return the process-wide scheduler, starting it on first use, or None if disabled."""
+    global _scheduler
+    if not BACKGROUND_REFRESH:
+        return None
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RefreshScheduler()
+            _scheduler.start()
+    return _scheduler
+
+if __name__ == "__main__":
+    # Run the scheduler in its own process; pages read its results from RESULTS_DIR
+    scheduler = RefreshScheduler()
+    scheduler.start()
+    scheduler.join()
@@ -0,0 +1,381 @@
+import re
+import numpy as np
+import pandas as pd
+from utils.panel import INDICATOR_COLUMNS, indicator_group, latest_snapshot
+from utils.patterns import PATTERN_COLUMNS
+
+# Snapshot columns that need no indicator computation
+BASE_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume', 'Prev_Close', 'Volume_SMA_20')
+COLUMNS = BASE_COLUMNS + INDICATOR_COLUMNS + PATTERN_COLUMNS
+COLUMN_NAMES = {name.lower(): name for name in COLUMNS}
+# Pseudo indicator group of the price-action pattern columns
+PATTERN_GROUP = 'PATTERN'
+
+# Relative cost of computing each indicator group across the panel
+GROUP_COSTS = {None: 0, 'SMA': 1, 'RSI': 2, 'EMA': 2, 'MACD': 4, PATTERN_GROUP: 1}
+
+# The screener's original fixed criteria, as rule expressions
+PRESET_RULES = {
+    'RSI_Oversold': 'RSI < 30',
+    'RSI_Overbought': 'RSI > 70',
+    'Above_SMA20': 'Close > SMA_20',
+    'Below_SMA20': 'Close < SMA_20',
+    'MACD_Bullish': 'MACD > MACD_Signal',
+    'MACD_Bearish': 'MACD < MACD_Signal',
+}
+# Price-action presets, on the utils.patterns codes of the latest bar
+PATTERN_RULES = {
+    'Bullish_Engulfing': 'Engulfing > 0',
+    'Bearish_Engulfing': 'Engulfing < 0',
+    'Doji': 'Doji > 0',
+    'Hammer': 'Hammer > 0',
+    'Shooting_Star': 'Hammer < 0',
+    'Morning_Star': 'Star > 0',
+    'Evening_Star': 'Star < 0',
+    'Higher_Highs_Lows': 'Swing_Trend > 0',
+    'Lower_Highs_Lows': 'Swing_Trend < 0',
+    'Range_Breakout': 'Breakout > 0',
+    'Range_Breakdown': 'Breakout < 0',
+}
+PRESET_RULES.update(PATTERN_RULES)
+
+COMPARATORS = {
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '==': np.equal,
+    '!=': np.not_equal,
+}
+ARITHMETIC = {'+': np.add, '-': np.subtract, '*': np.multiply, '/': np.divide}
+PRECEDENCE = {'+': 1, '-': 1, '*': 2, '/': 2}
+
+TOKEN_PATTERN = re.compile(r'\s*(?:(\d+(?:\.\d*)?|\.\d+)|([A-Za-z_][A-Za-z0-9_]*)|(<=|>=|==|!=|[<>()+\-*/]))')
+
+class RuleError(ValueError):
+    """Raised when a screening rule cannot be parsed."""
+
+def column_group(name):
+    """Group computed together with column ``name``: an indicator group, ``PATTERN_GROUP`` or None."""
+    return PATTERN_GROUP if name in PATTERN_COLUMNS else indicator_group(name)
+
+class Evaluation:
+    """Latest-bar values for a panel, computed lazily per indicator group and symbol."""
+
+    def __init__(self, panel):
+        self.panel = panel
+        self.symbols = panel['Close'].columns[panel['Close'].notna().any()]
+        self.values = {}
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Evaluate against a precomputed ``latest_snapshot`` frame without a panel."""
+        evaluation = cls.__new__(cls)
+        evaluation.panel = None
+        evaluation.symbols = snapshot.index
+        evaluation.values = {name: snapshot[name] for name in snapshot.columns}
+        return evaluation
+
+    def column(self, name, symbols):
+        """Return column ``name`` for ``symbols``, computing only what is missing."""
+        group = column_group(name)
+        known = self.values.get(name)
+        missing = symbols if known is None else symbols.difference(known.index)
+        if len(missing):
+            subset = {field: frame[missing] for field, frame in self.panel.items()}
+            indicator_groups = [group] if group and group != PATTERN_GROUP else []
+            snapshot = latest_snapshot(subset, groups=indicator_groups, patterns=group == PATTERN_GROUP)
+            for column in snapshot.columns:
+                known = self.values.get(column)
+                if known is None:
+                    self.values[column] = snapshot[column]
+                else:
+                    fresh = snapshot[column][~snapshot.index.isin(known.index)]
+                    self.values[column] = pd.concat([known, fresh])
+        return self.values[name].reindex(symbols)
+
+class Field:
+    def __init__(self, name):
+        if name.lower() not in COLUMN_NAMES:
+            raise RuleError(f"Unknown field '{name}'. Available: {', '.join(COLUMNS)}")
+        self.name = COLUMN_NAMES[name.lower()]
+
+    @property
+    def groups(self):
+        return {column_group(self.name)} - {None}
+
+    def values(self, evaluation, symbols):
+        return evaluation.column(self.name, symbols).to_numpy()
+
+    def __str__(self):
+        return self.name
+
+class Number:
+    groups = frozenset()
+
+    def __init__(self, value):
+        self.value = value
+
+    def values(self, evaluation, symbols):
+        return self.value
+
+    def __str__(self):
+        return f"{self.value:g}"
+
+class Arithmetic:
+    def __init__(self, op, left, right):
+        self.op, self.left, self.right = op, left, right
+
+    @property
+    def groups(self):
+        return self.left.groups | self.right.groups
+
+    def values(self, evaluation, symbols):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return ARITHMETIC[self.op](self.left.values(evaluation, symbols),
+                                       self.right.values(evaluation, symbols))
+
+    def __str__(self):
+        # Parenthesise only where precedence or left associativity needs it
+        left, right = str(self.left), str(self.right)
+        if isinstance(self.left, Arithmetic) and PRECEDENCE[self.left.op] < PRECEDENCE[self.op]:
+            left = f"({left})"
+        if isinstance(self.right, Arithmetic) and PRECEDENCE[self.right.op] <= PRECEDENCE[self.op]:
+            right = f"({right})"
+        return f"{left} {self.op} {right}"
+
+class Predicate:
+    """Base class of the boolean rule nodes."""
+
+    @property
+    def cost(self):
+        return sum(GROUP_COSTS[group] for group in self.groups)
+
+    def mask(self, evaluation, symbols):
+        """Boolean array over ``symbols``."""
+        raise NotImplementedError
+
+    def known(self, evaluation, symbols):
+        """Boolean array over ``symbols``, False where a value the predicate reads is missing."""
+        raise NotImplementedError
+
+class Compare(Predicate):
+    def __init__(self, op, left, right):
+        self.op, self.left, self.right = op, left, right
+
+    @property
+    def groups(self):
+        return self.left.groups | self.right.groups
+
+    def mask(self, evaluation, symbols):
+        left = self.left.values(evaluation, symbols)
+        right = self.right.values(evaluation, symbols)
+        with np.errstate(invalid='ignore'):
+            return np.broadcast_to(COMPARATORS[self.op](left, right), (len(symbols),))
+
+    def known(self, evaluation, symbols):
+        left = self.left.values(evaluation, symbols)
+        right = self.right.values(evaluation, symbols)
+        return np.broadcast_to(~np.isnan(left) & ~np.isnan(right), (len(symbols),))
+
+    def __str__(self):
+        return f"{self.left} {self.op} {self.right}"
+
+class Not(Predicate):
+    def __init__(self, operand):
+        self.operand = operand
+
+    @property
+    def groups(self):
+        return self.operand.groups
+
+    def mask(self, evaluation, symbols):
+        # A comparison with a missing value is false either way, so NOT RSI < 30 skips a NaN RSI
+        return ~self.operand.mask(evaluation, symbols) & self.operand.known(evaluation, symbols)
+
+    def known(self, evaluation, symbols):
+        return self.operand.known(evaluation, symbols)
+
+    def __str__(self):
+        return f"NOT ({self.operand})"
+
+class All(Predicate):
+    """AND of several predicates, evaluated cheapest first on the survivors only."""
+
+    joiner = 'AND'
+
+    def __init__(self, operands):
+        # Cheap predicates first so expensive indicators see fewer symbols
+        self.operands = sorted(operands, key=lambda operand: operand.cost)
+
+    @property
+    def groups(self):
+        return set().union(*(operand.groups for operand in self.operands))
+
+    def mask(self, evaluation, symbols):
+        result = np.ones(len(symbols), dtype=bool)
+        for operand in self.operands:
+            active = np.flatnonzero(result)
+            if not len(active):
+                break
+            result[active] = operand.mask(evaluation, symbols[active])
+        return result
+
+    def known(self, evaluation, symbols):
+        return np.logical_and.reduce([operand.known(evaluation, symbols) for operand in self.operands])
+
+    def __str__(self):
+        return f" {self.joiner} ".join(f"({operand})" for operand in self.operands)
+
+class Any(All):
+    """OR of several predicates, evaluated cheapest first on the undecided only."""
+
+    joiner = 'OR'
+
+    def mask(self, evaluation, symbols):
+        result = np.zeros(len(symbols), dtype=bool)
+        for operand in self.operands:
+            pending = np.flatnonzero(~result)
+            if not len(pending):
+                break
+            result[pending] = operand.mask(evaluation, symbols[pending])
+        return result
+
+class Parser:
+    """Recursive-descent parser for rules like ``RSI < 30 AND NOT Close > BB_Upper``."""
+
+    def __init__(self, text):
+        self.tokens = []
+        position = 0
+        text = text.rstrip()
+        while position < len(text):
+            match = TOKEN_PATTERN.match(text, position)
+            if not match:
+                raise RuleError(f"Unexpected character at position {position}: {text[position:]!r}")
+            number, word, symbol = match.groups()
+            if number is not None:
+                self.tokens.append(('number', float(number)))
+            elif word is not None and word.upper() in ('AND', 'OR', 'NOT'):
+                self.tokens.append((word.upper(), word.upper()))
+            elif word is not None:
+                self.tokens.append(('name', word))
+            else:
+                self.tokens.append((symbol, symbol))
+            position = match.end()
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position][0] if self.position < len(self.tokens) else None
+
+    def take(self, kind=None):
+        if self.position >= len(self.tokens):
+            raise RuleError("Unexpected end of rule")
+        token = self.tokens[self.position]
+        if kind is not None and token[0] != kind:
+            raise RuleError(f"Expected {kind} but found {token[1]!r}")
+        self.position += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            raise RuleError("Empty rule")
+        node = self.or_expr()
+        if self.position != len(self.tokens):
+            raise RuleError(f"Unexpected {self.tokens[self.position][1]!r}")
+        return node
+
+    def or_expr(self):
+        operands = [self.and_expr()]
+        while self.peek() == 'OR':
+            self.take()
+            operands.append(self.and_expr())
+        return operands[0] if len(operands) == 1 else Any(operands)
+
+    def and_expr(self):
+        operands = [self.not_expr()]
+        while self.peek() == 'AND':
+            self.take()
+            operands.append(self.not_expr())
+        return operands[0] if len(operands) == 1 else All(operands)
+
+    def not_expr(self):
+        if self.peek() == 'NOT':
+            self.take()
+            return Not(self.not_expr())
+        if self.peek() == '(':
+            # A parenthesised condition, unless it turns out to open an arithmetic expression
+            start = self.position
+            self.take()
+            try:
+                node = self.or_expr()
+                self.take(')')
+            except RuleError as error:
+                self.position = start
+                try:
+                    return self.comparison()
+                except RuleError:
+                    raise error from None
+            if self.peek() not in COMPARATORS and self.peek() not in ARITHMETIC:
+                return node
+            self.position = start
+        return self.comparison()
+
+    def comparison(self):
+        left = self.sum()
+        if self.peek() not in COMPARATORS:
+            raise RuleError(f"Expected a comparison after '{left}'")
+        op = self.take()[0]
+        return Compare(op, left, self.sum())
+
+    def sum(self):
+        node = self.product()
+        while self.peek() in ('+', '-'):
+            node = Arithmetic(self.take()[0], node, self.product())
+        return node
+
+    def product(self):
+        node = self.operand()
+        while self.peek() in ('*', '/'):
+            node = Arithmetic(self.take()[0], node, self.operand())
+        return node
+
+    def operand(self):
+        kind, value = self.take()
+        if kind == 'number':
+            return Number(value)
+        if kind == 'name':
+            return Field(value)
+        if kind == '-' and self.peek() == 'number':
+            return Number(-self.take()[1])
+        if kind == '(':
+            node = self.sum()
+            self.take(')')
+            return node
+        raise RuleError(f"Expected a field or number but found {value!r}")
+
+def compile_rule(rule):
+    """Parse a rule expression once into a predicate tree.
+
+    ``rule`` may be an expression string, a list of expressions or
+    ``PRESET_RULES`` names (combined with AND), or an already compiled rule.
+    """
+    if isinstance(rule, Predicate):
+        return rule
+    if isinstance(rule, (list, tuple)):
+        if not rule:
+            raise RuleError("Empty rule")
+        nodes = [compile_rule(PRESET_RULES.get(part, part)) for part in rule]
+        return nodes[0] if len(nodes) == 1 else All(nodes)
+    return Parser(PRESET_RULES.get(rule, rule)).parse()
+
+def evaluate_rule(rule, panel, evaluation=None):
+    """Return the symbols of ``panel`` whose latest bar satisfies ``rule``.
+
+    Indicators are only computed for the groups the rule references, and
+    only for the symbols still undecided when each predicate runs. Pass
+    ``panel=None`` with ``Evaluation.from_snapshot`` to use precomputed values.
+    """
+    rule = compile_rule(rule)
+    evaluation = evaluation or Evaluation(panel)
+    symbols = evaluation.symbols
+    return symbols[rule.mask(evaluation, symbols)]
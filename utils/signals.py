@@ -1,52 +1,128 @@
 import numpy as np
 import pandas as pd
 
-def generate_signals(df):
-    """Generate trading signals based on technical indicators."""
-    signals = pd.DataFrame(index=df.index)
-    
-    # RSI Signals
-    signals['RSI_Signal'] = 'Neutral'
-    signals.loc[df['RSI'] < 30, 'RSI_Signal'] = 'Oversold'
-    signals.loc[df['RSI'] > 70, 'RSI_Signal'] = 'Overbought'
-    
-    # MACD Signals
-    signals['MACD_Signal'] = 'Neutral'
-    signals.loc[df['MACD'] > df['MACD_Signal'], 'MACD_Signal'] = 'Buy'
-    signals.loc[df['MACD'] < df['MACD_Signal'], 'MACD_Signal'] = 'Sell'
-    
-    # Bollinger Bands Signals
-    signals['BB_Signal'] = 'Neutral'
-    signals.loc[df['Close'] < df['BB_Lower'], 'BB_Signal'] = 'Oversold'
-    signals.loc[df['Close'] > df['BB_Upper'], 'BB_Signal'] = 'Overbought'
-    
-    # Moving Average Signals
-    signals['MA_Signal'] = 'Neutral'
-    signals.loc[df['Close'] > df['SMA_20'], 'MA_Signal'] = 'Bullish'
-    signals.loc[df['Close'] < df['SMA_20'], 'MA_Signal'] = 'Bearish'
-    
+from utils.metrics import timed
+from utils.patterns import PATTERN_BARS, PATTERN_COLUMNS, describe_patterns, pattern_frame
+
+# Signal codes, stored as int8: bullish side, neutral, bearish side
+BULLISH, NEUTRAL, BEARISH = 1, 0, -1
+
+# Display labels per signal column, indexed by code + 1 (bearish, neutral, bullish)
+SIGNAL_LABELS = {
+    'RSI_Signal': ('Overbought', 'Neutral', 'Oversold'),
+    'MACD_Signal': ('Sell', 'Neutral', 'Buy'),
+    'BB_Signal': ('Overbought', 'Neutral', 'Oversold'),
+    'MA_Signal': ('Bearish', 'Neutral', 'Bullish'),
+}
+SIGNAL_COLUMNS = tuple(SIGNAL_LABELS)
+
+# Names used by get_signal_summary for each signal column
+SUMMARY_NAMES = {
+    'RSI_Signal': 'RSI',
+    'MACD_Signal': 'MACD',
+    'BB_Signal': 'Bollinger',
+    'MA_Signal': 'Moving Average',
+}
+
+def _code(bullish, bearish):
+    return np.select([bearish, bullish], [BEARISH, BULLISH], NEUTRAL).astype(np.int8)
+
+def signal_code_arrays(columns):
+    """Signal codes from a mapping of indicator column to array (or Series).
+
+    Returns a dict of signal column to int8 array, for callers such as the
+    live alert engine that work on plain arrays.
+    """
+    close = np.asarray(columns['Close'], dtype=float)
+    rsi = np.asarray(columns['RSI'], dtype=float)
+    macd = np.asarray(columns['MACD'], dtype=float)
+    macd_signal = np.asarray(columns['MACD_Signal'], dtype=float)
+    sma = np.asarray(columns['SMA_20'], dtype=float)
+    return {
+        'RSI_Signal': _code(rsi < 30, rsi > 70),
+        'MACD_Signal': _code(macd > macd_signal, macd < macd_signal),
+        'BB_Signal': _code(close < np.asarray(columns['BB_Lower'], dtype=float),
+                           close > np.asarray(columns['BB_Upper'], dtype=float)),
+        'MA_Signal': _code(close > sma, close < sma),
+    }
+
+def signal_codes(df):
+    """Encode the signals of every row of an indicator frame as int8 codes."""
+    return pd.DataFrame(signal_code_arrays(df), index=df.index)
+
+@timed('signals')
+def generate_signals(df, latest_only=False):
+    """Generate trading signals based on technical indicators.
+
+    Returns int8 codes (``BULLISH``, ``NEUTRAL``, ``BEARISH``) per bar; use
+    ``decode_signals`` for display labels. When ``df`` has OHLC columns the
+    ``utils.patterns`` codes are added as well. ``latest_only`` encodes just
+    the final bar.
+    """
+    signals = signal_codes(df.iloc[-1:] if latest_only else df)
+    if {'Open', 'High', 'Low'}.issubset(df.columns):
+        # Patterns look back a few bars, so the latest one needs only that much history
+        patterns = pattern_frame(df.iloc[-PATTERN_BARS:] if latest_only else df)
+        signals = pd.concat([signals, patterns.iloc[-len(signals):]], axis=1)
     return signals
 
+def decode_signals(signals):
+    """Turn a frame of signal codes into the display labels."""
+    return pd.DataFrame({
+        column: np.asarray(SIGNAL_LABELS[column], dtype=object)[signals[column].to_numpy() + 1]
+        for column in SIGNAL_COLUMNS
+    }, index=signals.index)
+
+def pack_signals(signals):
+    """Pack the four signal codes of each bar into one uint8 (two bits each)."""
+    packed = np.zeros(len(signals), dtype=np.uint8)
+    for shift, column in enumerate(SIGNAL_COLUMNS):
+        packed |= ((signals[column].to_numpy() + 1).astype(np.uint8) << (2 * shift))
+    return pd.Series(packed, index=signals.index, name='Signals')
+
+def unpack_signals(packed):
+    """Inverse of ``pack_signals``."""
+    values = np.asarray(packed, dtype=np.uint8)
+    return pd.DataFrame({
+        column: (((values >> (2 * shift)) & 0b11).astype(np.int8) - 1)
+        for shift, column in enumerate(SIGNAL_COLUMNS)
+    }, index=getattr(packed, 'index', None))
+
+def _overall(bullish_count, bearish_count):
+    return np.select([bullish_count > bearish_count, bearish_count > bullish_count],
+                     ['Bullish', 'Bearish'], 'Neutral')
+
 def get_signal_summary(signals):
     """Generate a summary of current signals."""
-    latest_signals = signals.iloc[-1]
-    
-    summary = {
-        'RSI': latest_signals['RSI_Signal'],
-        'MACD': latest_signals['MACD_Signal'],
-        'Bollinger': latest_signals['BB_Signal'],
-        'Moving Average': latest_signals['MA_Signal']
-    }
-    
+    latest = signals.iloc[-1:]
+    labels = decode_signals(latest).iloc[-1]
+    codes = latest[list(SIGNAL_COLUMNS)].to_numpy()
+
+    summary = {SUMMARY_NAMES[column]: labels[column] for column in SIGNAL_COLUMNS}
+    if set(PATTERN_COLUMNS).issubset(latest.columns):
+        summary['Patterns'] = describe_patterns(latest).iloc[-1]
+
     # Overall sentiment
-    bullish_count = sum(1 for signal in summary.values() if signal in ['Buy', 'Bullish', 'Oversold'])
-    bearish_count = sum(1 for signal in summary.values() if signal in ['Sell', 'Bearish', 'Overbought'])
-    
-    if bullish_count > bearish_count:
-        summary['Overall'] = 'Bullish'
-    elif bearish_count > bullish_count:
-        summary['Overall'] = 'Bearish'
-    else:
-        summary['Overall'] = 'Neutral'
-    
+    summary['Overall'] = str(_overall((codes > 0).sum(), (codes < 0).sum()))
     return summary
+
+def signal_labels(snapshot):
+    """Label the latest signals for every symbol of a ``latest_snapshot`` frame."""
+    return decode_signals(signal_codes(snapshot))
+
+def get_signal_summaries(signals):
+    """Build the ``get_signal_summary`` dict for every row of a signal code frame."""
+    codes = signals[list(SIGNAL_COLUMNS)].to_numpy()
+    overall = _overall((codes > 0).sum(axis=1), (codes < 0).sum(axis=1))
+    labels = decode_signals(signals)
+    patterns = (describe_patterns(signals) if set(PATTERN_COLUMNS).issubset(signals.columns)
+                else pd.Series(None, index=signals.index))
+
+    summaries = {}
+    for symbol, row, described, sentiment in zip(labels.index, labels.itertuples(index=False), patterns, overall):
+        summary = {SUMMARY_NAMES[column]: value for column, value in zip(SIGNAL_COLUMNS, row)}
+        if described is not None:
+            summary['Patterns'] = described
+        summary['Overall'] = str(sentiment)
+        summaries[symbol] = summary
+    return summaries
@@ -1,41 +1,217 @@
 import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
+from utils import metrics, ohlcv_cache
+from utils.fetch_engine import get_engine
+from utils.indicators import add_indicators
+from utils.metadata_store import get_metadata_store
+from utils.result_cache import get_result_cache, ttl_for_interval
 
-def get_stock_data(symbol, period='1y', interval='1d'):
-    """Fetch stock data from yfinance."""
+BULK_CHUNK_SIZE = 50
+
+def _serve_stale(cached, period):
+    """Return cached history when a top-up fetch fails but the cache covers the period."""
+    if ohlcv_cache.covers(cached, period):
+        return ohlcv_cache.slice_period(cached, period)
+    return None
+
+def download_history(symbol, period='1y', interval='1d', timeout=None):
+    """Download one NSE symbol's history with yfinance."""
+    # Add .NS suffix for NSE stocks
+    ticker = yf.Ticker(f"{symbol}.NS")
+    # Dividends and Stock Splits columns are never used
+    return ticker.history(period=period, interval=interval, actions=False, timeout=timeout)
+
+def get_stock_data(symbol, period='1y', interval='1d', use_cache=True, engine=None):
+    """Fetch stock data from yfinance, topping up the on-disk cache.
+
+    With ``use_cache`` results are also memoized in the process-wide result
+    cache, so sessions asking for the same symbol, period and interval share
+    one fetch. The returned frame is shared and must not be modified.
+    """
+    if not use_cache:
+        return _load_stock_data(symbol, period, interval, use_cache, engine)
+    return get_result_cache().get_or_compute(
+        ('stock_data', symbol, period, interval),
+        lambda: _load_stock_data(symbol, period, interval, use_cache, engine),
+        ttl_for_interval(interval),
+        cache_if=lambda result: result[1] is None
+    )
+
+def _load_stock_data(symbol, period, interval, use_cache, engine):
+    cached = None
     try:
-        # Add .NS suffix for NSE stocks
-        ticker = yf.Ticker(f"{symbol}.NS")
-        df = ticker.history(period=period, interval=interval)
+        cached, fetch_period = ohlcv_cache.plan(symbol, period, interval) if use_cache else (None, period)
+        if fetch_period is None:
+            return ohlcv_cache.slice_period(cached, period), None
+
+        engine = engine or get_engine()
+        with metrics.span('fetch', symbol):
+            df = engine.call(download_history, symbol, fetch_period, interval)
         
         if df.empty:
+            stale = _serve_stale(cached, period)
+            if stale is not None:
+                return stale, None
             return None, "No data available for this symbol"
-        
+
+        if use_cache:
+            df = ohlcv_cache.update(symbol, interval, cached, df, fetch_period)
+            df = ohlcv_cache.slice_period(df, period)
         return df, None
     except Exception as e:
+        stale = _serve_stale(cached, period)
+        if stale is not None:
+            return stale, None
         return None, f"Error fetching data: {str(e)}"
 
-def get_company_info(symbol):
-    """Get company information."""
-    try:
-        ticker = yf.Ticker(f"{symbol}.NS")
-        info = ticker.info
-        return {
-            'name': info.get('longName', symbol),
-            'sector': info.get('sector', 'N/A'),
-            'industry': info.get('industry', 'N/A'),
-            'market_cap': info.get('marketCap', 'N/A'),
-            'volume': info.get('volume', 'N/A')
-        }
-    except:
-        return {
-            'name': symbol,
-            'sector': 'N/A',
-            'industry': 'N/A',
-            'market_cap': 'N/A',
-            'volume': 'N/A'
-        }
+def cached_indicators(symbol, period, interval, df):
+    """``add_indicators(df)``, memoized per symbol, period, interval and last bar."""
+    key = ('indicators', symbol, period, interval, len(df), df.index[-1])
+    return get_result_cache().get_or_compute(key, lambda: add_indicators(df), ttl_for_interval(interval))
+
+def get_indicator_data(symbol, period='1y', interval='1d'):
+    """``get_stock_data`` plus ``add_indicators``, memoized like the fetch itself."""
+    df, error = get_stock_data(symbol, period, interval)
+    if error:
+        return None, error
+    return cached_indicators(symbol, period, interval, df), None
+
+def download_chunk(symbols, period='1y', interval='1d', timeout=None):
+    """Download several NSE symbols in one yfinance request."""
+    tickers = [f"{symbol}.NS" for symbol in symbols]
+    raw = yf.download(tickers, period=period, interval=interval, group_by='ticker',
+                      auto_adjust=True, actions=False, threads=True, progress=False, timeout=timeout)
+
+    frames = {}
+    for symbol, ticker in zip(symbols, tickers):
+        if isinstance(raw.columns, pd.MultiIndex):
+            if ticker not in raw.columns.get_level_values(0):
+                continue
+            df = raw[ticker]
+        else:
+            df = raw
+        # Daily bars come back tz-naive, unlike Ticker.history
+        frames[symbol] = ohlcv_cache.to_market_time(df.dropna(how='all'))
+    return frames
+
+def get_stock_data_bulk(symbols, period='1y', interval='1d', chunk_size=BULK_CHUNK_SIZE,
+                        provider=download_chunk, progress=None, use_cache=True, engine=None, max_age=None):
+    """Fetch stock data for many symbols, one provider request per chunk.
+
+    Returns a ``(data, errors)`` pair of dicts keyed by symbol. A failing chunk
+    or symbol is reported in ``errors`` and does not abort the rest of the batch.
+    Symbols with a fresh on-disk cache are served without a request, and stale
+    ones only download the bars missing since their last cached timestamp.
+    ``max_age`` overrides how long a cached symbol counts as fresh. Chunks
+    are fetched concurrently through ``engine`` and ``provider`` is called
+    as ``provider(symbols, period=..., interval=..., timeout=...)``.
+    ``progress`` is called as ``progress(done, total)`` after each chunk.
+    """
+    data = {}
+    errors = {}
+    for done, total, frames, chunk_errors in iter_stock_data_bulk(
+            symbols, period, interval, chunk_size, provider, use_cache, engine, max_age):
+        data.update(frames)
+        errors.update(chunk_errors)
+        if progress:
+            progress(done, total)
+    return data, errors
+
+def iter_stock_data_bulk(symbols, period='1y', interval='1d', chunk_size=BULK_CHUNK_SIZE,
+                         provider=download_chunk, use_cache=True, engine=None, max_age=None):
+    """Fetch like ``get_stock_data_bulk``, yielding each chunk as it completes.
+
+    Yields ``(done, total, data, errors)`` where ``data`` and ``errors`` hold
+    only that chunk's symbols. Symbols served from a fresh cache come first,
+    in one batch with any whose cache could not be read, before any request
+    is made.
+    """
+    symbols = list(dict.fromkeys(symbols))
+
+    # Group symbols by how much history they still need
+    fresh = {}
+    cached = {}
+    pending = {}
+    plan_errors = {}
+    for symbol in symbols:
+        try:
+            if use_cache:
+                cached[symbol], fetch_period = ohlcv_cache.plan(symbol, period, interval, max_age)
+            else:
+                fetch_period = period
+            if fetch_period is None:
+                fresh[symbol] = ohlcv_cache.slice_period(cached[symbol], period)
+            else:
+                pending.setdefault(fetch_period, []).append(symbol)
+        except Exception as e:
+            plan_errors[symbol] = f"Error fetching data: {str(e)}"
+
+    done = len(fresh) + len(plan_errors)
+    if fresh or plan_errors:
+        yield done, len(symbols), fresh, plan_errors
+
+    tasks = [
+        (fetch_period, group[start:start + chunk_size])
+        for fetch_period, group in pending.items()
+        for start in range(0, len(group), chunk_size)
+    ]
+
+    def fetch(task, timeout=None):
+        fetch_period, chunk = task
+        with metrics.span('fetch', metrics.chunk_label(chunk)):
+            return provider(chunk, period=fetch_period, interval=interval, timeout=timeout)
+
+    engine = engine or get_engine()
+    for (fetch_period, chunk), frames, error in engine.map(fetch, tasks):
+        chunk_error = f"Error fetching data: {str(error)}" if error else None
+        frames = frames or {}
+        data = {}
+        errors = {}
+
+        for symbol in chunk:
+            df = frames.get(symbol)
+            if df is not None and not df.empty:
+                if use_cache:
+                    df = ohlcv_cache.update(symbol, interval, cached[symbol], df, fetch_period)
+                    df = ohlcv_cache.slice_period(df, period)
+                data[symbol] = df
+                continue
+
+            stale = _serve_stale(cached.get(symbol), period)
+            if stale is not None:
+                data[symbol] = stale
+            else:
+                errors[symbol] = chunk_error or "No data available for this symbol"
+
+        done += len(chunk)
+        yield done, len(symbols), data, errors
+
+def download_info(symbol, timeout=None):
+    """Download the yfinance info dict for one NSE symbol."""
+    # yfinance does not expose a timeout for info lookups
+    return yf.Ticker(f"{symbol}.NS").info
+
+def get_company_info(symbol, engine=None):
+    """Get company information.
+
+    Served from the metadata store; the provider is only asked when a field
+    has expired, and stored values are served if that request fails.
+    """
+    store = get_metadata_store()
+    if store.expired(symbol):
+        try:
+            store.update_info({symbol: (engine or get_engine()).call(download_info, symbol)})
+        except Exception:
+            pass
+    info = store.get(symbol)
+    return {
+        'name': info.get('name', symbol),
+        'sector': info.get('sector', 'N/A'),
+        'industry': info.get('industry', 'N/A'),
+        'market_cap': info.get('market_cap', 'N/A'),
+        'volume': info.get('volume', 'N/A')
+    }
 
 def format_number(number):
     """Format large numbers to readable format."""
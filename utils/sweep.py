@@ -0,0 +1,278 @@
+"""Parameter sweeps of the indicators and scoring rules over a symbol universe.
+
+``sweep`` scores every parameter set of a grid (indicator periods,
+Bollinger width, RSI and volume thresholds) on one panel, optionally with a
+backtest of each, and returns a tidy frame with one row per parameter set
+and symbol. The indicators are built from shared intermediates: one set of
+cumulative sums serves every SMA and Bollinger window, one array of price
+changes every RSI period, and each EMA span is computed once for all the
+MACD settings that use it::
+
+    python -m utils.sweep    # 50-point grid against a single configuration
+"""
+import itertools
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils import kernels
+from utils.backtest import (COST_BPS, RECOMMENDATIONS, bar_returns, performance, positions_from_scores,
+                            recommendation_codes, score_panel, strategy_returns)
+from utils.metrics import timed
+from utils.panel import Compaction, build_panel
+
+# The settings of add_indicators and calculate_technical_score
+DEFAULT_PARAMS = {
+    'sma_period': 20,
+    'bb_period': 20,
+    'bb_std': 2.0,
+    'rsi_period': 14,
+    'macd_fast': 12,
+    'macd_slow': 26,
+    'macd_signal': 9,
+    'rsi_oversold': 30,
+    'rsi_overbought': 70,
+    'volume_multiple': 1.5,
+}
+VOLUME_PERIOD = 20
+
+def _cumulative(values):
+    """Cumulative sums along axis 0 with a leading row of zeros."""
+    out = np.zeros((len(values) + 1,) + values.shape[1:])
+    np.cumsum(values, axis=0, out=out[1:])
+    return out
+
+class SharedIndicators:
+    """Indicator arrays of one (time x symbol) panel for any parameters.
+
+    Every array is computed once per distinct setting and memoised, and
+    the rolling windows all read the same cumulative sums. Values match the
+    ``utils.kernels`` functions used by ``add_indicators``.
+    """
+
+    def __init__(self, close, volume, rsi_smoothing='sma'):
+        if rsi_smoothing not in kernels.RSI_SMOOTHING:
+            raise ValueError(f"Unknown RSI smoothing: {rsi_smoothing}")
+        self.close = close
+        self.volume = volume
+        self.rsi_smoothing = rsi_smoothing
+        self.memo = {}
+
+        listed = ~np.isnan(close)
+        # Centring each column on its first close keeps the sums of squares precise
+        self.reference = np.nan_to_num(close[np.argmax(listed, axis=0), np.arange(close.shape[1])])
+        centred = np.where(listed, close - self.reference, 0.0)
+        self.counts = _cumulative(listed.astype(float))
+        self.sums = _cumulative(centred)
+        self.squares = _cumulative(centred * centred)
+
+        self.delta = np.full(close.shape, np.nan)
+        self.delta[1:] = close[1:] - close[:-1]
+        if rsi_smoothing == 'sma':
+            # As in kernels.rsi, a listed bar without a previous close counts as no change
+            self.gains = _cumulative(np.where(listed & (self.delta > 0), self.delta, 0.0))
+            self.losses = _cumulative(np.where(listed & (self.delta < 0), -self.delta, 0.0))
+
+        volume_listed = ~np.isnan(volume)
+        self.volume_counts = _cumulative(volume_listed.astype(float))
+        self.volume_sums = _cumulative(np.where(volume_listed, volume, 0.0))
+
+    def _memoised(self, key, compute):
+        if key not in self.memo:
+            self.memo[key] = compute()
+        return self.memo[key]
+
+    @staticmethod
+    def _window(sums, counts, window):
+        """Window totals of a ``_cumulative`` array, NaN unless all ``window`` bars are present."""
+        out = np.full((len(sums) - 1,) + sums.shape[1:], np.nan)
+        if window <= len(out):
+            full = counts[window:] - counts[:-window] == window
+            out[window - 1:] = np.where(full, sums[window:] - sums[:-window], np.nan)
+        return out
+
+    def sma(self, window):
+        return self._memoised(('sma', window), lambda: self._window(self.sums, self.counts, window) / window
+                              + self.reference)
+
+    def std(self, window):
+        def compute():
+            total = self._window(self.sums, self.counts, window)
+            squares = self._window(self.squares, self.counts, window)
+            return np.sqrt(np.maximum(squares - total * total / window, 0.0) / (window - 1))
+        return self._memoised(('std', window), compute)
+
+    def ema(self, span):
+        return self._memoised(('ema', span), lambda: kernels.ewm_mean(self.close, span))
+
+    def macd(self, fast, slow, signal):
+        """``(macd, signal line)`` for one MACD setting."""
+        def compute():
+            macd = self.ema(fast) - self.ema(slow)
+            return macd, kernels.ewm_mean(macd, signal)
+        return self._memoised(('macd', fast, slow, signal), compute)
+
+    def rsi(self, period):
+        def compute():
+            if self.rsi_smoothing == 'sma':
+                average_gain = self._window(self.gains, self.counts, period)
+                average_loss = self._window(self.losses, self.counts, period)
+            else:
+                delta = self.delta
+                gain = np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0))
+                loss = np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0))
+                average_gain = kernels.ewm_mean(gain, alpha=1.0 / period, min_periods=period)
+                average_loss = kernels.ewm_mean(loss, alpha=1.0 / period, min_periods=period)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return 100 - (100 / (1 + average_gain / average_loss))
+        return self._memoised(('rsi', period), compute)
+
+    def volume_sma(self, window=VOLUME_PERIOD):
+        return self._memoised(('volume_sma', window),
+                              lambda: self._window(self.volume_sums, self.volume_counts, window) / window)
+
+    def conditions(self, params, at=None):
+        """``backtest.score_conditions`` for one parameter set.
+
+        ``at`` (an index into the panel arrays, such as the latest bar of
+        every symbol) evaluates only those bars.
+        """
+        pick = (lambda values: values) if at is None else (lambda values: values[at])
+        close = pick(self.close)
+        sma = pick(self.sma(params['sma_period']))
+        bb_middle = pick(self.sma(params['bb_period']))
+        bb_width = pick(self.std(params['bb_period'])) * params['bb_std']
+        rsi = pick(self.rsi(params['rsi_period']))
+        macd, macd_signal = (pick(values) for values in
+                             self.macd(params['macd_fast'], params['macd_slow'], params['macd_signal']))
+
+        with np.errstate(invalid='ignore'):
+            oversold = rsi < params['rsi_oversold']
+            overbought = rsi > params['rsi_overbought']
+            above_sma = close > sma
+            conditions = {
+                'RSI_Oversold': oversold,
+                'RSI_Overbought': overbought,
+                'RSI_Neutral': ~oversold & ~overbought,
+                'MACD_Bullish': macd > macd_signal,
+                'MACD_Bearish': macd < macd_signal,
+                'Above_SMA20': above_sma,
+                'Below_SMA20': ~above_sma,
+                'Below_BB_Lower': close < bb_middle - bb_width,
+                'Above_BB_Upper': close > bb_middle + bb_width,
+                'High_Volume': pick(self.volume) > pick(self.volume_sma()) * params['volume_multiple'],
+            }
+        valid = ~np.isnan(close) & ~np.isnan(sma) & ~np.isnan(rsi)
+        return conditions, valid
+
+def sweep_grid(**options):
+    """Expand ``{param: [values]}`` options into parameter sets, skipping MACDs with fast >= slow."""
+    names = list(options)
+    grid = []
+    for values in itertools.product(*(options[name] for name in names)):
+        params = dict(zip(names, values))
+        merged = dict(DEFAULT_PARAMS, **params)
+        if merged['macd_fast'] < merged['macd_slow']:
+            grid.append(params)
+    return grid
+
+@timed('sweep')
+def sweep(data=None, grid=None, panel=None, history=False, weights=None, thresholds=None, positions=None,
+          long_only=False, cost_bps=COST_BPS, rsi_smoothing='sma'):
+    """Score every parameter set of ``grid`` across the universe.
+
+    ``grid`` is a list of parameter dicts (see ``sweep_grid``), each filled
+    in from ``DEFAULT_PARAMS``; by default only the defaults are run.
+    ``data`` maps symbol to an OHLCV DataFrame (or pass a prebuilt
+    ``panel``). Returns a tidy DataFrame with one row per parameter set and
+    symbol: the ``config`` number, the parameters, the ``symbol`` and its
+    latest ``score`` and ``recommendation``. With ``history`` every bar is
+    scored and the backtest statistics are added; the remaining arguments
+    are those of ``backtest``.
+    """
+    panel = build_panel(data) if panel is None else panel
+    close_df = panel['Close']
+    close = close_df.to_numpy(dtype=float)
+    listed = ~np.isnan(close)
+    # As in panel_indicators, each symbol's indicators run over its own bars
+    compaction = Compaction(listed)
+    shared = SharedIndicators(compaction.compact(close), compaction.compact(panel['Volume'].to_numpy(dtype=float)),
+                              rsi_smoothing)
+    returns = bar_returns(close) if history else None
+    columns = np.arange(close.shape[1])
+    latest_bar = (len(close) - 1 - np.argmax(listed[::-1], axis=0), columns)
+    # Every symbol's latest bar is the last compacted row
+    latest_compact = (np.full(close.shape[1], compaction.length - 1), columns)
+    labels = np.array(RECOMMENDATIONS, dtype=object)
+
+    frames = []
+    for number, params in enumerate(grid or [{}]):
+        params = dict(DEFAULT_PARAMS, **params)
+        stats = {}
+        if history:
+            conditions, valid = shared.conditions(params)
+            conditions = {name: compaction.expand(mask, False) for name, mask in conditions.items()}
+            valid = compaction.expand(valid, False)
+            scores = score_panel(conditions, weights)
+            held = positions_from_scores(scores, valid, thresholds, positions, long_only)
+            net, turnover = strategy_returns(returns, held, cost_bps)
+            stats = performance(net, turnover, held, listed)
+            latest = np.where(valid[latest_bar], scores[latest_bar], np.nan)
+        else:
+            # The indicators need the full history, the conditions only the latest bar
+            conditions, valid = shared.conditions(params, latest_compact)
+            latest = np.where(valid, score_panel(conditions, weights), np.nan)
+        frames.append(pd.DataFrame({
+            'config': number,
+            **params,
+            'symbol': close_df.columns,
+            'score': latest,
+            'recommendation': np.where(np.isnan(latest), None, labels[recommendation_codes(latest, thresholds)]),
+            **stats,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+def benchmark(symbols=500, bars=250):
+    """Time a 50-point grid against a single configuration and against recomputing per point.
+
+    The latest-bar sweep is timed as is and with ``history`` (every bar
+    scored and backtested).
+    """
+    from utils.fetch_engine import synthetic_ohlcv
+    from utils.panel import latest_snapshot
+    from utils.recommendation_engine import calculate_technical_scores
+
+    panel = build_panel({f"SYM{i:04d}": synthetic_ohlcv(bars, seed=i) for i in range(symbols)})
+    grid = sweep_grid(sma_period=[10, 20, 50, 100, 200], rsi_period=[7, 10, 14, 21, 28], macd_fast=[8, 12])
+
+    results = {'symbols': symbols, 'bars': bars, 'grid_points': len(grid)}
+    for history in (False, True):
+        prefix = 'history_' if history else ''
+        start = time.perf_counter()
+        single = sweep(panel=panel, history=history)
+        single_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sweep(panel=panel, grid=grid, history=history)
+        grid_seconds = time.perf_counter() - start
+
+        # Without sharing, every point computes its own indicators
+        start = time.perf_counter()
+        for params in grid:
+            sweep(panel=panel, grid=[params], history=history)
+        unshared_seconds = time.perf_counter() - start
+
+        results.update({
+            f"{prefix}single_seconds": round(single_seconds, 3),
+            f"{prefix}grid_seconds": round(grid_seconds, 3),
+            f"{prefix}unshared_seconds": round(unshared_seconds, 3),
+            f"{prefix}grid_vs_single": round(grid_seconds / single_seconds, 1),
+        })
+
+    expected = calculate_technical_scores(latest_snapshot(panel)).to_numpy()
+    results['default_score_mismatches'] = int((single['score'].to_numpy() != expected).sum())
+    return results
+
+if __name__ == "__main__":
+    print(benchmark())